@@ -0,0 +1,190 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from instrumentation import instrumentation
+
+class Ticket:
+    """One model call's place in the admission queue; use as a context manager around the call.
+
+    `degraded` is True when the call was not admitted and the caller should serve its cheap fallback instead.
+    """
+    __slots__ = ("controller", "session_id", "operation", "deadline", "granted", "degraded", "reason", "waited")
+
+    def __init__(self, controller, session_id, operation, deadline):
+        self.controller = controller
+        self.session_id = session_id
+        self.operation = operation
+        self.deadline = deadline
+        self.granted = False
+        self.degraded = False
+        self.reason = None
+        self.waited = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.granted:
+            self.granted = False
+            self.controller._release()
+
+class AdmissionController:
+    """Bounds the model calls running at once across sessions and queues the rest fairly.
+
+    At most `max_active` calls hold a slot. Waiting calls are queued per session and slots are handed out
+    round-robin across sessions, so a session with several calls in line cannot starve the others. Under
+    overload a call is shed to its degraded mode instead of waiting: immediately when `degrade_depth` calls are
+    already queued, or once it has waited longer than its operation's queue-time SLO (`slos`, in seconds).
+    """
+
+    def __init__(self, max_active=8, degrade_depth=32, slos=None, default_slo=5.0, poll=0.25):
+        self.max_active = max(1, max_active)
+        self.degrade_depth = degrade_depth
+        self.slos = dict(slos or {})
+        self.default_slo = default_slo
+        self.poll = poll
+        self.active = 0
+        self.admitted = 0
+        self.shed = {"queue_depth": 0, "slo": 0}
+        self.operations = {}  # operation -> {"admitted", "degraded"} counts
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._queues = OrderedDict()  # session_id -> deque of waiting tickets, in round-robin order
+        self._waiting = 0
+        self._cond = threading.Condition()
+
+    def admit(self, state, operation, on_queue=None):
+        """Wait for a slot for one model call of the session and return its Ticket.
+
+        on_queue(position) is called from this thread whenever the session's place in line changes, with 0 once
+        the call is admitted or shed.
+        """
+        session_id = state.session_id
+        start = time.monotonic()
+        ticket = Ticket(self, session_id, operation, start + self.slos.get(operation, self.default_slo))
+        queued = False
+        with self._cond:
+            if self.active < self.max_active and not self._waiting:
+                self._grant(ticket)
+            elif self._waiting >= self.degrade_depth:
+                self._shed(ticket, "queue_depth")
+            else:
+                self._queues.setdefault(session_id, deque()).append(ticket)
+                self._waiting += 1
+                queued = True
+                try:
+                    self._wait(ticket, on_queue)
+                except BaseException:
+                    # e.g. the UI callback failed: give up the place in line, or the slot if already granted
+                    self._dequeue(ticket)
+                    ticket.__exit__(None, None, None)
+                    raise
+        ticket.waited = time.monotonic() - start
+        self._account(ticket, state)
+        if on_queue is not None and queued:
+            on_queue(0)
+        return ticket
+
+    def _wait(self, ticket, on_queue):
+        reported = None
+        while not ticket.granted:
+            remaining = ticket.deadline - time.monotonic()
+            if remaining <= 0:
+                self._dequeue(ticket)
+                self._shed(ticket, "slo")
+                return
+            position = self._position(ticket)
+            if on_queue is not None and position != reported:
+                reported = position
+                # Called without the lock so a slow UI update does not hold up the queue
+                self._cond.release()
+                try:
+                    on_queue(position)
+                finally:
+                    self._cond.acquire()
+                continue
+            self._cond.wait(min(remaining, self.poll))
+
+    def _grant(self, ticket):
+        ticket.granted = True
+        self.active += 1
+
+    def _shed(self, ticket, reason):
+        ticket.degraded = True
+        ticket.reason = reason
+        self.shed[reason] += 1
+
+    def _dequeue(self, ticket):
+        queue = self._queues.get(ticket.session_id)
+        if queue is not None and ticket in queue:
+            queue.remove(ticket)
+            self._waiting -= 1
+            if not queue:
+                del self._queues[ticket.session_id]
+
+    def _release(self):
+        with self._cond:
+            self.active -= 1
+            while self.active < self.max_active and self._queues:
+                # Serve the session at the head of the rotation, then move it to the back
+                session_id, queue = next(iter(self._queues.items()))
+                self._grant(queue.popleft())
+                self._waiting -= 1
+                if queue:
+                    self._queues.move_to_end(session_id)
+                else:
+                    del self._queues[session_id]
+            self._cond.notify_all()
+
+    def _position(self, ticket):
+        """1-based place of the ticket in the order slots will be handed out."""
+        position = 0
+        for depth in range(max(len(queue) for queue in self._queues.values())):
+            for queue in self._queues.values():
+                if depth < len(queue):
+                    position += 1
+                    if queue[depth] is ticket:
+                        return position
+        return position
+
+    def position(self, session_id):
+        """Place in line of the session's first waiting call, or 0 if it has none."""
+        with self._cond:
+            queue = self._queues.get(session_id)
+            return self._position(queue[0]) if queue else 0
+
+    def _account(self, ticket, state):
+        with self._cond:
+            if ticket.granted:
+                self.admitted += 1
+            counts = self.operations.setdefault(ticket.operation, {"admitted": 0, "degraded": 0})
+            counts["degraded" if ticket.degraded else "admitted"] += 1
+            self.total_wait += ticket.waited
+            self.max_wait = max(self.max_wait, ticket.waited)
+        instrumentation.observe(f"admission_wait_{ticket.operation}", ticket.waited, state,
+                                result="degraded" if ticket.degraded else "admitted")
+        if ticket.degraded:
+            state.log_interaction(
+                f"Overload: {ticket.operation} served degraded ({ticket.reason}, waited {ticket.waited:.1f}s)", "admission"
+            )
+
+    @property
+    def overloaded(self):
+        """True while new calls would be shed on arrival."""
+        with self._cond:
+            return self._waiting >= self.degrade_depth
+
+    def stats(self):
+        """Current load and counters since start."""
+        with self._cond:
+            decisions = self.admitted + sum(self.shed.values())
+            return {
+                "active": self.active,
+                "waiting": self._waiting,
+                "sessions_waiting": len(self._queues),
+                "admitted": self.admitted,
+                "shed": dict(self.shed),
+                "operations": {operation: dict(counts) for operation, counts in self.operations.items()},
+                "avg_wait_seconds": round(self.total_wait / decisions, 3) if decisions else 0.0,
+                "max_wait_seconds": round(self.max_wait, 3)
+            }
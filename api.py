@@ -0,0 +1,333 @@
+"""Asynchronous HTTP API for running interviews without the Streamlit UI.
+
+    python api.py --port 8080
+
+Endpoints (JSON in and out):
+    POST /sessions                  start an interview; returns its session_id and the greeting
+    POST /sessions/{id}/messages    {"message": "..."}; returns the assistant's reply
+    GET  /sessions/{id}             current stage, candidate data, questions, answers and queue position
+    GET  /health                    load, queue and model status
+"""
+import argparse
+import asyncio
+import json
+import logging
+import re
+import signal
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from state import HiringState
+from services import MODEL_STAGES, build_services, converse
+from question_bank import create_question_bank
+from session_store import create_session_store
+from config import (
+    QUESTION_BANK_ENABLED, QUESTION_BANK_PATH, QUESTION_BANK_TTL_HOURS, QUESTION_BANK_MAX_KEYS, QUESTION_BANK_VARIANTS,
+    QUESTION_BANK_OFFLINE_PATH, SESSION_STORE_URL, SESSION_TTL_HOURS, API_MAX_CONCURRENCY, API_MAX_QUEUE,
+    API_STATE_CACHE_SIZE, API_MAX_BODY_BYTES
+)
+
+logger = logging.getLogger(__name__)
+
+SESSION_PATH = re.compile(r"^/sessions/([0-9a-f]{32})(/messages)?$")
+
+class ApiError(Exception):
+    """Turned into a JSON error response with the given status."""
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+class InterviewService:
+    """Runs conversation turns for API sessions.
+
+    Turns execute on a bounded thread pool so the event loop never blocks on a model call, and session store
+    loads and eviction saves run on a small pool of their own so a slow store does not block it either. At most
+    `max_concurrency` turns run at once and at most `max_queue` more may wait; beyond that requests are
+    rejected with 503 so clients back off instead of piling up. Messages of one session are serialized.
+    Idle sessions live only in the session store; recently active states are also kept in a small LRU
+    so background sentiment results land on the object that is saved next.
+    """
+
+    def __init__(self, services_factory, session_store, question_bank=None, max_concurrency=4, max_queue=64,
+                 state_cache_size=1024):
+        self.services_factory = services_factory
+        self.store = session_store
+        self.question_bank = question_bank
+        self.max_queue = max_queue
+        self.state_cache_size = state_cache_size
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="api-turn")
+        self.store_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="api-store")
+        self.slots = asyncio.Semaphore(max_concurrency)
+        self.active = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self._states = OrderedDict()
+        self._flushing = {}  # evicted states until their save completes, so a reload never reads an older copy
+        self._session_locks = weakref.WeakValueDictionary()
+
+    async def _cache(self, state):
+        self._states[state.session_id] = state
+        self._states.move_to_end(state.session_id)
+        evicted = []
+        while len(self._states) > self.state_cache_size:
+            session_id, stale = self._states.popitem(last=False)
+            self._flushing[session_id] = stale
+            evicted.append(stale)
+        if evicted:
+            # Flush anything a background worker wrote since the last save
+            try:
+                await asyncio.get_running_loop().run_in_executor(self.store_executor, self._save_all, evicted)
+            finally:
+                for stale in evicted:
+                    if self._flushing.get(stale.session_id) is stale:
+                        del self._flushing[stale.session_id]
+
+    def _save_all(self, states):
+        for state in states:
+            self.store.save(state)
+
+    def _turn(self, state, message):
+        services = self.services_factory(state)
+        # Answer scores recorded after the closing turn are saved as soon as the evaluator finishes
+        response, state = converse(message, state, services, on_evaluated=self.store.save, question_bank=self.question_bank)
+        self.store.save(state)
+        return response, state
+
+    async def _run_turn(self, state, message):
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise ApiError(HTTPStatus.SERVICE_UNAVAILABLE, "Too many requests in progress, retry shortly",
+                           {"Retry-After": "1"})
+        self.waiting += 1
+        try:
+            await self.slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        try:
+            loop = asyncio.get_running_loop()
+            response, state = await loop.run_in_executor(self.executor, self._turn, state, message)
+        finally:
+            self.active -= 1
+            self.slots.release()
+        self.completed += 1
+        await self._cache(state)
+        return response, state
+
+    async def _load(self, session_id):
+        state = self._states.get(session_id) or self._flushing.get(session_id)
+        if state is None:
+            loop = asyncio.get_running_loop()
+            state = await loop.run_in_executor(self.store_executor, self._load_stored, session_id)
+        if state is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Unknown or expired session {session_id}")
+        return state
+
+    def _load_stored(self, session_id):
+        state, _ = self.store.load(session_id)
+        if state is not None:
+            sentiment_worker = self.services_factory(state).get("sentiment_worker")
+            if sentiment_worker is not None:
+                # Sentiment results queued for the evicted copy of the session are recorded on this one
+                sentiment_worker.attach(state)
+        return state
+
+    async def create_session(self):
+        response, state = await self._run_turn(HiringState(), "")
+        return {"session_id": state.session_id, "stage": state.stage, "response": response}
+
+    async def send_message(self, session_id, message):
+        lock = self._session_locks.get(session_id)
+        if lock is None:
+            lock = self._session_locks[session_id] = asyncio.Lock()
+        async with lock:
+            state = await self._load(session_id)
+            response, state = await self._run_turn(state, message)
+        return {"session_id": session_id, "stage": state.stage, "response": response}
+
+    async def get_session(self, session_id):
+        state = await self._load(session_id)
+        data = state.to_dict()
+        session = {key: data[key] for key in (
+            "session_id", "stage", "candidate_data", "tech_questions", "current_question_idx", "answers", "sentiments",
+            "evaluations"
+        )}
+        # Place in line of a message still waiting for a model slot (0 when none is waiting)
+        admission = self.services_factory(state).get("admission")
+        session["queue_position"] = admission.position(session_id) if admission is not None else 0
+        return session
+
+    def close(self):
+        """Finish the turns in progress and save every cached state, e.g. background results not yet flushed."""
+        self.executor.shutdown(wait=True)
+        self.store_executor.shutdown(wait=True)
+        self._save_all(list(self._states.values()))
+
+    def health(self):
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "cached_sessions": len(self._states),
+            "store": self.store.stats()
+        }
+
+async def read_request(reader, max_body_bytes):
+    """Parse one HTTP/1.1 request; returns None when the client closed the connection."""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, version = request_line.decode("latin-1").split()
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", 0) or 0)
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length header")
+    if length < 0:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length header")
+    if length > max_body_bytes:
+        raise ApiError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+    body = await reader.readexactly(length) if length else b""
+    keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+    return method, target.split("?", 1)[0], body, keep_alive
+
+def write_response(writer, status, payload, keep_alive, headers=None):
+    body = json.dumps(payload).encode()
+    lines = [
+        f"HTTP/1.1 {status.value} {status.phrase}",
+        "Content-Type: application/json",
+        f"Content-Length: {len(body)}",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}"
+    ]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+
+async def route(service, method, path, body):
+    """Dispatch a request to the service and return (status, payload)."""
+    if path == "/health" and method == "GET":
+        return HTTPStatus.OK, service.health()
+    if path == "/sessions" and method == "POST":
+        return HTTPStatus.CREATED, await service.create_session()
+    match = SESSION_PATH.match(path)
+    if match is None:
+        raise ApiError(HTTPStatus.NOT_FOUND, f"No route for {path}")
+    session_id, messages = match.groups()
+    if messages and method == "POST":
+        try:
+            message = json.loads(body or b"{}")["message"]
+        except (ValueError, KeyError, TypeError):
+            raise ApiError(HTTPStatus.BAD_REQUEST, 'Expected a JSON body like {"message": "..."}')
+        if not isinstance(message, str):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "message must be a string")
+        return HTTPStatus.OK, await service.send_message(session_id, message)
+    if not messages and method == "GET":
+        return HTTPStatus.OK, await service.get_session(session_id)
+    raise ApiError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} not allowed on {path}")
+
+def make_handler(service, max_body_bytes=API_MAX_BODY_BYTES, idle_timeout=60):
+    async def handle(reader, writer):
+        try:
+            while True:
+                keep_alive = False
+                try:
+                    request = await asyncio.wait_for(read_request(reader, max_body_bytes), idle_timeout)
+                    if request is None:
+                        break
+                    method, path, body, keep_alive = request
+                    status, payload = await route(service, method, path, body)
+                    write_response(writer, status, payload, keep_alive)
+                except ApiError as exc:
+                    write_response(writer, exc.status, {"error": str(exc)}, keep_alive, exc.headers)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except Exception:
+                    # Details stay in the server log; they may include candidate data or internals
+                    logger.exception("Unhandled error serving a request")
+                    write_response(writer, HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal server error"}, False)
+                    keep_alive = False
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+    return handle
+
+def model_services_factory(backend=None):
+    """Start loading the models in the background and return a function giving the services once they are ready.
+
+    Turns in stages that do not need a model are served with no services while the models load, as in app.py.
+    With TALENTSCOUT_MODEL_WORKERS set, the models load in worker processes and turns are routed to them.
+    """
+    from loader import ModelLoader
+    from worker_pool import create_worker_pool
+    pool = create_worker_pool(backend=backend)
+    loader = pool or ModelLoader(backend)
+    services = {}
+    # Concurrent first turns would otherwise each build the services and start duplicate background workers
+    lock = threading.Lock()
+
+    def get_services(state):
+        if not services and (loader.ready or state.stage in MODEL_STAGES):
+            with lock:
+                if not services:
+                    if pool is not None:
+                        services.update(pool.services())
+                    else:
+                        info_llm, question_llm = loader.llms()
+                        services.update(build_services(info_llm, question_llm, loader.sentiment_pipeline()))
+        return services
+    return get_services
+
+async def serve(host, port, service):
+    server = await asyncio.start_server(make_handler(service), host, port, backlog=1024)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    print(f"TalentScout API listening on http://{host}:{port}")
+    await stop.wait()
+    server.close()
+    # In a thread, so the loop keeps answering the turns that are still finishing
+    await loop.run_in_executor(None, service.close)
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--fake", action="store_true", help="serve with the benchmark fakes instead of loading models")
+    args = parser.parse_args()
+
+    if args.fake:
+        from benchmarks.fakes import fake_services
+        fakes = fake_services()
+        services_factory = lambda state: fakes
+    else:
+        services_factory = model_services_factory()
+    question_bank = create_question_bank(
+        QUESTION_BANK_PATH, QUESTION_BANK_TTL_HOURS, QUESTION_BANK_MAX_KEYS, QUESTION_BANK_VARIANTS,
+        QUESTION_BANK_OFFLINE_PATH
+    ) if QUESTION_BANK_ENABLED else None
+    service = InterviewService(
+        services_factory, create_session_store(SESSION_STORE_URL or "memory", SESSION_TTL_HOURS), question_bank,
+        API_MAX_CONCURRENCY, API_MAX_QUEUE, API_STATE_CACHE_SIZE
+    )
+    asyncio.run(serve(args.host, args.port, service))
+
+if __name__ == "__main__":
+    main()
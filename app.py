@@ -1,10 +1,17 @@
 import streamlit as st
-from model import load_models
-from prompts import create_prompts
-from chains import create_chains
+from loader import ModelLoader
+from worker_pool import create_worker_pool
 from state import HiringState
-from conversation import handle_conversation
-from utils import analyze_sentiment, generate_pdf
+from services import MODEL_STAGES, build_services, converse
+from utils import analyze_sentiment
+from report import ReportCache
+from question_bank import create_question_bank
+from session_store import create_session_store
+from instrumentation import instrumentation
+from config import (
+    QUESTION_BANK_ENABLED, QUESTION_BANK_PATH, QUESTION_BANK_TTL_HOURS, QUESTION_BANK_MAX_KEYS, QUESTION_BANK_VARIANTS,
+    QUESTION_BANK_OFFLINE_PATH, METRICS_PORT, SESSION_STORE_URL, SESSION_TTL_HOURS
+)
 
 # Custom CSS for a visually appealing UI
 st.markdown("""
@@ -58,28 +65,104 @@ st.sidebar.write("This chatbot assists with the initial screening of candidates
 st.sidebar.write("It will collect your information and ask technical questions based on your tech stack.")
 st.sidebar.write("**Tip**: Type 'exit' to end the conversation or 'query: your question' during technical questions for clarification.")
 
-# Load models with caching
+# Start loading both models in the background (in the worker processes if TALENTSCOUT_MODEL_WORKERS is set);
+# the greeting and contact fields don't need them
 @st.cache_resource
-def get_models():
-    return load_models()
+def get_model_loader():
+    return create_worker_pool() or ModelLoader()
 
-info_llm, question_llm, sentiment_pipeline = get_models()
+model_loader = get_model_loader()
+st.sidebar.caption("Model load: " + ", ".join(
+    f"{name} {value}s" if isinstance(value, float) else f"{name} {value}" for name, value in model_loader.status().items()
+))
 
-# Create prompts and chains
-info_gathering_prompt, tech_question_prompt, closing_prompt, relevance_prompt, revision_prompt = create_prompts()
-info_gathering_chain, tech_question_chain, closing_chain, relevance_chain, revision_chain = create_chains(
-    info_llm, question_llm, info_gathering_prompt, tech_question_prompt, closing_prompt, relevance_prompt, revision_prompt
-)
+# Question bank shared by all sessions
+@st.cache_resource
+def get_question_bank():
+    if not QUESTION_BANK_ENABLED:
+        return None
+    return create_question_bank(
+        QUESTION_BANK_PATH, QUESTION_BANK_TTL_HOURS, QUESTION_BANK_MAX_KEYS, QUESTION_BANK_VARIANTS,
+        QUESTION_BANK_OFFLINE_PATH
+    )
+
+question_bank = get_question_bank()
+
+# Session store shared by all sessions (and by other app processes when it is Redis or a shared SQLite file)
+@st.cache_resource
+def get_session_store():
+    if not SESSION_STORE_URL:
+        return None
+    return create_session_store(SESSION_STORE_URL, SESSION_TTL_HOURS)
+
+session_store = get_session_store()
 
-# Initialize session state
+def persist():
+    """Write this turn's changes to the session store."""
+    if session_store is not None:
+        session_store.save(st.session_state.state, st.session_state.messages)
+
+def persist_evaluations(state):
+    """Save answer scores recorded after the closing turn was saved; runs on the evaluator's thread."""
+    if session_store is not None:
+        session_store.save(state)
+
+# Rendered assessment PDFs, so reruns of the closing screen don't rebuild them
+@st.cache_resource
+def get_report_cache():
+    return ReportCache()
+
+# Prometheus endpoint for the process-wide metrics
+@st.cache_resource
+def get_metrics_server():
+    if not instrumentation.enabled or not METRICS_PORT:
+        return None
+    return instrumentation.serve(METRICS_PORT)
+
+get_metrics_server()
+
+# Chains and model-backed services, built once the models are loaded and shared by all sessions
+@st.cache_resource
+def get_model_services():
+    if not isinstance(model_loader, ModelLoader):
+        return model_loader.services()
+    info_llm, question_llm = model_loader.llms()
+    return build_services(info_llm, question_llm, model_loader.sentiment_pipeline())
+
+def respond(user_input, on_question=None, on_queue=None):
+    """Run one conversation turn, waiting for the models only if this stage needs them."""
+    services = {}
+    if model_loader.ready or st.session_state.state.stage in MODEL_STAGES:
+        if not model_loader.ready:
+            with st.spinner("Loading the interview models, this only happens once..."):
+                model_loader.wait()
+        services = get_model_services()
+    response, st.session_state.state = converse(
+        user_input, st.session_state.state, services, on_evaluated=persist_evaluations, on_question=on_question,
+        on_queue=on_queue, question_bank=question_bank
+    )
+    return response
+
+# Initialize session state, resuming the interview named in the URL if the store still has it
 if 'messages' not in st.session_state:
     st.session_state.messages = []
 if 'state' not in st.session_state:
-    st.session_state.state = HiringState()
-    response, st.session_state.state = handle_conversation(
-        "", st.session_state.state, tech_question_chain, relevance_chain, revision_chain, sentiment_pipeline
-    )
-    st.session_state.messages.append({"role": "assistant", "content": response})
+    resume_id = st.query_params.get("session")
+    if session_store is not None and resume_id:
+        st.session_state.state, st.session_state.messages = session_store.load(resume_id)
+    if st.session_state.get("state") is None:
+        st.session_state.state = HiringState()
+        st.session_state.messages = []
+        response = respond("")
+        st.session_state.messages.append({"role": "assistant", "content": response})
+        persist()
+    st.query_params["session"] = st.session_state.state.session_id
+
+# Per-session timings, token counts and cache hits (TALENTSCOUT_METRICS=1)
+if instrumentation.enabled:
+    with st.sidebar.expander("Session trace"):
+        st.caption(f"Session memory: {st.session_state.state.memory_footprint()['total_bytes'] / 1024:.1f} KiB")
+        st.json(st.session_state.state.trace)
 
 # Display conversation history
 for message in st.session_state.messages:
@@ -89,36 +172,60 @@ for message in st.session_state.messages:
 # User input
 user_input = st.chat_input("Type your message here...")
 
+def stream_questions_into(placeholder):
+    """Return a callback that renders streamed questions into a chat placeholder as they complete."""
+    ready = []
+    def on_question(question):
+        ready.append(question)
+        first_question = ready[0].split('.', 1)[1].strip()
+        placeholder.markdown(
+            f"Question 1: {first_question}\n\n"
+            f"_Preparing your assessment... {len(ready)} of 5 questions ready._"
+        )
+    return on_question
+
+def show_queue_position(placeholder, waiting_text):
+    """Return a callback that shows the session's place in the model queue while it waits for a slot."""
+    def on_queue(position):
+        if position:
+            placeholder.markdown(f"_Many candidates are interviewing right now: you are number {position} in line..._")
+        else:
+            placeholder.markdown(waiting_text)
+    return on_queue
+
 if user_input:
     st.session_state.messages.append({"role": "user", "content": user_input})
-    response, st.session_state.state = handle_conversation(
-        user_input, st.session_state.state, tech_question_chain, relevance_chain, revision_chain, sentiment_pipeline
-    )
+    on_question = on_queue = None
+    stage = st.session_state.state.stage
+    if stage == "tech_stack_collection" or (stage == "technical_interview" and user_input.lower().startswith("query:")):
+        with st.chat_message("user"):
+            st.markdown(user_input)
+        with st.chat_message("assistant"):
+            placeholder = st.empty()
+        waiting_text = "_Preparing your technical questions..._" if stage == "tech_stack_collection" else "_Looking into your query..._"
+        placeholder.markdown(waiting_text)
+        on_queue = show_queue_position(placeholder, waiting_text)
+        if stage == "tech_stack_collection":
+            on_question = stream_questions_into(placeholder)
+    response = respond(user_input, on_question, on_queue)
     st.session_state.messages.append({"role": "assistant", "content": response})
+    persist()
     st.rerun()
 
 # Show summary and PDF download when conversation ends and all 5 questions are answered
 if st.session_state.state.stage == "closing" and len(st.session_state.state.answers) >= 5:
+    sentiment_worker = get_model_services()["sentiment_worker"]
+    if sentiment_worker is not None:
+        # The last answers may still be in the scoring queue; save them once scored, the turn's save ran before
+        sentiment_worker.wait(st.session_state.state, timeout=10)
+        persist()
     st.write("### Conversation Summary")
-    st.write(f"**Total Interactions**: {len(st.session_state.state.conversation_log)}")
+    st.write(f"**Total Interactions**: {st.session_state.state.interaction_count}")
     
-    sentiment_counts = {"POSITIVE": 0, "NEGATIVE": 0, "NEUTRAL": 0}
-    sentiment_scores = []
-    for log in st.session_state.state.conversation_log:
-        if log.startswith("Sentiment:"):
-            parts = log.split(':')
-            if len(parts) > 1:
-                sentiment = parts[1].strip().split()[0]
-                if sentiment in sentiment_counts:
-                    sentiment_counts[sentiment] += 1
-                if '(' in parts[1]:
-                    score_str = parts[1].split('(')[1].split(')')[0]
-                    try:
-                        sentiment_scores.append(float(score_str))
-                    except:
-                        pass
-    if sentiment_scores:
-        avg_sentiment = sum(sentiment_scores) / len(sentiment_scores)
+    # Running aggregates kept by the event log, no rescanning on reruns
+    sentiment = st.session_state.state.events.sentiment_summary()
+    sentiment_counts, avg_sentiment = sentiment["counts"], sentiment["mean"]
+    if avg_sentiment is not None:
         st.write("#### Sentiment Analysis")
         st.write(f"- **Positive Responses**: {sentiment_counts['POSITIVE']}")
         st.write(f"- **Negative Responses**: {sentiment_counts['NEGATIVE']}")
@@ -126,12 +233,23 @@ if st.session_state.state.stage == "closing" and len(st.session_state.state.answ
         st.write(f"- **Average Sentiment Score**: {avg_sentiment:.2f}")
         st.write(f"- **Overall Tone**: {'Positive' if avg_sentiment > 0.6 else 'Negative' if avg_sentiment < 0.4 else 'Neutral'}")
 
+    # Scored in the background after closing (and saved by persist_evaluations); shown once the results are in
+    answer_evaluator = get_model_services()["answer_evaluator"]
+    evaluation = st.session_state.state.evaluation_summary()
+    if evaluation is not None:
+        st.write("#### Answer Evaluation")
+        st.write(f"- **Scored Answers**: {evaluation['scored']}")
+        st.write(f"- **Average Score**: {evaluation['mean']:.1f}/10")
+    elif answer_evaluator is not None and answer_evaluator.pending(st.session_state.state):
+        st.caption("Your answers are being scored; the results will be added to the assessment.")
+
     # Provide PDF download option
     st.write("### Download Your Assessment")
-    pdf_buffer = generate_pdf(st.session_state.state.tech_questions, st.session_state.state.answers)
+    with instrumentation.timer("generate_pdf", st.session_state.state):
+        pdf_bytes = get_report_cache().get(st.session_state.state)
     st.download_button(
         label="Download Assessment PDF",
-        data=pdf_buffer,
+        data=pdf_bytes,
         file_name="assessment.pdf",
         mime="application/pdf"
     )
@@ -139,8 +257,8 @@ if st.session_state.state.stage == "closing" and len(st.session_state.state.answ
     if st.button("Start New Conversation"):
         st.session_state.messages = []
         st.session_state.state = HiringState()
-        response, st.session_state.state = handle_conversation(
-            "", st.session_state.state, tech_question_chain, relevance_chain, revision_chain, sentiment_pipeline
-        )
+        response = respond("")
         st.session_state.messages.append({"role": "assistant", "content": response})
+        persist()
+        st.query_params["session"] = st.session_state.state.session_id
         st.rerun()
\ No newline at end of file
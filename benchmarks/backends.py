@@ -0,0 +1,113 @@
+"""Measure load time, generation throughput and memory of each model backend.
+
+Each backend runs in its own subprocess so resident memory is measured in isolation:
+
+    python -m benchmarks.backends --backends bf16 cpu-int8 int4 --new-tokens 128
+
+With --snapshot-dir the backends that support warm-start snapshots are measured a second time loading from the
+memory-mapped snapshot (built first if missing). Proportional set size counts the mapped weights once per host,
+split between the processes that map them, so it shows what each additional worker costs.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import torch
+from config import MODEL_NAME
+from model import BACKENDS, SNAPSHOT_DTYPES, load_tokenizer, load_causal_lm
+from prompts import create_prompts
+
+PROMPTS = [
+    {"tech_stack": "Python, Django, PostgreSQL", "years_experience": "3", "desired_position": "Backend Developer"},
+    {"tech_stack": "React, TypeScript, GraphQL", "years_experience": "6", "desired_position": "Senior Frontend Engineer"},
+    {"tech_stack": "Go, Kubernetes, AWS", "years_experience": "8", "desired_position": "Platform Engineer"}
+]
+
+def peak_rss_mb():
+    """Peak resident set size of this process (ru_maxrss is in KiB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def pss_mb():
+    """Proportional set size of this process, or None where /proc/self/smaps_rollup is unavailable."""
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+def measure(backend, new_tokens):
+    """Load one backend and time greedy generation of new_tokens for each benchmark prompt."""
+    tech_question_prompt = create_prompts()[1]
+
+    start = time.perf_counter()
+    tokenizer = load_tokenizer(MODEL_NAME)
+    model = load_causal_lm(MODEL_NAME, backend)
+    load_seconds = time.perf_counter() - start
+    rss_after_load = peak_rss_mb()
+    pss_after_load = pss_mb()
+
+    generated = 0
+    start = time.perf_counter()
+    for inputs in PROMPTS:
+        encoded = tokenizer(tech_question_prompt.format(**inputs), return_tensors="pt").to(model.device)
+        with torch.no_grad():
+            output = model.generate(
+                **encoded,
+                max_new_tokens=new_tokens,
+                min_new_tokens=new_tokens,
+                do_sample=False,
+                pad_token_id=tokenizer.pad_token_id
+            )
+        generated += output.shape[1] - encoded["input_ids"].shape[1]
+    generate_seconds = time.perf_counter() - start
+
+    return {
+        "backend": backend,
+        "snapshot": bool(os.environ.get("TALENTSCOUT_SNAPSHOT_DIR")),
+        "load_seconds": round(load_seconds, 2),
+        "tokens_per_second": round(generated / generate_seconds, 2),
+        "rss_after_load_mb": round(rss_after_load, 1),
+        "pss_after_load_mb": round(pss_after_load, 1) if pss_after_load is not None else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1)
+    }
+
+def run_child(backend, new_tokens, snapshot_dir=""):
+    env = dict(os.environ, TALENTSCOUT_SNAPSHOT_DIR=snapshot_dir)
+    command = [sys.executable, "-m", "benchmarks.backends", "--child", "--backends", backend,
+               "--new-tokens", str(new_tokens)]
+    completed = subprocess.run(command, capture_output=True, text=True, env=env)
+    if completed.returncode != 0:
+        return {"backend": backend, "snapshot": bool(snapshot_dir), "error": completed.stderr.strip().splitlines()[-1:]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=["bf16", "cpu-int8"], choices=BACKENDS)
+    parser.add_argument("--new-tokens", type=int, default=128)
+    parser.add_argument("--snapshot-dir", help="also measure loading from warm-start snapshots in this directory")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.backends[0], args.new_tokens)))
+        return
+
+    results = []
+    for backend in args.backends:
+        results.append(run_child(backend, args.new_tokens))
+        if args.snapshot_dir and backend in SNAPSHOT_DTYPES:
+            from snapshot import has_snapshot
+            if not has_snapshot(args.snapshot_dir, MODEL_NAME, SNAPSHOT_DTYPES[backend]):
+                # The first snapshot run builds it; only warm starts are reported
+                run_child(backend, 1, args.snapshot_dir)
+            results.append(run_child(backend, args.new_tokens, args.snapshot_dir))
+    print(json.dumps({"model": MODEL_NAME, "new_tokens": args.new_tokens, "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
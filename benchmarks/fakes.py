@@ -0,0 +1,60 @@
+"""Deterministic stand-ins for the LLM chains and the sentiment pipeline, for CI runs without model weights."""
+import threading
+import time
+from contextlib import nullcontext
+
+class FakeChain:
+    """Mimics LLMChain.invoke with a fixed latency and canned text.
+
+    Chains given the same `model` semaphore share its capacity, like chains on one model: calls beyond it wait
+    for a free slot, so latency grows with load as it does on real hardware.
+    """
+
+    def __init__(self, text, latency=0.0, prompt=None, model=None):
+        self.text = text
+        self.latency = latency
+        self.prompt = prompt
+        self.model = model
+        self.calls = 0
+
+    def invoke(self, inputs):
+        self.calls += 1
+        with self.model or nullcontext():
+            if self.latency:
+                time.sleep(self.latency)
+        return {"text": self.text(inputs) if callable(self.text) else self.text}
+
+def fake_questions(inputs):
+    """Five numbered questions about the first technology in the stack."""
+    tech = inputs.get("tech_stack", "your stack").split(",")[0]
+    return "\n".join(
+        f"{number}. Question {number}: how would you approach a realistic problem using {tech}?" for number in range(1, 6)
+    )
+
+class FakeSentimentPipeline:
+    """Mimics the transformers sentiment-analysis pipeline for single texts and batches."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def __call__(self, inputs, **kwargs):
+        texts = [inputs] if isinstance(inputs, str) else list(inputs)
+        if self.latency:
+            time.sleep(self.latency)
+        results = [{"label": "NEGATIVE" if "not" in text.lower() else "POSITIVE", "score": 0.9} for text in texts]
+        return results
+
+def fake_services(llm_latency=0.0, question_latency=0.0, sentiment_latency=0.0, model_capacity=0):
+    """handle_conversation services backed by fakes; relevance and sentiment run inline like the original app.
+
+    model_capacity > 0 makes the chains share a fake model that runs that many calls at once.
+    """
+    model = threading.BoundedSemaphore(model_capacity) if model_capacity else None
+    return {
+        "tech_question_chain": FakeChain(fake_questions, question_latency, model=model),
+        "relevance_chain": FakeChain("yes and question is correct", llm_latency, model=model),
+        "revision_chain": FakeChain(
+            "Revised: could you explain your approach step by step, with an example?", llm_latency, model=model
+        ),
+        "sentiment_pipeline": FakeSentimentPipeline(sentiment_latency)
+    }
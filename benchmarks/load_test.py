@@ -0,0 +1,131 @@
+"""Drive concurrent scripted interviews through handle_conversation and report latency, throughput and memory.
+
+Runs headless against fake chains by default, so it works in CI without model weights:
+
+    python -m benchmarks.load_test --sessions 50 --llm-latency 0.05
+    python -m benchmarks.load_test --sessions 8 --real --output load_test.json
+"""
+import argparse
+import json
+import resource
+import statistics
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from state import HiringState
+from services import converse
+
+TECH_STACKS = ["Python, Django, PostgreSQL", "React, TypeScript, GraphQL", "Go, Kubernetes, AWS", "Java, Spring, Kafka"]
+POSITIONS = ["Backend Developer", "Frontend Engineer", "Platform Engineer", "Software Engineer"]
+
+def transcript(session):
+    """The candidate messages of one complete interview, varied per session."""
+    return [
+        "",
+        "start",
+        f"Candidate {session}",
+        f"candidate{session}@example.com",
+        "+1 555-010-0000",
+        str(1 + session % 10),
+        POSITIONS[session % len(POSITIONS)],
+        "Remote",
+        TECH_STACKS[session % len(TECH_STACKS)],
+        "I would start by profiling the hot path and then work through the slowest call sites first.",
+        "query: could you give an example of the kind of system you mean?",
+        "I have used connection pooling and caching to keep response times predictable under load.",
+        "I would write tests for the edge cases before refactoring so the behaviour stays the same.",
+        "query: should the answer focus on the design or on the implementation?",
+        "I would split the service along its data boundaries and keep the interfaces small.",
+        "I am not sure, but I would read the documentation and try a small prototype first."
+    ]
+
+def percentiles(samples):
+    """p50/p95/p99 in milliseconds."""
+    if len(samples) < 2:
+        value = round(samples[0] * 1000, 2) if samples else 0.0
+        return {"count": len(samples), "p50_ms": value, "p95_ms": value, "p99_ms": value}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "count": len(samples),
+        "p50_ms": round(cuts[49] * 1000, 2),
+        "p95_ms": round(cuts[94] * 1000, 2),
+        "p99_ms": round(cuts[98] * 1000, 2)
+    }
+
+def run_session(session, services, latencies, lock):
+    """Play one transcript, recording each turn's latency under the stage it was handled in."""
+    state = HiringState()
+    for message in transcript(session):
+        stage = "query" if message.lower().startswith("query:") else state.stage
+        start = time.perf_counter()
+        _, state = converse(message, state, services)
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.setdefault(stage, []).append(elapsed)
+    return state
+
+def run(services, sessions, concurrency):
+    """Run the sessions on a thread pool and return the report dict."""
+    latencies = {}
+    lock = threading.Lock()
+    tracemalloc.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        states = list(executor.map(lambda session: run_session(session, services, latencies, lock), range(sessions)))
+    elapsed = time.perf_counter() - start
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    turns = sum(len(samples) for samples in latencies.values())
+    footprints = [state.memory_footprint()["total_bytes"] for state in states]
+    return {
+        "sessions": sessions,
+        "concurrency": concurrency,
+        "completed": sum(state.stage == "closing" for state in states),
+        "turns": turns,
+        "seconds": round(elapsed, 3),
+        "sessions_per_second": round(sessions / elapsed, 2),
+        "turns_per_second": round(turns / elapsed, 2),
+        "overall": percentiles([sample for samples in latencies.values() for sample in samples]),
+        "stages": {stage: percentiles(samples) for stage, samples in latencies.items()},
+        "session_bytes_mean": round(statistics.fmean(footprints)) if footprints else 0,
+        "session_bytes_max": max(footprints, default=0),
+        "python_peak_mb": round(traced_peak / 2**20, 2),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+
+def load_services(args):
+    """Fake services by default, or the real models with --real."""
+    if not args.real:
+        from benchmarks.fakes import fake_services
+        return fake_services(args.llm_latency, args.question_latency, args.sentiment_latency)
+    from model import load_models
+    from services import build_services
+    info_llm, question_llm, sentiment_pipeline = load_models(args.backend)
+    return build_services(info_llm, question_llm, sentiment_pipeline)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=None, help="worker threads (default: one per session)")
+    parser.add_argument("--real", action="store_true", help="load the configured models instead of fakes")
+    parser.add_argument("--backend", default=None, help="model backend for --real (default: TALENTSCOUT_MODEL_BACKEND)")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds per fake relevance/revision call")
+    parser.add_argument("--question-latency", type=float, default=0.0, help="seconds per fake question generation")
+    parser.add_argument("--sentiment-latency", type=float, default=0.0, help="seconds per fake sentiment call")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    report = run(load_services(args), args.sessions, args.concurrency or args.sessions)
+    report["mode"] = "real" if args.real else "fake"
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
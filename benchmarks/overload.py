@@ -0,0 +1,95 @@
+"""Show how admission control bounds tail latency when more sessions need the model than it can serve.
+
+The load_test interviews all start together, so every session reaches tech_stack_collection at about the same
+time. They are played against fakes sharing a model that runs --model-capacity calls at once, three times:
+
+    python -m benchmarks.overload --sessions 64 --model-capacity 4 --question-latency 0.5 --llm-latency 0.1
+
+- without admission control, every call waits for the model however long that takes;
+- with tight admission (--degrade-depth, --question-slo, --query-slo), at most --max-active calls hold a slot,
+  the rest queue fairly per session, and calls queued past their SLO, or arriving while --degrade-depth calls
+  wait, get template questions or skip the revision instead;
+- with relaxed admission (--relaxed-degrade-depth, --relaxed-question-slo, --relaxed-query-slo), the same cap
+  but a queue deep enough and an SLO long enough for most sessions to still get generated questions.
+
+Each stage reports the fraction of its calls served degraded next to its latency percentiles: a short tail
+bought by shedding most sessions to template questions is not the same result as one that serves them.
+
+Not covered: in the app, background answer scoring and the question prefetch warm-up also use the model. They
+take no admission slot, but are queued on the shared scheduler at background priority, so they only start
+while no interview call is waiting.
+"""
+import argparse
+import json
+from admission import AdmissionController
+from benchmarks.fakes import fake_services
+from benchmarks.load_test import run
+
+# Load test stage -> admission operation of its model call
+MODEL_STAGES = {"tech_stack_collection": "questions", "query": "query"}
+
+def measure(args, label, degrade_depth=None, question_slo=None, query_slo=None):
+    services = fake_services(args.llm_latency, args.question_latency, 0.0, args.model_capacity)
+    controller = None
+    if label != "none":
+        controller = services["admission"] = AdmissionController(
+            args.max_active or args.model_capacity, degrade_depth, {"questions": question_slo, "query": query_slo}
+        )
+    report = run(services, args.sessions, args.sessions)
+    operations = controller.stats()["operations"] if controller is not None else {}
+    stages = {}
+    for stage, operation in MODEL_STAGES.items():
+        if stage not in report["stages"]:
+            continue
+        counts = operations.get(operation, {"admitted": 0, "degraded": 0})
+        calls = counts["admitted"] + counts["degraded"]
+        stages[stage] = {
+            **report["stages"][stage],
+            "degraded": counts["degraded"],
+            "degraded_fraction": round(counts["degraded"] / calls, 3) if calls else 0.0
+        }
+    return {
+        "admission": label,
+        "settings": {"degrade_depth": degrade_depth, "question_slo": question_slo, "query_slo": query_slo}
+        if controller is not None else None,
+        "seconds": report["seconds"],
+        "completed": report["completed"],
+        "turns_per_second": report["turns_per_second"],
+        "stages": stages,
+        "controller": controller.stats() if controller is not None else None
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=64)
+    parser.add_argument("--model-capacity", type=int, default=4, help="calls the fake model runs at once")
+    parser.add_argument("--question-latency", type=float, default=0.5, help="seconds per fake question generation")
+    parser.add_argument("--llm-latency", type=float, default=0.1, help="seconds per fake relevance/revision call")
+    parser.add_argument("--max-active", type=int, default=None, help="admission cap (default: the model capacity)")
+    parser.add_argument("--degrade-depth", type=int, default=32)
+    parser.add_argument("--question-slo", type=float, default=2.0, help="seconds question generation may queue")
+    parser.add_argument("--query-slo", type=float, default=1.0, help="seconds a query turn may queue")
+    parser.add_argument("--relaxed-degrade-depth", type=int, default=None,
+                        help="queue depth of the relaxed run (default: the number of sessions)")
+    parser.add_argument("--relaxed-question-slo", type=float, default=10.0,
+                        help="seconds question generation may queue in the relaxed run (the app's default)")
+    parser.add_argument("--relaxed-query-slo", type=float, default=3.0,
+                        help="seconds a query turn may queue in the relaxed run (the app's default)")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    results = [
+        measure(args, "none"),
+        measure(args, "tight", args.degrade_depth, args.question_slo, args.query_slo),
+        measure(args, "relaxed", args.relaxed_degrade_depth or args.sessions, args.relaxed_question_slo,
+                args.relaxed_query_slo)
+    ]
+    text = json.dumps({"sessions": args.sessions, "model_capacity": args.model_capacity, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Micro-benchmark the response parsing hot path against the previous per-call regex implementation.
+
+Run from the repository root:
+
+    python -m benchmarks.parsing --size 4096
+"""
+import argparse
+import json
+import re
+import timeit
+from state import HiringState
+from utils import QuestionStreamParser, clean_response, extract_questions
+
+def legacy_clean_response(response):
+    """clean_response before the patterns were compiled and merged."""
+    response = re.sub(r'<\|im_start\|>.*?<\|im_end\|>', '', response, flags=re.DOTALL)
+    response = re.sub(r'<\|.*?\|>', '', response, flags=re.DOTALL)
+    response = re.sub(r'<think>.*?</think>', '', response, flags=re.DOTALL)
+    if "assistant" in response.lower():
+        parts = re.split(r'assistant', response, flags=re.IGNORECASE)
+        if len(parts) > 1:
+            response = parts[-1].strip()
+    response = re.sub(r'^\d+[\.\)\s]*', '', response).strip()
+    response = re.sub(r'\n+', '\n', response).strip()
+    return response
+
+def legacy_extract_questions(response):
+    """extract_questions before it shared the stream parser's line logic."""
+    questions = []
+    for line in response.split('\n'):
+        match = re.match(r'(\d+)\.?\s*(.*)', line.strip())
+        if match:
+            question_text = match.group(2).strip()
+            if len(question_text) > 20 and '?' in question_text:
+                questions.append(f"{int(match.group(1))}. {question_text}")
+    if len(questions) < 5:
+        alt_questions = re.findall(r'\d+\.\s*([^\n?]+\??)', response)
+        questions = [f"{i+1}. {q.strip()}" for i, q in enumerate(alt_questions[:5])]
+    return questions[:5]
+
+LEGACY_VALIDATORS = {
+    "email": lambda x: re.match(r"[^@]+@[^@]+\.[^@]+", x) is not None,
+    "phone": lambda x: re.match(r"^\+?[0-9\s\-\(\)]{7,}$", x) is not None,
+    "years_experience": lambda x: re.match(r"^\d+$", x) is not None
+}
+VALIDATOR_INPUTS = {
+    "email": ["jane.doe@example.com", "not-an-email"],
+    "phone": ["+1 (555) 010-2030", "call me"],
+    "years_experience": ["7", "seven"]
+}
+
+def synthetic_output(words):
+    """A long model output: echoed chat turns, a think block of about `words` words, then five questions."""
+    filler = " ".join(f"token{i % 97}" for i in range(words))
+    lines = [
+        "<|im_start|>system\nYou are a technical interviewer.<|im_end|>",
+        "<|im_start|>user\nGenerate 5 questions for Python, Django, PostgreSQL.<|im_end|>",
+        "<|im_start|>assistant",
+        f"<think>\n{filler}\n{filler}\n</think>",
+        "1. How would you design a Django model layer for a multi-tenant application?",
+        "2. What PostgreSQL index types would you choose for full-text search, and why?",
+        "3. How do Python generators help when streaming large query results to clients?",
+        "4. How would you find and fix an N+1 query problem in a Django view?",
+        "5. What trade-offs do you weigh between Celery and asyncio for background work?<|endoftext|>"
+    ]
+    return "\n".join(lines)
+
+def chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+def parse_stream(pieces):
+    parser = QuestionStreamParser(limit=5)
+    for piece in pieces:
+        parser.feed(piece)
+    parser.close()
+    return parser.questions
+
+def best_ms(func, repeat, number):
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number * 1000
+
+def compare(legacy, current, repeat, number):
+    legacy_ms = best_ms(legacy, repeat, number)
+    current_ms = best_ms(current, repeat, number)
+    return {"legacy_ms": round(legacy_ms, 4), "current_ms": round(current_ms, 4), "speedup": round(legacy_ms / current_ms, 2)}
+
+def run(words, repeat, number, chunk_size):
+    text = synthetic_output(words)
+    cleaned = clean_response(text)
+    pieces = chunks(text, chunk_size)
+    report = {
+        "output_chars": len(text),
+        "questions_extracted": {
+            "legacy": len(legacy_extract_questions(legacy_clean_response(text))),
+            "current": len(extract_questions(cleaned)),
+            "stream": len(parse_stream(pieces))
+        },
+        "clean_response": compare(lambda: legacy_clean_response(text), lambda: clean_response(text), repeat, number),
+        "extract_questions": compare(
+            lambda: legacy_extract_questions(cleaned), lambda: extract_questions(cleaned), repeat, number
+        ),
+        "clean_and_extract": compare(
+            lambda: legacy_extract_questions(legacy_clean_response(text)),
+            lambda: extract_questions(clean_response(text)), repeat, number
+        ),
+        # Streaming: the old path re-ran clean_response on the growing text after every chunk
+        "streamed_chunks": dict(compare(
+            lambda: [legacy_clean_response(text[:end]) for end in range(chunk_size, len(text) + chunk_size, chunk_size)],
+            lambda: parse_stream(pieces), 1, 1
+        ), chunks=len(pieces)),
+    }
+    validators = {}
+    for field, values in VALIDATOR_INPUTS.items():
+        legacy, current = LEGACY_VALIDATORS[field], HiringState.FIELD_VALIDATORS[field]
+        validators[field] = compare(
+            lambda: [legacy(value) for value in values], lambda: [current(value) for value in values],
+            repeat, number * 50
+        )
+    report["validators"] = validators
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=2048, help="words in the synthetic think block (repeated twice)")
+    parser.add_argument("--repeat", type=int, default=5, help="timing rounds; the best round is reported")
+    parser.add_argument("--number", type=int, default=200, help="calls per timing round")
+    parser.add_argument("--chunk-size", type=int, default=16, help="characters per streamed chunk")
+    args = parser.parse_args()
+    print(json.dumps(run(args.size, args.repeat, args.number, args.chunk_size), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Compare the fast relevance engine against the generative relevance chain on labeled queries.
+
+Run from the repository root:
+
+    python -m benchmarks.relevance --mode logits
+"""
+import argparse
+import json
+import os
+import time
+from model import load_models
+from prompts import create_prompts
+from chains import create_chains
+from relevance import create_relevance_engine, llm_is_relevant
+
+DEFAULT_CASES = os.path.join(os.path.dirname(__file__), "data", "relevance_cases.jsonl")
+
+def load_cases(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def run(cases, relevance_chain, engine):
+    """Score every case with both paths and return accuracy, agreement and latency."""
+    results = {"llm": {"correct": 0, "seconds": 0.0}, "engine": {"correct": 0, "seconds": 0.0}}
+    agree = 0
+    for case in cases:
+        start = time.perf_counter()
+        llm_answer = llm_is_relevant(relevance_chain, case["question"], case["query"])
+        results["llm"]["seconds"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        engine_answer, _ = engine.is_relevant(case["question"], case["query"])
+        results["engine"]["seconds"] += time.perf_counter() - start
+
+        results["llm"]["correct"] += llm_answer == case["relevant"]
+        results["engine"]["correct"] += engine_answer == case["relevant"]
+        agree += llm_answer == engine_answer
+
+    report = {"cases": len(cases), "agreement": agree / len(cases), "engine_stats": engine.stats()}
+    for name, result in results.items():
+        report[name] = {
+            "accuracy": result["correct"] / len(cases),
+            "avg_latency_ms": 1000 * result["seconds"] / len(cases)
+        }
+    report["speedup"] = results["llm"]["seconds"] / results["engine"]["seconds"] if results["engine"]["seconds"] else None
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", default=DEFAULT_CASES, help="JSONL file with question, query and relevant fields")
+    parser.add_argument("--mode", default="logits", choices=["logits", "embedding"])
+    parser.add_argument("--low", type=float, default=None, help="score at or below which a query is irrelevant")
+    parser.add_argument("--high", type=float, default=None, help="score at or above which a query is relevant")
+    args = parser.parse_args()
+
+    info_llm, question_llm, _ = load_models()
+    chains = create_chains(info_llm, question_llm, *create_prompts())
+    relevance_chain = chains[3]
+    engine = create_relevance_engine(relevance_chain, args.mode, low=args.low, high=args.high)
+    print(json.dumps(run(load_cases(args.cases), relevance_chain, engine), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Measure speculative decoding against plain sampling for the question and revision chains.
+
+Both runs use the question pipeline's sampling settings and the same seeds:
+
+    python -m benchmarks.speculative --backend bf16 --new-tokens 256 --repeats 2
+"""
+import argparse
+import json
+import time
+import torch
+from config import MODEL_NAME, DRAFT_MODEL_NAME, SPECULATIVE_NUM_TOKENS
+from model import BACKENDS, load_tokenizer, load_causal_lm, load_draft_model
+from prompts import create_prompts
+from benchmarks.backends import PROMPTS
+
+# Same settings as question_pipeline in model.load_llms
+SAMPLING = {"do_sample": True, "temperature": 1.0, "top_p": 0.95, "repetition_penalty": 1.3}
+
+REVISIONS = [
+    {
+        "current_question": "How would you design a caching layer for a Django application under heavy read load?",
+        "query_text": "Should I assume a single server or several instances behind a load balancer?"
+    },
+    {
+        "current_question": "Explain how React reconciliation decides which components to re-render.",
+        "query_text": "Do you mean class components, function components with hooks, or both?"
+    }
+]
+
+class ForwardCounter:
+    """Counts forward passes of a model; with assisted generation each pass of the main model verifies a draft."""
+
+    def __init__(self, model):
+        self.calls = 0
+        self._handle = model.register_forward_hook(self._count)
+
+    def _count(self, module, inputs, output):
+        self.calls += 1
+
+    def reset(self):
+        self.calls = 0
+
+    def close(self):
+        self._handle.remove()
+
+def generate(model, tokenizer, prompt, new_tokens, seed, assistant_model=None):
+    torch.manual_seed(seed)
+    encoded = tokenizer(prompt, return_tensors="pt").to(model.device)
+    start = time.perf_counter()
+    with torch.no_grad():
+        output = model.generate(
+            **encoded,
+            max_new_tokens=new_tokens,
+            pad_token_id=tokenizer.pad_token_id,
+            assistant_model=assistant_model,
+            **SAMPLING
+        )
+    return output.shape[1] - encoded["input_ids"].shape[1], time.perf_counter() - start
+
+def run(chain, prompts, model, draft_model, tokenizer, new_tokens, repeats):
+    """Generate every prompt with and without the draft model and aggregate throughput and acceptance."""
+    target_calls, draft_calls = ForwardCounter(model), ForwardCounter(draft_model)
+    totals = {"plain": [0, 0.0], "speculative": [0, 0.0]}
+    passes = proposed = accepted = 0
+    for prompt in prompts:
+        for seed in range(repeats):
+            tokens, seconds = generate(model, tokenizer, prompt, new_tokens, seed)
+            totals["plain"][0] += tokens
+            totals["plain"][1] += seconds
+
+            target_calls.reset()
+            draft_calls.reset()
+            tokens, seconds = generate(model, tokenizer, prompt, new_tokens, seed, draft_model)
+            totals["speculative"][0] += tokens
+            totals["speculative"][1] += seconds
+            # Each main-model pass yields the accepted draft tokens plus one token of its own
+            passes += target_calls.calls
+            proposed += draft_calls.calls
+            accepted += max(0, tokens - target_calls.calls)
+    target_calls.close()
+    draft_calls.close()
+
+    plain_rate = totals["plain"][0] / totals["plain"][1]
+    speculative_rate = totals["speculative"][0] / totals["speculative"][1]
+    return {
+        "chain": chain,
+        "generations": len(prompts) * repeats,
+        "plain_tokens_per_second": round(plain_rate, 2),
+        "speculative_tokens_per_second": round(speculative_rate, 2),
+        "speedup": round(speculative_rate / plain_rate, 2),
+        "acceptance_rate": round(accepted / proposed, 3) if proposed else None,
+        "tokens_per_main_model_pass": round(totals["speculative"][0] / passes, 2) if passes else None
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", default="bf16", choices=[backend for backend in BACKENDS if backend != "onnx"])
+    parser.add_argument("--new-tokens", type=int, default=256)
+    parser.add_argument("--repeats", type=int, default=2, help="seeds per prompt")
+    parser.add_argument("--num-assistant-tokens", type=int, default=SPECULATIVE_NUM_TOKENS)
+    args = parser.parse_args()
+
+    _, tech_question_prompt, _, _, revision_prompt = create_prompts()
+    tokenizer = load_tokenizer(MODEL_NAME)
+    model = load_causal_lm(MODEL_NAME, args.backend)
+    draft_model = load_draft_model(args.backend, args.num_assistant_tokens)
+
+    report = {"model": MODEL_NAME, "draft_model": DRAFT_MODEL_NAME, "backend": args.backend, "chains": [
+        run("tech_question_chain", [tech_question_prompt.format(**inputs) for inputs in PROMPTS],
+            model, draft_model, tokenizer, args.new_tokens, args.repeats),
+        run("revision_chain", [revision_prompt.format(**inputs) for inputs in REVISIONS],
+            model, draft_model, tokenizer, args.new_tokens, args.repeats)
+    ]}
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
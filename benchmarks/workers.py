@@ -0,0 +1,71 @@
+"""Measure how interview throughput scales with the number of model worker processes.
+
+For each worker count the pool is started, the models are loaded and the same scripted interviews as
+benchmarks.load_test are played through it:
+
+    python -m benchmarks.workers --workers 1 2 4 8 --sessions 32 --backend cpu-int8
+
+--fake replaces the models with the benchmark fakes to check routing and process plumbing; the fakes
+sleep instead of computing, so only the real models show how generation scales with cores.
+"""
+import argparse
+import json
+import time
+from benchmarks.load_test import run
+from worker_pool import WorkerPool, plan_cores
+
+def measure(workers, args):
+    fake = {"llm_latency": args.llm_latency, "question_latency": args.question_latency} if args.fake else None
+    start = time.perf_counter()
+    pool = WorkerPool(
+        workers, args.threads, not args.no_pin, args.backend, args.worker_concurrency, args.affinity_slack, fake
+    )
+    try:
+        pool.wait()
+        load_seconds = time.perf_counter() - start
+        report = run(pool.services(), args.sessions, args.concurrency or args.sessions)
+        return {
+            "workers": workers,
+            "cores_per_worker": [len(cores) for cores in plan_cores(workers)],
+            "load_seconds": round(load_seconds, 1),
+            "turns_per_second": report["turns_per_second"],
+            "sessions_per_second": report["sessions_per_second"],
+            "completed": report["completed"],
+            "overall": report["overall"],
+            "stages": report["stages"],
+            "per_worker": pool.stats()
+        }
+    finally:
+        pool.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--sessions", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=None, help="client threads (default: one per session)")
+    parser.add_argument("--backend", default=None, help="model backend (default: TALENTSCOUT_MODEL_BACKEND)")
+    parser.add_argument("--threads", type=int, default=None, help="torch threads per worker (default: its cores)")
+    parser.add_argument("--no-pin", action="store_true", help="do not pin workers to core subsets")
+    parser.add_argument("--worker-concurrency", type=int, default=4, help="requests each worker handles at once")
+    parser.add_argument("--affinity-slack", type=int, default=2)
+    parser.add_argument("--fake", action="store_true", help="use the benchmark fakes instead of loading models")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per fake relevance/revision call")
+    parser.add_argument("--question-latency", type=float, default=0.5, help="seconds per fake question generation")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    results = [measure(workers, args) for workers in args.workers]
+    baseline = results[0]["turns_per_second"] / results[0]["workers"]
+    for result in results:
+        result["speedup"] = round(result["turns_per_second"] / results[0]["turns_per_second"], 2)
+        # 1.0 means throughput grew linearly with the number of workers
+        result["scaling_efficiency"] = round(result["turns_per_second"] / (baseline * result["workers"]), 2)
+    text = json.dumps({"mode": "fake" if args.fake else "real", "sessions": args.sessions, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import math
+import threading
+from collections import deque
+from generation import get_pipeline, unwrap_pipeline, run_chain, count_tokens, count_prompt_tokens
+from prefix_cache import pipeline_generate_kwargs
+from instrumentation import instrumentation
+
+class GenerationBudgets:
+    """Chooses max_new_tokens for each chain from the output lengths observed so far.
+
+    A chain starts at the max_new_tokens its pipeline was created with (its ceiling). Once `min_samples` outputs
+    have been seen, the budget is the `percentile` of the most recent `window` lengths times `headroom`, rounded
+    up to a multiple of `step` so that concurrent requests keep landing in the same scheduler batch. An output
+    that used its whole budget was probably cut off; it is recorded at `growth` times its length so the budget
+    widens again.
+
+    Only chains whose output is complete however short it is should use a budget: a cut-off question set
+    would come back with fewer than five questions, so question generation keeps its fixed limit (its
+    stopping criteria end it once five questions are complete).
+    """
+
+    def __init__(self, percentile=0.95, headroom=1.5, min_samples=20, window=256, step=16, growth=2.0):
+        self.percentile = percentile
+        self.headroom = headroom
+        self.min_samples = min_samples
+        self.window = window
+        self.step = step
+        self.growth = growth
+        self._lengths = {}  # chain name -> deque of recent output lengths
+        self._ceilings = {}  # chain name -> max_new_tokens it was created with
+        self._totals = {}  # chain name -> counters for stats()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def ceiling(chain):
+        """The max_new_tokens the chain's pipeline was created with, or None if the chain has no pipeline."""
+        pipe = get_pipeline(chain)
+        if pipe is None:
+            return None
+        return pipeline_generate_kwargs(unwrap_pipeline(pipe)).get("max_new_tokens")
+
+    def max_new_tokens(self, name, ceiling):
+        """Current budget for the named chain, never above ceiling."""
+        with self._lock:
+            lengths = sorted(self._lengths.get(name, ()))
+        if ceiling is None or len(lengths) < self.min_samples:
+            return ceiling
+        observed = lengths[min(len(lengths) - 1, math.ceil(self.percentile * len(lengths)) - 1)]
+        budget = math.ceil(observed * self.headroom / self.step) * self.step
+        return max(self.step, min(ceiling, budget))
+
+    def prepare(self, name, chain, ceiling=None):
+        """Return the generate_kwargs for one call of the chain: its current max_new_tokens budget.
+
+        ceiling overrides the pipeline's max_new_tokens. Chains without a pipeline get no arguments.
+        """
+        ceiling = ceiling or self.ceiling(chain)
+        if ceiling is None:
+            return {}
+        self._ceilings[name] = ceiling
+        return {"max_new_tokens": self.max_new_tokens(name, ceiling)}
+
+    def record(self, name, generate_kwargs, generated_tokens, state=None):
+        """Record the length of one output generated with prepare()'s generate_kwargs and log the savings."""
+        budget = generate_kwargs.get("max_new_tokens")
+        if budget is None or generated_tokens is None:
+            return
+        ceiling = self._ceilings[name]
+        truncated = generated_tokens >= budget and budget < ceiling
+        with self._lock:
+            lengths = self._lengths.setdefault(name, deque(maxlen=self.window))
+            lengths.append(min(ceiling, math.ceil(generated_tokens * self.growth)) if truncated else generated_tokens)
+        self._add(name, calls=1, generated=generated_tokens, reserved_tokens_saved=ceiling - budget, truncated=int(truncated))
+        if state is not None:
+            state.log_interaction(
+                f"Generation budget for {name}: {generated_tokens} tokens generated, max_new_tokens {budget} of {ceiling}"
+                + (" (output reached the budget)" if truncated else ""), "budget"
+            )
+
+    def _add(self, name, **counts):
+        with self._lock:
+            totals = self._totals.setdefault(name, {
+                "calls": 0, "generated": 0, "reserved_tokens_saved": 0, "truncated": 0
+            })
+            for key, value in counts.items():
+                totals[key] += value
+
+    def stats(self):
+        """Per-chain counters and the current budget statistics."""
+        with self._lock:
+            report = {name: dict(totals) for name, totals in self._totals.items()}
+            for name, lengths in self._lengths.items():
+                report.setdefault(name, {})["samples"] = len(lengths)
+        return report
+
+def run_with_budget(name, chain, inputs, generation_budgets=None, state=None, span=None):
+    """Run a chain with its adaptive max_new_tokens (if budgets are enabled) and record the output length."""
+    generate_kwargs = {}
+    if generation_budgets is not None:
+        generate_kwargs = generation_budgets.prepare(name, chain)
+    response = run_chain(chain, inputs, **generate_kwargs)
+    generated_tokens = None
+    if generate_kwargs or (span is not None and instrumentation.enabled):
+        generated_tokens = count_tokens(chain, response)
+    if generation_budgets is not None:
+        generation_budgets.record(name, generate_kwargs, generated_tokens, state)
+    if span is not None and instrumentation.enabled:
+        span.tokens(count_prompt_tokens(chain, inputs), generated_tokens)
+    return response
@@ -0,0 +1,173 @@
+"""Pre-build question sets offline for a list of candidate profiles.
+
+    python bulk_questions.py profiles.csv --output question_bank_offline.sqlite3 --version 2026-10 --batch-size 32
+
+Profiles are read from CSV (columns tech_stack, years_experience, desired_position; tech_stack comma-separated)
+or JSON lines with the same keys. Profiles that map to the same question-bank key are generated once. Every
+accepted set is committed immediately, so rerunning the same command after an interruption resumes where it
+stopped. Serve the result by pointing TALENTSCOUT_QUESTION_BANK_OFFLINE_PATH at the output file.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import sqlite3
+import sys
+import time
+from collections import OrderedDict
+from config import MODEL_NAME, MODEL_BACKEND, QUESTION_MAX_NEW_TOKENS, QUESTION_BANK_VARIANTS
+from prompts import create_prompts
+from question_bank import SQLiteBackend, question_bank_key
+from utils import QuestionStreamParser, extract_questions, format_tech_stack
+
+BANK_FORMAT = 1
+
+def read_profiles(path):
+    """Return an ordered {question bank key: candidate_data} mapping for the profiles in a CSV or JSONL file."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".json")):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+    profiles = OrderedDict()
+    for row in rows:
+        tech_stack = row["tech_stack"]
+        candidate_data = {
+            "tech_stack": format_tech_stack(tech_stack) if isinstance(tech_stack, str) else list(tech_stack),
+            "years_experience": str(row["years_experience"]).strip(),
+            "desired_position": row["desired_position"].strip()
+        }
+        profiles.setdefault(question_bank_key(candidate_data), candidate_data)
+    return profiles
+
+def prompt_inputs(candidate_data):
+    return {
+        "tech_stack": ", ".join(candidate_data["tech_stack"]),
+        "years_experience": candidate_data["years_experience"],
+        "desired_position": candidate_data["desired_position"]
+    }
+
+def parse_question_set(text):
+    """Parse one generation into five numbered questions, or None if it does not validate.
+
+    The prompt ends with "1.", so the output is parsed like the live streaming path; the result must then
+    survive extract_questions unchanged.
+    """
+    parser = QuestionStreamParser(limit=5, numbered_prompt=True)
+    parser.feed(text)
+    parser.close()
+    questions = extract_questions("\n".join(parser.questions))
+    return questions if len(questions) == 5 else None
+
+def open_bank(path, meta):
+    """Open (or create) the output file, refusing to mix in sets from a different version or prompt."""
+    backend = SQLiteBackend(path)
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("CREATE TABLE IF NOT EXISTS bank_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        existing = dict(conn.execute("SELECT key, value FROM bank_meta").fetchall())
+        for key in ("format", "version", "model", "prompt_sha256"):
+            if key in existing and existing[key] != meta[key]:
+                raise SystemExit(
+                    f"{path} was built with {key}={existing[key]!r}, not {meta[key]!r}; "
+                    "write to a new --output or pass the same --version to resume"
+                )
+        conn.executemany(
+            "INSERT OR IGNORE INTO bank_meta (key, value) VALUES (?, ?)", [(key, str(value)) for key, value in meta.items()]
+        )
+        conn.execute("INSERT OR REPLACE INTO bank_meta (key, value) VALUES ('updated_at', ?)", (str(time.time()),))
+        conn.commit()
+    finally:
+        conn.close()
+    return backend
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("profiles", help="CSV or JSONL file of candidate profiles")
+    parser.add_argument("--output", default="question_bank_offline.sqlite3")
+    parser.add_argument("--version", required=True, help="label stored in the file, e.g. the build date")
+    parser.add_argument("--variants", type=int, default=QUESTION_BANK_VARIANTS, help="question sets per profile")
+    parser.add_argument("--batch-size", type=int, default=32, help="prompts generated together in one padded batch")
+    parser.add_argument("--max-new-tokens", type=int, default=QUESTION_MAX_NEW_TOKENS)
+    parser.add_argument("--max-attempts", type=int, default=3, help="generations per missing set before giving up")
+    parser.add_argument("--backend", default=None, help=f"model backend (default: {MODEL_BACKEND})")
+    args = parser.parse_args()
+
+    tech_question_prompt = create_prompts()[1]
+    meta = {
+        "format": str(BANK_FORMAT),
+        "version": args.version,
+        "model": MODEL_NAME,
+        "prompt_sha256": hashlib.sha256(tech_question_prompt.template.encode()).hexdigest(),
+        "created_at": str(time.time())
+    }
+    bank = open_bank(args.output, meta)
+    profiles = read_profiles(args.profiles)
+
+    # One work item per missing set; sets already in the file (from an interrupted run) are skipped
+    todo = []
+    for key, candidate_data in profiles.items():
+        missing = args.variants - len(bank.load(key))
+        todo += [(key, candidate_data)] * max(0, missing)
+    total = len(todo)
+    print(f"{len(profiles)} profiles, {total} question sets to generate", file=sys.stderr)
+    if not todo:
+        return
+
+    from model import load_llms
+    from generation import unwrap_pipeline
+    # Speculative decoding runs one sequence at a time; large padded batches are faster here
+    _, question_llm = load_llms(args.backend, speculative=False)
+    pipe = unwrap_pipeline(question_llm.pipeline)
+    tokenizer = pipe.tokenizer
+
+    attempts = {}
+    accepted = rejected = abandoned = tokens = 0
+    start = time.perf_counter()
+    while todo:
+        batch, todo = todo[:args.batch_size], todo[args.batch_size:]
+        prompts = [tech_question_prompt.format(**prompt_inputs(candidate_data)) for _, candidate_data in batch]
+        outputs = pipe(prompts, batch_size=len(prompts), return_full_text=False, max_new_tokens=args.max_new_tokens)
+        for (key, candidate_data), output in zip(batch, outputs):
+            text = output[0]["generated_text"]
+            tokens += len(tokenizer.encode(text, add_special_tokens=False))
+            questions = parse_question_set(text)
+            if questions is not None:
+                bank.add(key, questions, time.time())
+                accepted += 1
+                continue
+            rejected += 1
+            attempts[key] = attempts.get(key, 0) + 1
+            if attempts[key] < args.max_attempts * args.variants:
+                todo.append((key, candidate_data))
+            else:
+                abandoned += 1
+
+        elapsed = time.perf_counter() - start
+        done = accepted + abandoned
+        rate = done / elapsed
+        eta = (total - done) / rate if rate else float("inf")
+        print(
+            f"[{done}/{total}] {accepted} accepted, {rejected} rejected, {accepted / elapsed * 60:.1f} sets/min, "
+            f"{tokens / elapsed:.0f} tokens/s, ETA {eta / 60:.1f} min",
+            file=sys.stderr
+        )
+
+    elapsed = time.perf_counter() - start
+    keys, sets = bank.count()
+    print(json.dumps({
+        "output": args.output,
+        "version": args.version,
+        "profiles": len(profiles),
+        "accepted": accepted,
+        "rejected": rejected,
+        "abandoned": abandoned,
+        "seconds": round(elapsed, 1),
+        "sets_per_minute": round(accepted / elapsed * 60, 2),
+        "tokens_per_second": round(tokens / elapsed, 1),
+        "keys_in_file": keys,
+        "sets_in_file": sets
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
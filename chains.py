@@ -7,4 +7,8 @@ def create_chains(info_llm, question_llm, info_gathering_prompt, tech_question_p
     closing_chain = LLMChain(llm=info_llm, prompt=closing_prompt, verbose=False)
     relevance_chain = LLMChain(llm=info_llm, prompt=relevance_prompt, verbose=False)
     revision_chain = LLMChain(llm=question_llm, prompt=revision_prompt, verbose=False)
-    return info_gathering_chain, tech_question_chain, closing_chain, relevance_chain, revision_chain
\ No newline at end of file
+    return info_gathering_chain, tech_question_chain, closing_chain, relevance_chain, revision_chain
+
+def create_evaluation_chain(llm, evaluation_prompt):
+    """Create the chain that scores candidate answers after the interview."""
+    return LLMChain(llm=llm, prompt=evaluation_prompt, verbose=False)
\ No newline at end of file
@@ -0,0 +1,128 @@
+import os
+
+def _env_bool(name, default):
+    """Read a boolean flag from the environment."""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+def _env_int(name, default):
+    """Read an integer setting from the environment."""
+    value = os.environ.get(name)
+    try:
+        return int(value) if value is not None else default
+    except ValueError:
+        return default
+
+def _env_float(name, default):
+    """Read a float setting from the environment."""
+    value = os.environ.get(name)
+    try:
+        return float(value) if value is not None else default
+    except ValueError:
+        return default
+
+# Models and inference backend: bf16, int8, int4, cpu-int8 or onnx (see model.load_causal_lm)
+MODEL_NAME = os.environ.get("TALENTSCOUT_MODEL", "Qwen/Qwen3-4B")
+SENTIMENT_MODEL_NAME = os.environ.get("TALENTSCOUT_SENTIMENT_MODEL", "distilbert-base-uncased-finetuned-sst-2-english")
+MODEL_BACKEND = os.environ.get("TALENTSCOUT_MODEL_BACKEND", "bf16").strip().lower()
+# Warm-start snapshots (snapshot.py) of the dense weights, memory-mapped at start-up and shared by every process on
+# the host; used by the CPU backends (bf16 without a GPU, cpu-int8). Empty disables them
+SNAPSHOT_DIR = os.environ.get("TALENTSCOUT_SNAPSHOT_DIR", "").strip()
+
+# Model worker processes (worker_pool.py) for many-core hosts: 0 keeps the models in the app process. Each worker
+# is pinned to its share of the cores; threads 0 means one torch thread per pinned core
+MODEL_WORKERS = _env_int("TALENTSCOUT_MODEL_WORKERS", 0)
+MODEL_WORKER_THREADS = _env_int("TALENTSCOUT_MODEL_WORKER_THREADS", 0)
+MODEL_WORKER_PIN = _env_bool("TALENTSCOUT_MODEL_WORKER_PIN", True)
+MODEL_WORKER_CONCURRENCY = _env_int("TALENTSCOUT_MODEL_WORKER_CONCURRENCY", 4)
+MODEL_WORKER_AFFINITY_SLACK = _env_int("TALENTSCOUT_MODEL_WORKER_AFFINITY_SLACK", 2)
+
+# Speculative decoding for question generation and revisions: a small draft model of the same family proposes tokens
+# that the main model verifies; sampling settings are unchanged
+SPECULATIVE_ENABLED = _env_bool("TALENTSCOUT_SPECULATIVE", False)
+DRAFT_MODEL_NAME = os.environ.get("TALENTSCOUT_DRAFT_MODEL", "Qwen/Qwen3-0.6B")
+SPECULATIVE_NUM_TOKENS = _env_int("TALENTSCOUT_SPECULATIVE_NUM_TOKENS", 5)
+
+# Inference scheduler: batches concurrent prompts from all sessions onto the shared model
+SCHEDULER_ENABLED = _env_bool("TALENTSCOUT_SCHEDULER", True)
+SCHEDULER_MAX_BATCH_SIZE = _env_int("TALENTSCOUT_MAX_BATCH_SIZE", 8)
+SCHEDULER_MAX_WAIT_MS = _env_int("TALENTSCOUT_MAX_WAIT_MS", 20)
+
+# Admission control (admission.py): model calls running at once across sessions, queued calls beyond which new ones
+# are served degraded, and how long question generation and "query:" turns may wait in line before that
+ADMISSION_ENABLED = _env_bool("TALENTSCOUT_ADMISSION", True)
+ADMISSION_MAX_ACTIVE = _env_int("TALENTSCOUT_ADMISSION_MAX_ACTIVE", 8)
+ADMISSION_DEGRADE_DEPTH = _env_int("TALENTSCOUT_ADMISSION_DEGRADE_DEPTH", 32)
+ADMISSION_QUESTION_SLO_MS = _env_int("TALENTSCOUT_ADMISSION_QUESTION_SLO_MS", 10000)
+ADMISSION_QUERY_SLO_MS = _env_int("TALENTSCOUT_ADMISSION_QUERY_SLO_MS", 3000)
+
+# Question generation limits
+QUESTION_MAX_NEW_TOKENS = _env_int("TALENTSCOUT_QUESTION_MAX_NEW_TOKENS", 1024)
+THINK_TOKEN_BUDGET = _env_int("TALENTSCOUT_THINK_TOKEN_BUDGET", 384)
+
+# Adaptive generation budgets (budgets.py): max_new_tokens for the relevance and revision chains from the observed
+# output lengths, capped at the pipeline's limit
+GENERATION_BUDGETS_ENABLED = _env_bool("TALENTSCOUT_GENERATION_BUDGETS", True)
+BUDGET_PERCENTILE = _env_float("TALENTSCOUT_BUDGET_PERCENTILE", 0.95)
+BUDGET_HEADROOM = _env_float("TALENTSCOUT_BUDGET_HEADROOM", 1.5)
+BUDGET_MIN_SAMPLES = _env_int("TALENTSCOUT_BUDGET_MIN_SAMPLES", 20)
+
+# Question bank: cached question sets keyed by tech stack, seniority band and position
+QUESTION_BANK_ENABLED = _env_bool("TALENTSCOUT_QUESTION_BANK", True)
+QUESTION_BANK_PATH = os.environ.get("TALENTSCOUT_QUESTION_BANK_PATH", "question_bank.sqlite3")
+QUESTION_BANK_TTL_HOURS = _env_int("TALENTSCOUT_QUESTION_BANK_TTL_HOURS", 168)
+QUESTION_BANK_MAX_KEYS = _env_int("TALENTSCOUT_QUESTION_BANK_MAX_KEYS", 5000)
+QUESTION_BANK_VARIANTS = _env_int("TALENTSCOUT_QUESTION_BANK_VARIANTS", 3)
+# Versioned file of question sets pre-built offline by bulk_questions.py (empty: none)
+QUESTION_BANK_OFFLINE_PATH = os.environ.get("TALENTSCOUT_QUESTION_BANK_OFFLINE_PATH", "").strip()
+
+# Speculative encoding of the question prompt while contact fields are still being collected
+QUESTION_PREFETCH_ENABLED = _env_bool("TALENTSCOUT_QUESTION_PREFETCH", True)
+
+# Prefix KV cache for the static prompt preambles ("auto" enables it when no GPU is available)
+PREFIX_CACHE_MODE = os.environ.get("TALENTSCOUT_PREFIX_CACHE", "auto").strip().lower()
+PREFIX_CACHE_MAX_MB = _env_int("TALENTSCOUT_PREFIX_CACHE_MAX_MB", 1024)
+
+# Relevance check for "query:" messages: "logits" (yes/no on the main model), "embedding" or "llm" (full chain)
+RELEVANCE_MODE = os.environ.get("TALENTSCOUT_RELEVANCE_MODE", "logits").strip().lower()
+RELEVANCE_EMBEDDING_MODEL = os.environ.get("TALENTSCOUT_RELEVANCE_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+RELEVANCE_LOW = _env_float("TALENTSCOUT_RELEVANCE_LOW", None)
+RELEVANCE_HIGH = _env_float("TALENTSCOUT_RELEVANCE_HIGH", None)
+
+# Background sentiment scoring, batched across sessions
+SENTIMENT_ASYNC = _env_bool("TALENTSCOUT_SENTIMENT_ASYNC", True)
+SENTIMENT_MAX_BATCH_SIZE = _env_int("TALENTSCOUT_SENTIMENT_MAX_BATCH_SIZE", 16)
+SENTIMENT_MAX_WAIT_MS = _env_int("TALENTSCOUT_SENTIMENT_MAX_WAIT_MS", 50)
+
+# Automatic answer scoring after the interview, batched across sessions; results cached per question/answer pair
+EVALUATION_ENABLED = _env_bool("TALENTSCOUT_EVALUATION", True)
+EVALUATION_CACHE_PATH = os.environ.get("TALENTSCOUT_EVALUATION_CACHE_PATH", "evaluations.sqlite3").strip()
+EVALUATION_MAX_BATCH_SIZE = _env_int("TALENTSCOUT_EVALUATION_MAX_BATCH_SIZE", 16)
+EVALUATION_MAX_WAIT_MS = _env_int("TALENTSCOUT_EVALUATION_MAX_WAIT_MS", 500)
+EVALUATION_WORKERS = _env_int("TALENTSCOUT_EVALUATION_WORKERS", 2)
+EVALUATION_MAX_NEW_TOKENS = _env_int("TALENTSCOUT_EVALUATION_MAX_NEW_TOKENS", 128)
+
+# Instrumentation: latency/token/cache metrics in Prometheus format and a per-session trace on HiringState
+METRICS_ENABLED = _env_bool("TALENTSCOUT_METRICS", False)
+METRICS_PORT = _env_int("TALENTSCOUT_METRICS_PORT", 0)
+METRICS_TRACE_LIMIT = _env_int("TALENTSCOUT_METRICS_TRACE_LIMIT", 500)
+
+# Per-session conversation memory: "bounded" (recent window plus rolling summary, byte-capped) or "buffer" (unbounded)
+MEMORY_MODE = os.environ.get("TALENTSCOUT_MEMORY_MODE", "bounded").strip().lower()
+MEMORY_WINDOW = _env_int("TALENTSCOUT_MEMORY_WINDOW", 6)
+MEMORY_MAX_BYTES = _env_int("TALENTSCOUT_MEMORY_MAX_BYTES", 16384)
+MEMORY_SUMMARY_CHARS = _env_int("TALENTSCOUT_MEMORY_SUMMARY_CHARS", 1000)
+CONVERSATION_LOG_MAX_ENTRIES = _env_int("TALENTSCOUT_CONVERSATION_LOG_MAX_ENTRIES", 300)
+CONVERSATION_LOG_MAX_CHARS = _env_int("TALENTSCOUT_CONVERSATION_LOG_MAX_CHARS", 500)
+
+# Session store: "memory", a SQLite file path (or sqlite:///path) or redis://host:port/db; empty disables persistence
+SESSION_STORE_URL = os.environ.get("TALENTSCOUT_SESSION_STORE", "sessions.sqlite3").strip()
+SESSION_TTL_HOURS = _env_int("TALENTSCOUT_SESSION_TTL_HOURS", 72)
+
+# HTTP API (api.py): concurrent turns, queued turns before rejecting with 503, hot session states kept in memory
+API_MAX_CONCURRENCY = _env_int("TALENTSCOUT_API_MAX_CONCURRENCY", 4)
+API_MAX_QUEUE = _env_int("TALENTSCOUT_API_MAX_QUEUE", 64)
+API_STATE_CACHE_SIZE = _env_int("TALENTSCOUT_API_STATE_CACHE_SIZE", 1024)
+API_MAX_BODY_BYTES = _env_int("TALENTSCOUT_API_MAX_BODY_BYTES", 65536)
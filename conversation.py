@@ -1,50 +1,171 @@
-from utils import clean_response, extract_questions, format_tech_stack, analyze_sentiment
+from contextlib import nullcontext
+from utils import clean_response, extract_questions, format_tech_stack, analyze_sentiment, QuestionStreamParser
 from prompts import create_prompts
 from chains import create_chains
+from generation import stream_chain, run_chain, get_pipeline, count_prompt_tokens
+from stopping import QuestionStoppingCriteria
+from config import QUESTION_MAX_NEW_TOKENS, THINK_TOKEN_BUDGET
+from question_bank import question_bank_key
+from instrumentation import instrumentation
+from budgets import run_with_budget
 
-def generate_tech_questions(state, tech_question_chain):
-    """Generate technical questions based on candidate data."""
+def stream_tech_questions(tech_question_chain, inputs, on_question, prefix=None, **generate_kwargs):
+    """Stream question generation, reporting each question as its line completes and stopping after five."""
+    parser = QuestionStreamParser(limit=5, numbered_prompt=True)
+    chunks = []
+    stream = stream_chain(tech_question_chain, inputs, prefix=prefix, **generate_kwargs)
+    try:
+        for chunk in stream:
+            chunks.append(chunk)
+            for question in parser.feed(chunk):
+                on_question(question)
+            if parser.done:
+                break
+    finally:
+        stream.close()
+    for question in parser.close():
+        on_question(question)
+    if parser.done:
+        return parser.questions
+    return extract_questions(clean_response("".join(chunks))) or parser.questions
+
+def template_questions(candidate_data):
+    """Generic questions about the candidate's first technology, used when no generated set is available."""
+    position = candidate_data["desired_position"] or "this position"
+    tech = candidate_data["tech_stack"][0] if candidate_data["tech_stack"] else "your primary technology"
+    return [
+        f"1. What experience do you have with {tech}?",
+        f"2. Describe a challenging project you've worked on using {tech}.",
+        f"3. How would you debug a performance issue in a {tech} application?",
+        f"4. What best practices do you follow when working with {tech}?",
+        f"5. How does your experience align with the requirements for {position}?"
+    ]
+
+def generate_tech_questions(state, tech_question_chain, on_question=None, question_bank=None, prefetcher=None,
+                            admission=None, on_queue=None):
+    """Generate technical questions based on candidate data.
+
+    With an admission controller the generation waits for a model slot; if it is shed under overload, any
+    cached set for the profile is served instead, or else the template questions.
+    """
     required_fields = ['tech_stack', 'years_experience', 'desired_position']
     if any(state.candidate_data[field] is None for field in required_fields):
         state.stage = "closing"
         return "We don't have enough information to generate questions. Thank you for your time.", state
 
-    response = tech_question_chain.invoke({
+    if question_bank is not None:
+        bank_key = question_bank_key(state.candidate_data)
+        cached_questions = question_bank.lookup(bank_key)
+        instrumentation.cache_event("question_bank", bool(cached_questions), state)
+        if cached_questions:
+            state.tech_questions = cached_questions
+            if prefetcher is not None:
+                prefetcher.cancel(state)
+            if on_question is not None:
+                for question in cached_questions:
+                    on_question(question)
+            state.log_interaction(f"Served {len(state.tech_questions)} technical questions from the question bank")
+            return None, state
+
+    ticket = admission.admit(state, "questions", on_queue) if admission is not None else None
+    if ticket is not None and ticket.degraded:
+        # Any stored set will do, even before the bank has collected enough variants for this profile. The
+        # request already counted as a miss above, so this second look is not counted again
+        cached_questions = question_bank.lookup(
+            bank_key, require_variety=False, count=False
+        ) if question_bank is not None else None
+        state.tech_questions = cached_questions or template_questions(state.candidate_data)
+        if prefetcher is not None:
+            prefetcher.cancel(state)
+        if on_question is not None:
+            for question in state.tech_questions:
+                on_question(question)
+        state.log_interaction(
+            f"Served {len(state.tech_questions)} {'cached' if cached_questions else 'template'} technical questions "
+            "under overload"
+        )
+        return None, state
+
+    inputs = {
         "tech_stack": ", ".join(state.candidate_data["tech_stack"]),
         "years_experience": state.candidate_data["years_experience"],
         "desired_position": state.candidate_data["desired_position"]
-    })['text']
+    }
+    # No adaptive budget here: a set cut off by one would have fewer than five questions. The stopping
+    # criteria end generation as soon as five questions are complete instead
+    generate_kwargs = {}
+    stopping = None
+    pipe = get_pipeline(tech_question_chain)
+    if pipe is not None:
+        stopping = QuestionStoppingCriteria(
+            pipe.tokenizer, think_budget=THINK_TOKEN_BUDGET, max_new_tokens=QUESTION_MAX_NEW_TOKENS,
+            prompt_length=count_prompt_tokens(tech_question_chain, inputs)
+        )
+        generate_kwargs["stopping_criteria"] = [stopping]
+
+    prefix = prefetcher.take(state) if prefetcher is not None else None
+    if prefetcher is not None and pipe is not None:
+        instrumentation.cache_event("prefetch", prefix is not None, state)
+    with ticket or nullcontext(), instrumentation.timer("tech_question_chain", state) as span:
+        if on_question is not None:
+            state.tech_questions = stream_tech_questions(tech_question_chain, inputs, on_question, prefix, **generate_kwargs)
+        else:
+            response = run_chain(tech_question_chain, inputs, prefix=prefix, **generate_kwargs)
+        if instrumentation.enabled:
+            span.tokens(
+                count_prompt_tokens(tech_question_chain, inputs),
+                stopping.report()["tokens_generated"] if stopping is not None else None
+            )
+    if on_question is None:
+        if stopping is not None and stopping.parser.done:
+            # The stopping criteria already parsed all five questions while watching the output
+            state.tech_questions = stopping.parser.questions
+        else:
+            with instrumentation.timer("clean_response", state):
+                cleaned_response = clean_response(response)
+            with instrumentation.timer("extract_questions", state):
+                state.tech_questions = extract_questions(cleaned_response)
+
+    if stopping is not None:
+        report = stopping.report()
+        state.log_interaction(
+            f"Question generation: {report['tokens_generated']} tokens, stop reason {report['stop_reason']}, "
+            f"{report['tokens_saved']} tokens saved"
+        )
 
-    cleaned_response = clean_response(response)
-    state.tech_questions = extract_questions(cleaned_response)
+    if question_bank is not None and len(state.tech_questions) == question_bank.SET_SIZE:
+        # A partial set would be served to every matching profile until it expires
+        question_bank.store(bank_key, state.tech_questions)
 
     if not state.tech_questions:
-        position = state.candidate_data["desired_position"] or "this position"
-        tech = state.candidate_data["tech_stack"][0] if state.candidate_data["tech_stack"] else "your primary technology"
-        state.tech_questions = [
-            f"1. What experience do you have with {tech}?",
-            f"2. Describe a challenging project you've worked on using {tech}.",
-            f"3. How would you debug a performance issue in a {tech} application?",
-            f"4. What best practices do you follow when working with {tech}?",
-            f"5. How does your experience align with the requirements for {position}?"
-        ]
+        state.tech_questions = template_questions(state.candidate_data)
 
     state.log_interaction(f"Generated {len(state.tech_questions)} technical questions")
     return None, state
 
-def handle_conversation(user_input, state, tech_question_chain, relevance_chain, revision_chain, sentiment_pipeline):
+def handle_conversation(user_input, state, tech_question_chain, relevance_chain, revision_chain, sentiment_pipeline, on_question=None,
+                        question_bank=None, prefetcher=None, relevance_engine=None, sentiment_worker=None,
+                        answer_evaluator=None, generation_budgets=None, admission=None, on_queue=None):
     """Handle the conversation flow with the candidate."""
+    if sentiment_worker is not None:
+        # The state may be a fresh copy of the session (e.g. reloaded from the store); results still queued go here
+        sentiment_worker.attach(state)
     if user_input.lower() in ['exit', 'quit', 'stop', 'end']:
         closing_response = "Thank you for your time. We'll be in touch soon!"
         state.memory.save_context({"input": user_input}, {"output": closing_response})
-        state.log_interaction(f"Assistant: {closing_response}")
+        state.log_interaction(f"Assistant: {closing_response}", "assistant")
         return closing_response, state
 
     if user_input:
-        state.log_interaction(f"User: {user_input}")
+        state.log_interaction(f"User: {user_input}", "user")
         if state.stage not in ["greeting", "awaiting_start", "info_gathering"]:
-            sentiment = analyze_sentiment(user_input, sentiment_pipeline)
-            state.log_interaction(f"Sentiment: {sentiment['label']} ({sentiment['score']:.2f})")
+            if sentiment_worker is not None:
+                # Scored in the background; only the closing summary needs the result
+                sentiment_worker.submit(state, user_input, turn=len(state.answers))
+            else:
+                with instrumentation.timer("analyze_sentiment", state):
+                    sentiment = analyze_sentiment(user_input, sentiment_pipeline)
+                state.record_sentiment(sentiment['label'], sentiment['score'], turn=len(state.answers))
 
     state.memory.save_context({"input": user_input}, {"output": ""})
 
@@ -52,25 +173,43 @@ def handle_conversation(user_input, state, tech_question_chain, relevance_chain,
         query_text = user_input[len("query:"):].strip()
         current_question = state.tech_questions[state.current_question_idx]
         
-        relevance_response = relevance_chain.invoke({
-            "current_question": current_question,
-            "query_text": query_text
-        })['text'].lower().strip()
-        
-        if "yes" in relevance_response:
-            revised_question = revision_chain.invoke({
-                "current_question": current_question,
-                "query_text": query_text
-            })['text'].strip()
-            revised_question = clean_response(revised_question)
-            state.tech_questions[state.current_question_idx] = revised_question
-            state.log_interaction(f"Revised Question: {revised_question}")
-            response = f"Thank you for your query. Here's the revised question:\n\n{revised_question}"
-        else:
-            response = "Your query doesn't appear relevant to the current question. Please answer the original question."
+        query_inputs = {"current_question": current_question, "query_text": query_text}
+        ticket = admission.admit(state, "query", on_queue) if admission is not None else None
+        if ticket is not None and ticket.degraded:
+            # Shed under overload: no relevance check or revision, the candidate answers the question as asked
+            response = "We're handling a high volume of interviews right now, so the question can't be revised. "\
+                       "Please answer it as written and state any assumptions you make."
+            state.memory.save_context({"input": user_input}, {"output": response})
+            state.log_interaction(f"Assistant: {response}", "assistant")
+            return response, state
+        with ticket or nullcontext():
+            if relevance_engine is not None:
+                with instrumentation.timer("relevance", state) as span:
+                    relevant, source = relevance_engine.is_relevant(current_question, query_text)
+                    span.set(source=source)
+                state.log_interaction(f"Relevance: {'yes' if relevant else 'no'} ({source})", "relevance")
+            else:
+                with instrumentation.timer("relevance_chain", state) as span:
+                    relevance_response = run_with_budget(
+                        "relevance_chain", relevance_chain, query_inputs, generation_budgets, state, span
+                    )
+                relevant = "yes" in relevance_response.lower().strip()
+
+            if relevant:
+                with instrumentation.timer("revision_chain", state) as span:
+                    revised_question = run_with_budget(
+                        "revision_chain", revision_chain, query_inputs, generation_budgets, state, span
+                    ).strip()
+                with instrumentation.timer("clean_response", state):
+                    revised_question = clean_response(revised_question)
+                state.tech_questions[state.current_question_idx] = revised_question
+                state.log_interaction(f"Revised Question: {revised_question}", "revision")
+                response = f"Thank you for your query. Here's the revised question:\n\n{revised_question}"
+            else:
+                response = "Your query doesn't appear relevant to the current question. Please answer the original question."
         
         state.memory.save_context({"input": user_input}, {"output": response})
-        state.log_interaction(f"Assistant: {response}")
+        state.log_interaction(f"Assistant: {response}", "assistant")
         return response, state
 
     if state.stage == "greeting":
@@ -79,7 +218,7 @@ def handle_conversation(user_input, state, tech_question_chain, relevance_chain,
                    "You can type 'exit' at any time to end the conversation.\n"\
                    "During technical questions, you can request clarification by typing 'query: your question'."
         state.stage = "awaiting_start"
-        state.log_interaction("System: Initial greeting")
+        state.log_interaction("System: Initial greeting", "system")
         return greeting, state
 
     elif state.stage == "awaiting_start":
@@ -98,12 +237,15 @@ def handle_conversation(user_input, state, tech_question_chain, relevance_chain,
             if not validator(user_input):
                 return state.FIELD_ERRORS[current_field], state
         state.record_response(current_field, user_input)
+        if prefetcher is not None and state.candidate_data["years_experience"] and state.candidate_data["desired_position"]:
+            # Everything the question prompt needs except the tech stack is known: warm it up in the background
+            prefetcher.warm(state)
         if state.next_field():
             next_field = state.get_current_field()
             return state.FIELD_PROMPTS[next_field], state
         else:
             state.stage = "tech_stack_collection"
-            state.log_interaction("System: Collecting tech stack")
+            state.log_interaction("System: Collecting tech stack", "system")
             return state.FIELD_PROMPTS["tech_stack"], state
 
     elif state.stage == "tech_stack_collection":
@@ -111,7 +253,9 @@ def handle_conversation(user_input, state, tech_question_chain, relevance_chain,
         state.candidate_data["tech_stack"] = tech_stack
         state.log_interaction(f"Tech stack: {', '.join(tech_stack)}")
         state.stage = "technical_interview"
-        msg, state = generate_tech_questions(state, tech_question_chain)
+        msg, state = generate_tech_questions(
+            state, tech_question_chain, on_question, question_bank, prefetcher, admission, on_queue
+        )
         if msg:
             return msg, state
         if state.tech_questions:
@@ -123,15 +267,15 @@ def handle_conversation(user_input, state, tech_question_chain, relevance_chain,
             state.stage = "closing"
             response = "We've completed the initial screening. Thank you for your time!"
         state.memory.save_context({"input": user_input}, {"output": response})
-        state.log_interaction(f"Assistant: {response}")
+        state.log_interaction(f"Assistant: {response}", "assistant")
         return response, state
 
     elif state.stage == "technical_interview":
         if state.current_question_idx < len(state.tech_questions):
             question = state.tech_questions[state.current_question_idx]
-            state.log_interaction(f"Question {state.current_question_idx+1}: {question}")
+            state.log_interaction(f"Question {state.current_question_idx+1}: {question}", "question")
             if not user_input.lower().startswith("query:"):
-                state.log_interaction(f"Answer: {user_input[:200]}...")
+                state.log_interaction(f"Answer: {user_input[:200]}...", "answer")
                 state.answers.append(user_input)  # Store the answer
                 state.current_question_idx += 1
             if state.current_question_idx < len(state.tech_questions):
@@ -140,18 +284,21 @@ def handle_conversation(user_input, state, tech_question_chain, relevance_chain,
             else:
                 state.stage = "closing"
                 state.log_interaction("Completed technical assessment")
+                if answer_evaluator is not None:
+                    # Scored in background batches together with other sessions that just closed
+                    answer_evaluator.submit(state)
                 response = "Thank you for completing the assessment! Our team will review your answers and contact you soon."
             state.memory.save_context({"input": user_input}, {"output": response})
-            state.log_interaction(f"Assistant: {response}")
+            state.log_interaction(f"Assistant: {response}", "assistant")
             return response, state
 
     if state.stage == "closing":
         response = "Thank you again! Our team will review your application shortly."
         state.memory.save_context({"input": user_input}, {"output": response})
-        state.log_interaction(f"Assistant: {response}")
+        state.log_interaction(f"Assistant: {response}", "assistant")
         return response, state
 
     response = "I'm here to assist with your job application. Could you please rephrase that?"
     state.memory.save_context({"input": user_input}, {"output": response})
-    state.log_interaction(f"Assistant: {response}")
+    state.log_interaction(f"Assistant: {response}", "assistant")
     return response, state
\ No newline at end of file
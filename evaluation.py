@@ -0,0 +1,309 @@
+"""Automatic scoring of candidate answers, run in background batches once an interview reaches the closing stage.
+
+Grading stored interviews in bulk, e.g. overnight:
+
+    python evaluation.py --store sessions.sqlite3 --batch-size 32
+"""
+import argparse
+import hashlib
+import json
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from scheduler import InferenceScheduler, BatchedPipeline, PRIORITY_LIVE, PRIORITY_BACKGROUND
+from instrumentation import instrumentation
+from utils import clean_response
+
+SCORE = re.compile(r'score\s*[:=]?\s*(\d+(?:\.\d+)?)\s*(?:/\s*10)?', re.IGNORECASE)
+FEEDBACK = re.compile(r'feedback\s*[:=]\s*(.*)', re.IGNORECASE | re.DOTALL)
+
+def evaluation_key(question, answer):
+    """Cache key for one question/answer pair."""
+    return hashlib.sha256(f"{question}\x00{answer}".encode()).hexdigest()
+
+def parse_evaluation(text):
+    """Return {"score", "feedback"} from the evaluation chain's output, or None if it has no score."""
+    text = clean_response(text)
+    match = SCORE.search(text)
+    if match is None:
+        return None
+    feedback = FEEDBACK.search(text)
+    return {
+        "score": min(10.0, max(0.0, float(match.group(1)))),
+        "feedback": feedback.group(1).strip() if feedback else ""
+    }
+
+class EvaluationCache:
+    """Evaluations keyed by evaluation_key, kept in memory and optionally in a SQLite file.
+
+    Identical pairs (the same bank question answered the same way, re-graded sessions) are scored once.
+    """
+
+    def __init__(self, path=None, max_entries=100000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS evaluations (key TEXT PRIMARY KEY, result TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None and self._conn is not None:
+                row = self._conn.execute("SELECT result FROM evaluations WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    result = self._remember(key, json.loads(row[0]))
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(result)
+
+    def put(self, key, result):
+        with self._lock:
+            self._remember(key, result)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO evaluations (key, result, created_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(result), time.time())
+                )
+                self._conn.commit()
+
+    def _remember(self, key, result):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return result
+
+    def stats(self):
+        with self._lock:
+            stored = self._conn.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0] if self._conn else None
+            return {"hits": self.hits, "misses": self.misses, "in_memory": len(self._entries), "stored": stored}
+
+class AnswerEvaluator:
+    """Scores every question/answer pair of closed sessions off the request path.
+
+    A small worker pool prepares each session's pairs and skips those already in the cache; the rest are
+    queued on an InferenceScheduler, so the pairs of one session, and of every session closing at about the
+    same time, are generated together in one padded batch. Results are written back through
+    HiringState.record_evaluation.
+
+    With background=True (the interview services) the pairs go to the scheduler the chain's model already
+    runs on, at background priority: a scoring batch only starts while no interview turn is waiting, so at
+    most one batch ever runs ahead of a live turn. Otherwise (bulk grading) the evaluator batches on a
+    scheduler of its own with max_batch_size and max_wait.
+    """
+
+    def __init__(self, evaluation_chain, cache=None, max_batch_size=16, max_wait=0.5, workers=2, max_new_tokens=128,
+                 background=True):
+        from generation import get_pipeline, unwrap_pipeline
+        self.chain = evaluation_chain
+        self.cache = cache if cache is not None else EvaluationCache()
+        self.max_new_tokens = max_new_tokens
+        pipe = get_pipeline(evaluation_chain)
+        self.pipe = unwrap_pipeline(pipe)
+        self.priority = PRIORITY_LIVE
+        if self.pipe is None:
+            self.scheduler = None
+        elif background and isinstance(pipe, BatchedPipeline):
+            # One scheduler per model (see model.load_llms): share it instead of generating on a second thread
+            self.scheduler = pipe.scheduler
+            self.priority = PRIORITY_BACKGROUND
+        else:
+            self.scheduler = InferenceScheduler(max_batch_size, max_wait)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="answer-eval")
+        self.sessions = 0
+        self.pairs = 0
+        self.generated = 0
+        self.failed = 0
+        self._started = None
+        self._finished = None
+        self._pending = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def submit(self, state):
+        """Queue the session's unscored answers and return a Future of its evaluations (None if nothing to do)."""
+        if len(state.evaluations) >= min(len(state.tech_questions), len(state.answers)):
+            return None
+        with self._lock:
+            future = self._pending.get(state.session_id)
+            if future is not None:
+                return future
+            if self._started is None:
+                self._started = time.perf_counter()
+            future = self._pending[state.session_id] = self.executor.submit(self._evaluate, state)
+        future.add_done_callback(lambda done: self._finish(state))
+        return future
+
+    def _finish(self, state):
+        with self._lock:
+            self._pending.pop(state.session_id, None)
+            self._finished = time.perf_counter()
+
+    def _inputs(self, state, question, answer):
+        return {
+            "desired_position": state.candidate_data.get("desired_position") or "software engineer",
+            "years_experience": state.candidate_data.get("years_experience") or "unknown",
+            "question": question.split(".", 1)[-1].strip(),
+            "answer": answer
+        }
+
+    def _generate(self, inputs):
+        """Start one generation; returns a Future of the model's raw text."""
+        if self.scheduler is None:
+            # No pipeline behind the chain (e.g. the benchmark fakes): run it on the worker thread
+            future = Future()
+            try:
+                future.set_result({"generated_text": self.chain.invoke(inputs)["text"]})
+            except Exception as exc:
+                future.set_exception(exc)
+            return future
+        prompt = self.chain.prompt.format(**inputs)
+        return self.scheduler.submit(
+            self.pipe, prompt, priority=self.priority, return_full_text=False, max_new_tokens=self.max_new_tokens
+        )
+
+    def _evaluate(self, state):
+        start = time.perf_counter()
+        done = {evaluation["turn"] for evaluation in state.evaluations}
+        pending = {}
+        scored = generated = 0
+        for turn, (question, answer) in enumerate(zip(state.tech_questions, state.answers)):
+            if turn in done:
+                continue
+            scored += 1
+            key = evaluation_key(question, answer)
+            result = self.cache.get(key)
+            instrumentation.cache_event("evaluation", result is not None, state)
+            if result is not None:
+                state.record_evaluation(turn, result["score"], result["feedback"], cached=True)
+            else:
+                # Pairs already being generated for another session share that generation
+                with self._lock:
+                    future = self._inflight.get(key)
+                    if future is None:
+                        generated += 1
+                        future = self._inflight[key] = self._generate(self._inputs(state, question, answer))
+                        future.add_done_callback(lambda done, key=key: self._inflight.pop(key, None))
+                pending[turn] = (key, future)
+        wait([future for _, future in pending.values()])
+        for turn, (key, future) in sorted(pending.items()):
+            try:
+                output = future.result()
+                output = output[0] if isinstance(output, list) else output
+                result = parse_evaluation(output["generated_text"])
+            except Exception:
+                result = None
+            if result is None:
+                with self._lock:
+                    self.failed += 1
+                state.record_evaluation(turn, None, "Could not score this answer automatically.")
+                continue
+            self.cache.put(key, result)
+            state.record_evaluation(turn, result["score"], result["feedback"])
+        with self._lock:
+            self.sessions += 1
+            self.pairs += scored
+            self.generated += generated
+        instrumentation.observe("evaluate_answers", time.perf_counter() - start, state, background=True)
+        return state.evaluations
+
+    def pending(self, state):
+        """True while the session's answers are being scored."""
+        with self._lock:
+            return state.session_id in self._pending
+
+    def wait(self, state, timeout=None):
+        """Block until the session's evaluation finishes."""
+        with self._lock:
+            future = self._pending.get(state.session_id)
+        if future is not None:
+            wait([future], timeout)
+
+    def stats(self):
+        """Counters and throughput since the first submitted session."""
+        with self._lock:
+            elapsed = (self._finished or time.perf_counter()) - self._started if self._started else 0.0
+            in_progress = len(self._pending)
+        hours = elapsed / 3600
+        return {
+            "sessions": self.sessions,
+            "pairs": self.pairs,
+            "generated": self.generated,
+            "failed": self.failed,
+            "in_progress": in_progress,
+            "seconds": round(elapsed, 2),
+            "sessions_per_hour": round(self.sessions / hours, 1) if hours else 0.0,
+            "pairs_per_hour": round(self.pairs / hours, 1) if hours else 0.0,
+            "cache": self.cache.stats(),
+            "scheduler": self.scheduler.stats() if self.scheduler is not None else None
+        }
+
+def main():
+    from config import (
+        SESSION_STORE_URL, SESSION_TTL_HOURS, EVALUATION_CACHE_PATH, EVALUATION_MAX_NEW_TOKENS, EVALUATION_WORKERS
+    )
+    from session_store import create_session_store
+
+    parser = argparse.ArgumentParser(description="Score the answers of stored interviews that have not been graded yet.")
+    parser.add_argument("session_ids", nargs="*", help="sessions to grade (default: every finished session)")
+    parser.add_argument("--store", default=SESSION_STORE_URL, help="session store URL or SQLite path")
+    parser.add_argument("--cache", default=EVALUATION_CACHE_PATH, help="evaluation cache file (empty: in memory)")
+    parser.add_argument("--batch-size", type=int, default=32, help="answers generated together in one padded batch")
+    parser.add_argument("--workers", type=int, default=EVALUATION_WORKERS)
+    parser.add_argument("--max-new-tokens", type=int, default=EVALUATION_MAX_NEW_TOKENS)
+    parser.add_argument("--backend", default=None, help="model backend (default: TALENTSCOUT_MODEL_BACKEND)")
+    parser.add_argument("--fake", action="store_true", help="score with a canned fake chain instead of loading models")
+    args = parser.parse_args()
+    if not args.store:
+        parser.error("no session store configured; pass --store")
+
+    if args.fake:
+        from benchmarks.fakes import FakeChain
+        chain = FakeChain("Score: 7/10\nFeedback: Correct overall, but misses an edge case.")
+    else:
+        from model import load_llms
+        from prompts import create_evaluation_prompt
+        from chains import create_evaluation_chain
+        info_llm, _ = load_llms(args.backend)
+        chain = create_evaluation_chain(info_llm, create_evaluation_prompt())
+    # Nothing else runs on the model here, so grade in batches of --batch-size on the evaluator's own scheduler
+    evaluator = AnswerEvaluator(
+        chain, EvaluationCache(args.cache or None), args.batch_size, 1.0, args.workers, args.max_new_tokens,
+        background=False
+    )
+
+    store = create_session_store(args.store, SESSION_TTL_HOURS)
+    submitted = []
+    for session_id in args.session_ids or list(store.session_ids()):
+        state, _ = store.load(session_id)
+        if state is None or state.stage != "closing":
+            continue
+        future = evaluator.submit(state)
+        if future is not None:
+            submitted.append((state, future))
+    print(f"{len(submitted)} sessions to grade", file=sys.stderr)
+    for done, (state, future) in enumerate(submitted, 1):
+        future.result()
+        store.save(state)
+        if done % 100 == 0 or done == len(submitted):
+            stats = evaluator.stats()
+            print(f"[{done}/{len(submitted)}] {stats['pairs_per_hour']:.0f} answers/hour", file=sys.stderr)
+    print(json.dumps(evaluator.stats(), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import deque
+
+class Event:
+    """One entry of a session's event log."""
+    __slots__ = ("time", "kind", "stage", "text", "label", "score")
+
+    def __init__(self, time, kind, stage, text, label=None, score=None):
+        self.time = time
+        self.kind = kind
+        self.stage = stage
+        self.text = text
+        self.label = label
+        self.score = score
+
+    def to_row(self):
+        return [self.time, self.kind, self.stage, self.text, self.label, self.score]
+
+class EventLog:
+    """Typed, optionally bounded event log with running aggregates.
+
+    Sentiment counts, the mean sentiment score and per-stage/per-kind counters are updated on append, so
+    summaries never rescan the log and stay exact even after a bounded log has dropped old events.
+    """
+    SENTIMENT_LABELS = ("POSITIVE", "NEGATIVE", "NEUTRAL")
+
+    def __init__(self, maxlen=None):
+        self.events = deque(maxlen=maxlen)
+        self.total = 0
+        self.stage_counts = {}
+        self.kind_counts = {}
+        self.sentiment_counts = dict.fromkeys(self.SENTIMENT_LABELS, 0)
+        self.sentiment_sum = 0.0
+        self.sentiment_n = 0
+        self._lock = threading.Lock()
+
+    def append(self, kind, stage, text, label=None, score=None, timestamp=None):
+        event = Event(time.time() if timestamp is None else timestamp, kind, stage, text, label, score)
+        with self._lock:
+            self.events.append(event)
+            self._count(event)
+        return event
+
+    def _count(self, event):
+        self.total += 1
+        self.stage_counts[event.stage] = self.stage_counts.get(event.stage, 0) + 1
+        self.kind_counts[event.kind] = self.kind_counts.get(event.kind, 0) + 1
+        if event.kind == "sentiment":
+            if event.label in self.sentiment_counts:
+                self.sentiment_counts[event.label] += 1
+            self.sentiment_sum += event.score
+            self.sentiment_n += 1
+
+    def __len__(self):
+        return len(self.events)
+
+    def __iter__(self):
+        return iter(list(self.events))
+
+    def texts(self):
+        """Event messages in order, i.e. the old conversation_log."""
+        return [event.text for event in self]
+
+    @property
+    def sentiment_mean(self):
+        return self.sentiment_sum / self.sentiment_n if self.sentiment_n else None
+
+    def sentiment_summary(self):
+        """Counts per label and the mean score, in O(1)."""
+        return {
+            "counts": dict(self.sentiment_counts),
+            "scored": self.sentiment_n,
+            "mean": self.sentiment_mean
+        }
+
+    def aggregates(self):
+        """The running counters, without the events themselves."""
+        with self._lock:
+            return {
+                "maxlen": self.events.maxlen,
+                "total": self.total,
+                "stage_counts": dict(self.stage_counts),
+                "kind_counts": dict(self.kind_counts),
+                "sentiment_counts": dict(self.sentiment_counts),
+                "sentiment_sum": self.sentiment_sum,
+                "sentiment_n": self.sentiment_n
+            }
+
+    def rows(self, last=None):
+        """Events as compact lists, optionally only the `last` n of them."""
+        with self._lock:
+            events = list(self.events)
+        if last is not None:
+            events = events[len(events) - last:] if last else []
+        return [event.to_row() for event in events]
+
+    def to_dict(self):
+        """Compact serializable form: events as rows plus the aggregates."""
+        return {**self.aggregates(), "events": self.rows()}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a log written by to_dict."""
+        log = cls(data.get("maxlen"))
+        for timestamp, kind, stage, text, label, score in data.get("events", []):
+            log.events.append(Event(timestamp, kind, stage, text, label, score))
+        log.total = data.get("total", len(log.events))
+        log.stage_counts = dict(data.get("stage_counts", {}))
+        log.kind_counts = dict(data.get("kind_counts", {}))
+        log.sentiment_counts.update(data.get("sentiment_counts", {}))
+        log.sentiment_sum = data.get("sentiment_sum", 0.0)
+        log.sentiment_n = data.get("sentiment_n", 0)
+        return log
@@ -0,0 +1,121 @@
+import re
+from threading import Thread, Event
+from transformers import TextIteratorStreamer, StoppingCriteria, StoppingCriteriaList
+from prefix_cache import PrefixCachedPipeline
+from scheduler import BatchedPipeline
+
+def get_pipeline(chain):
+    """Return the transformers pipeline behind a chain, or None if the chain's LLM is not pipeline-backed."""
+    return getattr(getattr(chain, "llm", None), "pipeline", None)
+
+def unwrap_pipeline(pipe):
+    """Strip the scheduler and prefix-cache wrappers so whole batches reach the transformers pipeline."""
+    while isinstance(pipe, (BatchedPipeline, PrefixCachedPipeline)):
+        pipe = pipe.pipe
+    return pipe
+
+def prefix_pipeline(pipe):
+    """The PrefixCachedPipeline under the scheduler wrapper, or None if the pipe cannot generate from a PrefixEntry."""
+    while isinstance(pipe, BatchedPipeline):
+        pipe = pipe.pipe
+    return pipe if isinstance(pipe, PrefixCachedPipeline) else None
+
+def render_prompt(chain, inputs):
+    """Render the chain's prompt template with the given inputs."""
+    return chain.prompt.format(**inputs)
+
+def count_tokens(chain, text):
+    """Number of tokens in text for the chain's tokenizer, or None if the chain has no pipeline."""
+    pipe = get_pipeline(chain)
+    if pipe is None:
+        return None
+    return len(pipe.tokenizer.encode(text, add_special_tokens=False))
+
+def count_prompt_tokens(chain, inputs):
+    """Number of tokens in the chain's rendered prompt, or None if the chain has no pipeline."""
+    if get_pipeline(chain) is None:
+        return None
+    return count_tokens(chain, render_prompt(chain, inputs))
+
+def token_boundary(text):
+    """Cut text back so it tokenizes the same on its own as at the start of any longer prompt.
+
+    BPE merges never cross from a word or punctuation run into the spaces after it, nor past a line break, so
+    a trailing partial word and the spaces before it are dropped (a trailing newline is kept).
+    """
+    text = re.sub(r"\S+\Z", "", text)
+    return text if text.endswith("\n") else text.rstrip(" \t")
+
+def render_prefix(chain, inputs, variable):
+    """Render the part of the chain's prompt that comes before `variable`, which may still be unknown.
+
+    The text is cut at a token boundary, so encoding it separately from the rest of the prompt gives the same
+    tokens as encoding the full prompt.
+    """
+    marker = "\x00"
+    return token_boundary(chain.prompt.format(**{**inputs, variable: marker}).partition(marker)[0])
+
+def _generate(pipe, prompt, prefix=None, **generate_kwargs):
+    if prefix is not None and prefix_pipeline(pipe) is not None:
+        # Through the scheduler like any other call; PrefixCachedPipeline generates from the entry if it matches
+        generate_kwargs["prefix_entry"] = prefix
+    return pipe(prompt, return_full_text=False, **generate_kwargs)[0]['generated_text']
+
+def run_chain(chain, inputs, prefix=None, **generate_kwargs):
+    """Run the chain's pipeline directly so per-call generation arguments reach model.generate.
+
+    If a PrefixEntry matching the start of the rendered prompt is given, only the remainder is encoded.
+    """
+    pipe = get_pipeline(chain)
+    if pipe is None:
+        return chain.invoke(inputs)['text']
+    return _generate(pipe, render_prompt(chain, inputs), prefix, **generate_kwargs)
+
+class EventStoppingCriteria(StoppingCriteria):
+    """Stops generation as soon as the given threading.Event is set."""
+
+    def __init__(self, event):
+        self.event = event
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return self.event.is_set()
+
+def stream_chain(chain, inputs, stop_event=None, prefix=None, **generate_kwargs):
+    """Yield the chain's generated text chunk by chunk; setting stop_event ends generation early."""
+    pipe = get_pipeline(chain)
+    if pipe is None:
+        yield chain.invoke(inputs)['text']
+        return
+
+    stop_event = stop_event or Event()
+    streamer = TextIteratorStreamer(pipe.tokenizer, skip_prompt=True, skip_special_tokens=True)
+    stopping_criteria = StoppingCriteriaList(generate_kwargs.pop("stopping_criteria", []))
+    stopping_criteria.append(EventStoppingCriteria(stop_event))
+    errors = []
+
+    def generate():
+        try:
+            _generate(
+                pipe,
+                render_prompt(chain, inputs),
+                prefix,
+                streamer=streamer,
+                stopping_criteria=stopping_criteria,
+                **generate_kwargs
+            )
+        except Exception as exc:
+            # Unblock the consumer; the error is re-raised once the stream ends
+            errors.append(exc)
+            streamer.end()
+
+    worker = Thread(target=generate, daemon=True)
+    worker.start()
+    try:
+        for text in streamer:
+            yield text
+    finally:
+        # Closing the generator early (e.g. after five questions) also stops the model
+        stop_event.set()
+        worker.join()
+    if errors:
+        raise errors[0]
@@ -0,0 +1,173 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config import METRICS_ENABLED, METRICS_TRACE_LIMIT
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class _NullSpan:
+    """Stand-in returned by Instrumentation.timer when instrumentation is disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **fields):
+        pass
+
+    def tokens(self, prompt_tokens=None, generated_tokens=None):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class Span:
+    """Times one operation; extra fields and token counts end up in the session trace."""
+
+    def __init__(self, instrumentation, operation, state):
+        self.instrumentation = instrumentation
+        self.operation = operation
+        self.state = state
+        self.fields = {}
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None:
+            self.fields["error"] = exc_type.__name__
+        self.instrumentation.observe(self.operation, time.perf_counter() - self.start, self.state, **self.fields)
+        return False
+
+    def set(self, **fields):
+        """Attach fields (e.g. source="fast") to the trace event."""
+        self.fields.update(fields)
+
+    def tokens(self, prompt_tokens=None, generated_tokens=None):
+        """Count the prompt and generated tokens of the operation's model call; None means unknown."""
+        self.instrumentation.add_tokens(self.operation, prompt_tokens, generated_tokens)
+        if prompt_tokens is not None:
+            self.fields["prompt_tokens"] = prompt_tokens
+        if generated_tokens is not None:
+            self.fields["generated_tokens"] = generated_tokens
+
+class Instrumentation:
+    """Latency histograms, token counters and cache hit counters for the conversation engine.
+
+    Metrics are aggregated across sessions and rendered in the Prometheus text format; each event is also
+    appended to the `trace` of the HiringState it belongs to. When disabled every call returns immediately.
+    """
+
+    def __init__(self, enabled=False, trace_limit=500):
+        self.enabled = enabled
+        self.trace_limit = trace_limit
+        self._latency = {}  # operation -> [bucket counts..., sum, count]
+        self._tokens = {}  # (operation, kind) -> count
+        self._cache = {}  # (cache, result) -> count
+        self._lock = threading.Lock()
+
+    def timer(self, operation, state=None):
+        """Context manager timing an operation, e.g. `with instrumentation.timer("revision_chain", state) as span:`."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, operation, state)
+
+    def observe(self, operation, seconds, state=None, **fields):
+        """Record a duration measured elsewhere (e.g. by a background worker)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._latency.get(operation)
+            if histogram is None:
+                histogram = self._latency[operation] = [0] * len(LATENCY_BUCKETS) + [0.0, 0]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    histogram[i] += 1
+            histogram[-2] += seconds
+            histogram[-1] += 1
+        self._trace(state, operation, seconds=round(seconds, 6), **fields)
+
+    def add_tokens(self, operation, prompt_tokens=None, generated_tokens=None):
+        """Add to the prompt/generated token counters of an operation."""
+        if not self.enabled:
+            return
+        with self._lock:
+            for kind, count in (("prompt", prompt_tokens), ("generated", generated_tokens)):
+                if count is not None:
+                    self._tokens[(operation, kind)] = self._tokens.get((operation, kind), 0) + count
+
+    def cache_event(self, cache, hit, state=None):
+        """Count a hit or miss of the named cache (question_bank, prefix_cache, prefetch)."""
+        if not self.enabled:
+            return
+        result = "hit" if hit else "miss"
+        with self._lock:
+            self._cache[(cache, result)] = self._cache.get((cache, result), 0) + 1
+        self._trace(state, "cache", cache=cache, result=result)
+
+    def _trace(self, state, operation, **fields):
+        if state is None:
+            return
+        trace = state.trace
+        trace.append({"operation": operation, "time": round(time.time(), 3), **fields})
+        if len(trace) > self.trace_limit:
+            del trace[:len(trace) - self.trace_limit]
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            latency = {operation: list(histogram) for operation, histogram in self._latency.items()}
+            tokens = dict(self._tokens)
+            cache = dict(self._cache)
+
+        lines = [
+            "# HELP talentscout_operation_seconds Latency of conversation engine operations.",
+            "# TYPE talentscout_operation_seconds histogram"
+        ]
+        for operation, histogram in sorted(latency.items()):
+            for bound, count in zip(LATENCY_BUCKETS, histogram):
+                lines.append(f'talentscout_operation_seconds_bucket{{operation="{operation}",le="{bound}"}} {count}')
+            lines.append(f'talentscout_operation_seconds_bucket{{operation="{operation}",le="+Inf"}} {histogram[-1]}')
+            lines.append(f'talentscout_operation_seconds_sum{{operation="{operation}"}} {histogram[-2]}')
+            lines.append(f'talentscout_operation_seconds_count{{operation="{operation}"}} {histogram[-1]}')
+        lines += [
+            "# HELP talentscout_tokens_total Prompt and generated tokens per operation.",
+            "# TYPE talentscout_tokens_total counter"
+        ]
+        for (operation, kind), count in sorted(tokens.items()):
+            lines.append(f'talentscout_tokens_total{{operation="{operation}",kind="{kind}"}} {count}')
+        lines += [
+            "# HELP talentscout_cache_requests_total Cache lookups by cache and result.",
+            "# TYPE talentscout_cache_requests_total counter"
+        ]
+        for (name, result), count in sorted(cache.items()):
+            lines.append(f'talentscout_cache_requests_total{{cache="{name}",result="{result}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host="0.0.0.0"):
+        """Serve render() at http://host:port/metrics from a daemon thread and return the server."""
+        instrumentation = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = instrumentation.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+        return server
+
+# Shared by all modules and sessions of the process
+instrumentation = Instrumentation(METRICS_ENABLED, METRICS_TRACE_LIMIT)
@@ -0,0 +1,47 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from model import load_llms, load_sentiment_pipeline
+
+class ModelLoader:
+    """Loads the LLM and the sentiment model concurrently in background threads.
+
+    The app can serve the greeting and contact-field stages immediately and only block on the
+    models once a stage needs them.
+    """
+
+    def __init__(self, backend=None):
+        self.timings = {}
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="model-loader")
+        self._llms = self._executor.submit(self._timed, "llm", load_llms, backend)
+        self._sentiment = self._executor.submit(self._timed, "sentiment", load_sentiment_pipeline, backend)
+
+    def _timed(self, name, load, backend):
+        start = time.perf_counter()
+        result = load(backend)
+        self.timings[name] = time.perf_counter() - start
+        return result
+
+    @property
+    def ready(self):
+        """True once both models have finished loading (or failed)."""
+        return self._llms.done() and self._sentiment.done()
+
+    def llms(self, timeout=None):
+        """Return (info_llm, question_llm), waiting for the load to finish."""
+        return self._llms.result(timeout)
+
+    def sentiment_pipeline(self, timeout=None):
+        """Return the sentiment pipeline, waiting for the load to finish."""
+        return self._sentiment.result(timeout)
+
+    def wait(self, timeout=None):
+        """Block until both models are loaded, re-raising any load error."""
+        self.llms(timeout)
+        self.sentiment_pipeline(timeout)
+
+    def status(self):
+        """Per-model load state and timing in seconds."""
+        return {
+            name: round(self.timings[name], 1) if name in self.timings else ("failed" if future.done() else "loading")
+            for name, future in (("llm", self._llms), ("sentiment", self._sentiment))
+        }
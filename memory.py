@@ -0,0 +1,124 @@
+from collections import deque
+
+class BoundedConversationMemory:
+    """Conversation memory with the ConversationBufferMemory interface and a bounded size.
+
+    The most recent `window` turns are kept verbatim; older turns are folded into a rolling summary of at most
+    `summary_chars` characters. Consecutive duplicate turns are dropped, the empty-output save that precedes each
+    reply is merged into it, and the whole memory is kept under `max_bytes` of UTF-8 text.
+    """
+    memory_key = "history"
+    human_prefix = "Human"
+    ai_prefix = "AI"
+    summary_line_chars = 120
+
+    def __init__(self, window=6, max_bytes=16384, summary_chars=1000, summarize=None):
+        self.window = window
+        self.max_bytes = max_bytes
+        self.summary_chars = summary_chars
+        # summarize(summary, input_text, output_text) -> new summary; defaults to a condensed line per turn
+        self.summarize = summarize or self._append_summary
+        self.turns = deque()
+        self.summary = ""
+        self.summarized_turns = 0
+        self.dropped_duplicates = 0
+
+    def save_context(self, inputs, outputs):
+        """Record one exchange; same signature as ConversationBufferMemory.save_context."""
+        input_text = str(inputs.get("input", ""))
+        output_text = str(outputs.get("output", ""))
+        if not input_text and not output_text:
+            return
+        if self.turns:
+            last_input, last_output = self.turns[-1]
+            if last_input == input_text and not last_output:
+                # Input saved on arrival, now completed with its reply
+                self.turns[-1] = (input_text, output_text)
+                self._enforce_limits()
+                return
+            if (last_input, last_output) == (input_text, output_text):
+                self.dropped_duplicates += 1
+                return
+        self.turns.append((input_text, output_text))
+        self._enforce_limits()
+
+    def _enforce_limits(self):
+        while len(self.turns) > self.window:
+            self._fold_oldest()
+        while self.turns and self.nbytes > self.max_bytes:
+            self._fold_oldest()
+        if self.nbytes > self.max_bytes:
+            # Only the summary is left and it is still too large: keep its most recent part
+            excess = self.nbytes - self.max_bytes
+            self.summary = self.summary.encode()[excess:].decode(errors="ignore")
+
+    def _fold_oldest(self):
+        input_text, output_text = self.turns.popleft()
+        self.summary = self.summarize(self.summary, input_text, output_text)
+        self.summarized_turns += 1
+
+    def _append_summary(self, summary, input_text, output_text):
+        line = f"{self.human_prefix}: {input_text[:self.summary_line_chars]}"
+        if output_text:
+            line += f" / {self.ai_prefix}: {output_text[:self.summary_line_chars]}"
+        summary = f"{summary}\n{line}" if summary else line
+        if len(summary) > self.summary_chars:
+            # Rolling: forget the oldest summarized turns first
+            summary = summary[-self.summary_chars:].split("\n", 1)[-1]
+        return summary
+
+    @property
+    def buffer(self):
+        """The history as one string, like ConversationBufferMemory.buffer."""
+        lines = [f"Summary of earlier conversation:\n{self.summary}"] if self.summary else []
+        for input_text, output_text in self.turns:
+            lines.append(f"{self.human_prefix}: {input_text}")
+            if output_text:
+                lines.append(f"{self.ai_prefix}: {output_text}")
+        return "\n".join(lines)
+
+    @property
+    def nbytes(self):
+        """UTF-8 size of the stored text."""
+        return len(self.summary.encode()) + sum(
+            len(input_text.encode()) + len(output_text.encode()) for input_text, output_text in self.turns
+        )
+
+    def load_memory_variables(self, inputs):
+        return {self.memory_key: self.buffer}
+
+    def clear(self):
+        self.turns.clear()
+        self.summary = ""
+        self.summarized_turns = 0
+        self.dropped_duplicates = 0
+
+    def to_dict(self):
+        return {
+            "window": self.window,
+            "max_bytes": self.max_bytes,
+            "summary_chars": self.summary_chars,
+            "turns": [list(turn) for turn in self.turns],
+            "summary": self.summary,
+            "summarized_turns": self.summarized_turns,
+            "dropped_duplicates": self.dropped_duplicates
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        memory = cls(data["window"], data["max_bytes"], data["summary_chars"])
+        memory.turns.extend(tuple(turn) for turn in data["turns"])
+        memory.summary = data["summary"]
+        memory.summarized_turns = data["summarized_turns"]
+        memory.dropped_duplicates = data["dropped_duplicates"]
+        return memory
+
+    def footprint(self):
+        """Size counters for reporting."""
+        return {
+            "turns": len(self.turns),
+            "summarized_turns": self.summarized_turns,
+            "dropped_duplicates": self.dropped_duplicates,
+            "summary_bytes": len(self.summary.encode()),
+            "bytes": self.nbytes
+        }
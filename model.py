@@ -1,20 +1,109 @@
-from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline
+from transformers import AutoTokenizer, AutoModelForCausalLM, BitsAndBytesConfig, pipeline
 from langchain.llms import HuggingFacePipeline
 import torch
+from config import (
+    SCHEDULER_ENABLED, SCHEDULER_MAX_BATCH_SIZE, SCHEDULER_MAX_WAIT_MS, QUESTION_MAX_NEW_TOKENS,
+    PREFIX_CACHE_MODE, PREFIX_CACHE_MAX_MB, MODEL_NAME, SENTIMENT_MODEL_NAME, MODEL_BACKEND, SPECULATIVE_ENABLED,
+    DRAFT_MODEL_NAME, SPECULATIVE_NUM_TOKENS, SNAPSHOT_DIR
+)
+from scheduler import InferenceScheduler, BatchedPipeline
+from prefix_cache import PrefixCache, PrefixCachedPipeline
+from prompts import create_prompts, static_prefixes
 
-def load_models():
-    """Load transformer models and set up pipelines for info gathering, question generation, and sentiment analysis."""
-    model_name = "Qwen/Qwen3-4B"
-    tokenizer = AutoTokenizer.from_pretrained(
-        model_name,
-        pad_token='<|endoftext|>',
-        padding_side='left'
-    )
-    model = AutoModelForCausalLM.from_pretrained(
-        model_name,
-        device_map="auto",
-        torch_dtype=torch.bfloat16,
-    )
+def prefix_cache_enabled():
+    """Resolve TALENTSCOUT_PREFIX_CACHE; "auto" turns the cache on for CPU-only hosts."""
+    if PREFIX_CACHE_MODE == "auto":
+        return not torch.cuda.is_available()
+    return PREFIX_CACHE_MODE in ("1", "true", "yes", "on")
+
+BACKENDS = ("bf16", "int8", "int4", "cpu-int8", "onnx")
+
+# Dense dtype stored in the warm-start snapshot for the backends that can load from one
+SNAPSHOT_DTYPES = {"bf16": torch.bfloat16, "cpu-int8": torch.float32}
+
+def snapshot_enabled(backend):
+    """True when TALENTSCOUT_SNAPSHOT_DIR is set and the backend runs from dense CPU weights."""
+    if not SNAPSHOT_DIR or backend not in SNAPSHOT_DTYPES:
+        return False
+    # bf16 is placed on the GPU by accelerate when there is one; the mapping only pays off on CPU hosts
+    return backend != "bf16" or not torch.cuda.is_available()
+
+def load_tokenizer(model_name):
+    """Load the tokenizer with left padding so prompts can be batched."""
+    kwargs = {"pad_token": '<|endoftext|>', "padding_side": 'left'}
+    if SNAPSHOT_DIR:
+        from snapshot import load_snapshot_tokenizer
+        tokenizer = load_snapshot_tokenizer(SNAPSHOT_DIR, model_name, **kwargs)
+        if tokenizer is not None:
+            return tokenizer
+    return AutoTokenizer.from_pretrained(model_name, **kwargs)
+
+def load_causal_lm(model_name, backend="bf16"):
+    """Load the causal LM with the selected inference backend.
+
+    bf16: full-precision weights placed by accelerate (default).
+    int8 / int4: bitsandbytes quantized weights (CUDA).
+    cpu-int8: float32 weights with torch dynamic int8 quantization of all Linear layers, for GPU-less hosts.
+    onnx: ONNX Runtime export through optimum (optional dependency).
+
+    With TALENTSCOUT_SNAPSHOT_DIR set, bf16 on CPU and cpu-int8 map their dense weights from the warm-start
+    snapshot (built on first use); cpu-int8 quantizes the mapped float32 weights in place, so its Linear layers
+    end up in private int8 memory and only the remaining weights (embeddings, norms) stay shared.
+    """
+    if snapshot_enabled(backend):
+        from snapshot import load_dense
+        model = load_dense(SNAPSHOT_DIR, model_name, SNAPSHOT_DTYPES[backend])
+        if backend == "cpu-int8":
+            # In place: a copy would duplicate the mapped float32 weights in private memory before quantizing
+            return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+        return model
+    if backend == "bf16":
+        return AutoModelForCausalLM.from_pretrained(model_name, device_map="auto", torch_dtype=torch.bfloat16)
+    if backend == "int8":
+        quantization_config = BitsAndBytesConfig(load_in_8bit=True)
+        return AutoModelForCausalLM.from_pretrained(model_name, device_map="auto", quantization_config=quantization_config)
+    if backend == "int4":
+        quantization_config = BitsAndBytesConfig(
+            load_in_4bit=True,
+            bnb_4bit_quant_type="nf4",
+            bnb_4bit_compute_dtype=torch.bfloat16
+        )
+        return AutoModelForCausalLM.from_pretrained(model_name, device_map="auto", quantization_config=quantization_config)
+    if backend == "cpu-int8":
+        model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=torch.float32, low_cpu_mem_usage=True)
+        return torch.ao.quantization.quantize_dynamic(model.eval(), {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    if backend == "onnx":
+        try:
+            from optimum.onnxruntime import ORTModelForCausalLM
+        except ImportError as exc:
+            raise ImportError("The onnx backend needs optimum: pip install 'optimum[onnxruntime]'") from exc
+        return ORTModelForCausalLM.from_pretrained(model_name, export=True)
+    raise ValueError(f"Unknown model backend {backend!r}; expected one of {', '.join(BACKENDS)}")
+
+def load_draft_model(backend="bf16", num_assistant_tokens=SPECULATIVE_NUM_TOKENS):
+    """Load the small draft model used for speculative decoding.
+
+    It must share the main model's tokenizer, as the Qwen3 family does. num_assistant_tokens is the initial
+    number of tokens proposed per step; transformers adapts it to the observed acceptance.
+    """
+    if backend == "onnx":
+        raise ValueError("Speculative decoding needs a torch backend; it is not available with onnx")
+    draft_model = load_causal_lm(DRAFT_MODEL_NAME, backend)
+    draft_model.generation_config.num_assistant_tokens = num_assistant_tokens
+    return draft_model
+
+def load_llms(backend=None, speculative=None):
+    """Load the causal LM and wrap it in the info-gathering and question-generation LLMs.
+
+    With speculative decoding (TALENTSCOUT_SPECULATIVE, or speculative=True) the question LLM, which also runs
+    the revision chain, generates with a draft model as assistant.
+    """
+    backend = backend or MODEL_BACKEND
+    speculative = SPECULATIVE_ENABLED if speculative is None else speculative
+    tokenizer = load_tokenizer(MODEL_NAME)
+    model = load_causal_lm(MODEL_NAME, backend)
+    # Passed to generate() with the question pipeline's unchanged sampling settings
+    assisted = {"assistant_model": load_draft_model(backend)} if speculative else {}
     
     info_pipeline = pipeline(
         "text-generation",
@@ -32,21 +121,60 @@ def load_models():
         "text-generation",
         model=model,
         tokenizer=tokenizer,
-        max_new_tokens=1024,
+        max_new_tokens=QUESTION_MAX_NEW_TOKENS,
         temperature=1,
         top_p=0.95,
         repetition_penalty=1.3,
         do_sample=True,
-        eos_token_id=tokenizer.eos_token_id
+        eos_token_id=tokenizer.eos_token_id,
+        **assisted
     )
     
+    # ONNX Runtime sessions manage their own KV cache, so the prefix cache only applies to torch backends
+    if prefix_cache_enabled() and backend != "onnx":
+        # Every chain's prompt starts with a fixed preamble; encode each once and reuse it across calls and sessions
+        prefix_cache = PrefixCache(model, tokenizer, PREFIX_CACHE_MAX_MB * 1024 * 1024)
+        prefixes = static_prefixes(create_prompts())
+        info_pipeline = PrefixCachedPipeline(info_pipeline, prefix_cache, prefixes)
+        question_pipeline = PrefixCachedPipeline(question_pipeline, prefix_cache, prefixes)
+    elif backend != "onnx":
+        # No shared cache, but question generation can still start from the prefix the prefetcher encoded
+        question_pipeline = PrefixCachedPipeline(question_pipeline, None, ())
+
+    if SCHEDULER_ENABLED:
+        # One scheduler per model: both pipelines share the weights, so their batches run one after another
+        scheduler = InferenceScheduler(SCHEDULER_MAX_BATCH_SIZE, SCHEDULER_MAX_WAIT_MS / 1000)
+        info_pipeline = BatchedPipeline(info_pipeline, scheduler)
+        # Assisted generation runs one sequence at a time, so question prompts are queued but not batched
+        question_pipeline = BatchedPipeline(question_pipeline, scheduler, batchable=not speculative)
+
+    info_llm = HuggingFacePipeline(pipeline=info_pipeline)
+    question_llm = HuggingFacePipeline(pipeline=question_pipeline)
+    return info_llm, question_llm
+
+def load_sentiment_pipeline(backend=None):
+    """Load the sentiment-analysis pipeline."""
+    backend = backend or MODEL_BACKEND
+    sentiment_model = SENTIMENT_MODEL_NAME
+    tokenizer = None
+    if snapshot_enabled(backend):
+        from snapshot import load_dense, load_snapshot_tokenizer
+        sentiment_model = load_dense(SNAPSHOT_DIR, SENTIMENT_MODEL_NAME, torch.float32, "sequence-classification")
+        tokenizer = load_snapshot_tokenizer(SNAPSHOT_DIR, SENTIMENT_MODEL_NAME)
     sentiment_pipeline = pipeline(
         "sentiment-analysis",
-        model="distilbert-base-uncased-finetuned-sst-2-english",
+        model=sentiment_model,
+        tokenizer=tokenizer,
         truncation=True
     )
-    
-    info_llm = HuggingFacePipeline(pipeline=info_pipeline)
-    question_llm = HuggingFacePipeline(pipeline=question_pipeline)
-    
-    return info_llm, question_llm, sentiment_pipeline
\ No newline at end of file
+    if backend == "cpu-int8":
+        sentiment_pipeline.model = torch.ao.quantization.quantize_dynamic(
+            sentiment_pipeline.model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+    return sentiment_pipeline
+
+def load_models(backend=None):
+    """Load transformer models and set up pipelines for info gathering, question generation, and sentiment analysis."""
+    info_llm, question_llm = load_llms(backend)
+    sentiment_pipeline = load_sentiment_pipeline(backend)
+    return info_llm, question_llm, sentiment_pipeline
@@ -0,0 +1,66 @@
+from concurrent.futures import ThreadPoolExecutor
+from generation import get_pipeline, prefix_pipeline, render_prefix
+from scheduler import BatchedPipeline, PRIORITY_BACKGROUND
+
+class QuestionPrefetcher:
+    """Speculatively encodes the question prompt while the candidate is still answering contact fields.
+
+    Everything in the tech question prompt before {tech_stack} is known once the years of experience and
+    desired position are recorded, so its KV cache is computed in the background and handed to question
+    generation when the tech stack arrives.
+
+    With the inference scheduler the encoding is queued there at background priority, so it never runs at the
+    same time as a batch on the shared model and only starts while no interview turn is waiting.
+    """
+
+    def __init__(self, tech_question_chain, max_workers=1, wait_timeout=30):
+        self.chain = tech_question_chain
+        self.wait_timeout = wait_timeout
+        self.started = 0
+        self.used = 0
+        self.cancelled = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="question-prefetch")
+
+    def warm(self, state):
+        """Start encoding the prompt prefix for the state's experience and position."""
+        pipe = get_pipeline(self.chain)
+        # Only a PrefixCachedPipeline can generate from the encoded prefix
+        prefix_pipe = prefix_pipeline(pipe)
+        if prefix_pipe is None or state.question_prefetch is not None:
+            return
+        prefix_text = render_prefix(self.chain, {
+            "years_experience": state.candidate_data["years_experience"],
+            "desired_position": state.candidate_data["desired_position"]
+        }, "tech_stack")
+        if isinstance(pipe, BatchedPipeline):
+            state.question_prefetch = pipe.scheduler.submit(
+                prefix_pipe.encode, prefix_text, batchable=False, priority=PRIORITY_BACKGROUND
+            )
+        else:
+            state.question_prefetch = self._executor.submit(lambda: prefix_pipe.encode([prefix_text])[0])
+        self.started += 1
+
+    def take(self, state):
+        """Return the warmed-up PrefixEntry, waiting if encoding is under way and cancelling it if it never started."""
+        future, state.question_prefetch = state.question_prefetch, None
+        if future is None:
+            return None
+        if future.cancel():
+            self.cancelled += 1
+            return None
+        try:
+            entry = future.result(timeout=self.wait_timeout)
+        except Exception:
+            return None
+        self.used += 1
+        return entry
+
+    def cancel(self, state):
+        """Drop any warm-up for the state, e.g. when questions were served from the question bank."""
+        future, state.question_prefetch = state.question_prefetch, None
+        if future is not None and future.cancel():
+            self.cancelled += 1
+
+    def stats(self):
+        """Return prefetch counters."""
+        return {"started": self.started, "used": self.used, "cancelled": self.cancelled}
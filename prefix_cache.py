@@ -0,0 +1,221 @@
+import copy
+import threading
+from collections import OrderedDict
+import torch
+from instrumentation import instrumentation
+
+class PrefixEntry:
+    """Token ids and past_key_values computed once for a static prompt prefix."""
+    __slots__ = ("text", "input_ids", "past_key_values")
+
+    def __init__(self, text, input_ids, past_key_values):
+        self.text = text
+        self.input_ids = input_ids
+        self.past_key_values = past_key_values
+
+def encode_prefix(model, tokenizer, prefix_text):
+    """Run the model over a prompt prefix once and keep its KV cache."""
+    input_ids = tokenizer(prefix_text, return_tensors="pt", add_special_tokens=False).input_ids.to(model.device)
+    with torch.no_grad():
+        outputs = model(input_ids=input_ids, use_cache=True)
+    return PrefixEntry(prefix_text, input_ids, outputs.past_key_values)
+
+def suffix_ids(tokenizer, entry, prompt):
+    """Token ids of the prompt after entry's prefix, or None if the prompt's tokens do not start with the prefix's.
+
+    The full prompt is tokenized, so the cached KV is only reused when the prefix is also a token-level prefix.
+    """
+    if not prompt.startswith(entry.text):
+        return None
+    input_ids = tokenizer(prompt, add_special_tokens=False).input_ids
+    prefix_ids = entry.input_ids[0].tolist()
+    if len(input_ids) <= len(prefix_ids) or input_ids[:len(prefix_ids)] != prefix_ids:
+        return None
+    return input_ids[len(prefix_ids):]
+
+def expand_cache(past_key_values, batch_size):
+    """A copy of a single-sequence KV cache repeated for batch_size sequences."""
+    # generate() extends the cache in place, so every call works on its own copy
+    cache = copy.deepcopy(past_key_values)
+    if batch_size == 1:
+        return cache
+    if hasattr(cache, "batch_repeat_interleave"):
+        cache.batch_repeat_interleave(batch_size)
+        return cache
+    return tuple(tuple(tensor.repeat_interleave(batch_size, dim=0) for tensor in layer) for layer in cache)
+
+def generate_from_prefix(model, tokenizer, entry, suffixes, **generate_kwargs):
+    """Generate continuations of entry's prefix followed by each suffix (token ids from suffix_ids) in one batch.
+
+    The suffixes are left-padded after the shared prefix and the attention mask hides the padding, so the
+    sequences decode side by side from one copy of the prefix KV each. Returns the generated texts.
+    """
+    width = max(len(ids) for ids in suffixes)
+    padded = [[tokenizer.pad_token_id] * (width - len(ids)) + list(ids) for ids in suffixes]
+    suffix_mask = [[0] * (width - len(ids)) + [1] * len(ids) for ids in suffixes]
+    batch_size = len(suffixes)
+    input_ids = torch.cat([entry.input_ids.expand(batch_size, -1), torch.tensor(padded, device=model.device)], dim=1)
+    attention_mask = torch.cat([
+        torch.ones_like(entry.input_ids).expand(batch_size, -1), torch.tensor(suffix_mask, device=model.device)
+    ], dim=1)
+    with torch.no_grad():
+        output_ids = model.generate(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            past_key_values=expand_cache(entry.past_key_values, batch_size),
+            pad_token_id=tokenizer.pad_token_id,
+            **generate_kwargs
+        )
+    return tokenizer.batch_decode(output_ids[:, input_ids.shape[1]:], skip_special_tokens=True)
+
+def next_token_logits(model, tokenizer, prompt, entry=None):
+    """Logits for the token following the prompt, reusing a matching PrefixEntry when given."""
+    ids = suffix_ids(tokenizer, entry, prompt) if entry is not None else None
+    if ids is not None:
+        input_ids = torch.tensor([ids])
+        past_key_values = copy.deepcopy(entry.past_key_values)
+    else:
+        input_ids = tokenizer(prompt, return_tensors="pt", add_special_tokens=False).input_ids
+        past_key_values = None
+    with torch.no_grad():
+        outputs = model(input_ids=input_ids.to(model.device), past_key_values=past_key_values, use_cache=past_key_values is not None)
+    return outputs.logits[0, -1]
+
+def pipeline_generate_kwargs(pipe):
+    """Generation settings (temperature, top_p, max_new_tokens, ...) the pipeline was created with."""
+    settings = dict(getattr(pipe, "_forward_params", {}))
+    # Newer transformers keep the speculative-decoding draft model on the pipeline instead
+    assistant_model = getattr(pipe, "assistant_model", None)
+    if assistant_model is not None:
+        settings.setdefault("assistant_model", assistant_model)
+    return settings
+
+def _kv_tensors(obj):
+    if torch.is_tensor(obj):
+        yield obj
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            yield from _kv_tensors(item)
+    else:
+        # Cache objects keep their tensors per layer (newer transformers) or in key/value lists (older)
+        for name in ("layers", "key_cache", "value_cache", "keys", "values"):
+            value = getattr(obj, name, None)
+            if torch.is_tensor(value) or isinstance(value, (list, tuple)):
+                yield from _kv_tensors(value)
+
+def kv_cache_bytes(past_key_values):
+    """Memory held by a KV cache, in bytes."""
+    return sum(tensor.numel() * tensor.element_size() for tensor in _kv_tensors(past_key_values))
+
+class PrefixCache:
+    """LRU cache of encoded prompt prefixes shared by all chains and sessions, bounded by KV memory."""
+
+    def __init__(self, model, tokenizer, max_bytes=1024 * 1024 * 1024):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.max_bytes = max_bytes
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, prefix_text):
+        """Return the PrefixEntry for the text, encoding it on a miss."""
+        with self._lock:
+            if prefix_text in self._entries:
+                self._entries.move_to_end(prefix_text)
+                self.hits += 1
+                instrumentation.cache_event("prefix_cache", True)
+                return self._entries[prefix_text][0]
+            self.misses += 1
+        instrumentation.cache_event("prefix_cache", False)
+        entry = encode_prefix(self.model, self.tokenizer, prefix_text)
+        size = kv_cache_bytes(entry.past_key_values)
+        with self._lock:
+            if prefix_text not in self._entries and size <= self.max_bytes:
+                self._entries[prefix_text] = (entry, size)
+                self.bytes_used += size
+                while self.bytes_used > self.max_bytes:
+                    _, (_, evicted_size) = self._entries.popitem(last=False)
+                    self.bytes_used -= evicted_size
+        return entry
+
+    def stats(self):
+        """Return cache metrics."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes_used": self.bytes_used,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+class PrefixCachedPipeline:
+    """Pipeline stand-in that reuses cached KV states for known static prompt prefixes.
+
+    Prompts starting with one of `prefixes` are generated from the cached prefix (longest match wins), and a
+    batch of prompts sharing a prefix decodes in one generate call; anything else goes to the wrapped
+    pipeline unchanged. A call can also pass its own PrefixEntry as `prefix_entry` (e.g. a prefetched
+    question prompt), which is used before the static prefixes. prefix_cache may be None, in which case only
+    such entries are reused.
+    """
+    PIPELINE_ONLY_KWARGS = ("return_full_text", "batch_size", "clean_up_tokenization_spaces")
+
+    def __init__(self, pipe, prefix_cache, prefixes):
+        self.pipe = pipe
+        self.prefix_cache = prefix_cache
+        self.prefixes = sorted({prefix for prefix in prefixes if prefix}, key=len, reverse=True) if prefix_cache else []
+
+    def _match(self, prompt):
+        for prefix in self.prefixes:
+            if prompt.startswith(prefix):
+                return prefix
+        return None
+
+    def encode(self, prefix_texts, **kwargs):
+        """Return a PrefixEntry for each text, from the cache when there is one; run as a scheduler job."""
+        if self.prefix_cache is not None:
+            # Shared cache: candidates with the same experience and position reuse one encoding
+            return [self.prefix_cache.get(text) for text in prefix_texts]
+        return [encode_prefix(self.pipe.model, self.tokenizer, text) for text in prefix_texts]
+
+    def __call__(self, inputs, prefix_entry=None, **kwargs):
+        single = isinstance(inputs, str)
+        prompts = [inputs] if single else list(inputs)
+        return_full_text = kwargs.get("return_full_text", True)
+        generate_kwargs = {**pipeline_generate_kwargs(self.pipe), **kwargs}
+        for name in self.PIPELINE_ONLY_KWARGS:
+            generate_kwargs.pop(name, None)
+
+        outputs = [None] * len(prompts)
+        groups = {}  # prefix -> (PrefixEntry, [(index, suffix token ids)])
+        uncached = []
+        if prefix_entry is not None:
+            groups[prefix_entry.text] = (prefix_entry, [])
+        for index, prompt in enumerate(prompts):
+            if prefix_entry is not None and prompt.startswith(prefix_entry.text):
+                prefix = prefix_entry.text
+            else:
+                prefix = self._match(prompt)
+            if prefix is not None and prefix not in groups:
+                groups[prefix] = (self.prefix_cache.get(prefix), [])
+            ids = suffix_ids(self.tokenizer, groups[prefix][0], prompt) if prefix is not None else None
+            if ids is None:
+                uncached.append(index)
+            else:
+                groups[prefix][1].append((index, ids))
+        for entry, members in groups.values():
+            if not members:
+                continue
+            texts = generate_from_prefix(self.pipe.model, self.tokenizer, entry, [ids for _, ids in members], **generate_kwargs)
+            for (index, _), text in zip(members, texts):
+                outputs[index] = [{"generated_text": prompts[index] + text if return_full_text else text}]
+        if uncached:
+            results = self.pipe([prompts[index] for index in uncached], **kwargs)
+            for index, result in zip(uncached, results):
+                outputs[index] = result
+        return outputs[0] if single else outputs
+
+    def __getattr__(self, name):
+        return getattr(self.pipe, name)
@@ -114,4 +114,42 @@ Guidelines:
         template=closing_template
     )
 
-    return info_gathering_prompt, tech_question_prompt, closing_prompt, relevance_prompt, revision_prompt
\ No newline at end of file
+    return info_gathering_prompt, tech_question_prompt, closing_prompt, relevance_prompt, revision_prompt
+
+def static_prefixes(prompts):
+    """Return the fixed text each prompt template starts with, up to the last line break before its first variable.
+
+    Ending on a line break keeps the prefix a token boundary, so it encodes the same alone as in the full prompt.
+    """
+    prefixes = []
+    for prompt in prompts:
+        text = prompt.template.split("{", 1)[0]
+        prefixes.append(text[:text.rfind("\n") + 1])
+    return prefixes
+
+def create_evaluation_prompt():
+    """Create the prompt that scores one candidate answer against its question."""
+    return PromptTemplate(
+        input_variables=["desired_position", "years_experience", "question", "answer"],
+        template="""<|im_start|>system
+You are a senior technical interviewer grading a screening test for the position of {desired_position}. The candidate has {years_experience} years of experience.
+
+Score the candidate's answer to the question below from 0 to 10:
+- 0: no answer, off-topic or entirely wrong.
+- 5: partially correct, with important gaps or mistakes.
+- 10: correct, complete and well reasoned for the candidate's level.
+
+Judge technical correctness and completeness only, not writing style. Respond in exactly this format, with no additional text:
+Score: <0-10>
+Feedback: <one or two sentences explaining the score>
+
+Question: {question}
+Answer: {answer}
+<|im_end|>
+<|im_start|>assistant
+<think>
+
+</think>
+
+"""
+    )
\ No newline at end of file
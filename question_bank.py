@@ -0,0 +1,271 @@
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+TECH_SYNONYMS = {
+    "js": "javascript",
+    "ecmascript": "javascript",
+    "ts": "typescript",
+    "py": "python",
+    "python3": "python",
+    "golang": "go",
+    "node": "node.js",
+    "nodejs": "node.js",
+    "reactjs": "react",
+    "react.js": "react",
+    "vuejs": "vue",
+    "vue.js": "vue",
+    "angularjs": "angular",
+    "postgres": "postgresql",
+    "psql": "postgresql",
+    "mongo": "mongodb",
+    "k8s": "kubernetes",
+    "c sharp": "c#",
+    "csharp": "c#",
+    "cpp": "c++",
+    "dotnet": ".net",
+    "amazon web services": "aws",
+    "gcp": "google cloud",
+    "sklearn": "scikit-learn",
+    "tf": "tensorflow",
+    "drf": "django rest framework"
+}
+
+POSITION_SYNONYMS = {
+    "sr": "senior",
+    "jr": "junior",
+    "dev": "developer",
+    "eng": "engineer",
+    "swe": "software engineer",
+    "sde": "software engineer",
+    "fe": "frontend",
+    "front end": "frontend",
+    "front-end": "frontend",
+    "be": "backend",
+    "back end": "backend",
+    "back-end": "backend",
+    "ml": "machine learning"
+}
+
+EXPERIENCE_BANDS = [(1, "entry"), (4, "mid"), (9, "senior")]
+
+def canonical_tech_stack(tech_stack):
+    """Lower-case, merge synonyms, de-duplicate and sort the list returned by format_tech_stack."""
+    canonical = set()
+    for tech in tech_stack or []:
+        tech = re.sub(r'\s+', ' ', tech.strip().lower())
+        canonical.add(TECH_SYNONYMS.get(tech, tech))
+    canonical.discard("")
+    return sorted(canonical)
+
+def experience_band(years_experience):
+    """Bucket years of experience into a seniority band."""
+    try:
+        years = int(years_experience)
+    except (TypeError, ValueError):
+        return "unknown"
+    for upper, band in EXPERIENCE_BANDS:
+        if years <= upper:
+            return band
+    return "principal"
+
+def normalize_position(desired_position):
+    """Lower-case the position, drop punctuation and expand common abbreviations."""
+    position = (desired_position or "").lower()
+    for alias in ("front end", "front-end", "back end", "back-end"):
+        position = position.replace(alias, POSITION_SYNONYMS[alias])
+    words = re.findall(r'[a-z0-9#+]+', position)
+    return " ".join(POSITION_SYNONYMS.get(word, word) for word in words)
+
+def question_bank_key(candidate_data):
+    """Build the cache key for a candidate's question set."""
+    return "|".join([
+        ",".join(canonical_tech_stack(candidate_data.get("tech_stack"))),
+        experience_band(candidate_data.get("years_experience")),
+        normalize_position(candidate_data.get("desired_position"))
+    ])
+
+class MemoryBackend:
+    """Keeps question sets in process memory, ordered by last use."""
+
+    def __init__(self):
+        self._sets = OrderedDict()
+
+    def load(self, key):
+        if key not in self._sets:
+            return []
+        self._sets.move_to_end(key)
+        return list(self._sets[key])
+
+    def add(self, key, questions, created_at):
+        self._sets.setdefault(key, []).append((created_at, questions))
+        self._sets.move_to_end(key)
+
+    def expire(self, cutoff):
+        for key in list(self._sets):
+            fresh = [entry for entry in self._sets[key] if entry[0] >= cutoff]
+            if fresh:
+                self._sets[key] = fresh
+            else:
+                del self._sets[key]
+
+    def evict(self, max_keys):
+        while len(self._sets) > max_keys:
+            self._sets.popitem(last=False)
+
+    def count(self):
+        return len(self._sets), sum(len(entries) for entries in self._sets.values())
+
+class SQLiteBackend:
+    """Stores question sets in a SQLite file so the bank survives restarts."""
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS question_sets ("
+            "key TEXT NOT NULL, questions TEXT NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_question_sets_key ON question_sets (key)")
+        self._conn.commit()
+
+    def load(self, key):
+        rows = self._conn.execute(
+            "SELECT created_at, questions FROM question_sets WHERE key = ? ORDER BY created_at", (key,)
+        ).fetchall()
+        if rows:
+            self._conn.execute("UPDATE question_sets SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return [(created_at, json.loads(questions)) for created_at, questions in rows]
+
+    def add(self, key, questions, created_at):
+        self._conn.execute(
+            "INSERT INTO question_sets (key, questions, created_at, last_used) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(questions), created_at, created_at)
+        )
+        self._conn.commit()
+
+    def expire(self, cutoff):
+        self._conn.execute("DELETE FROM question_sets WHERE created_at < ?", (cutoff,))
+        self._conn.commit()
+
+    def evict(self, max_keys):
+        self._conn.execute(
+            "DELETE FROM question_sets WHERE key NOT IN ("
+            "SELECT key FROM question_sets GROUP BY key ORDER BY MAX(last_used) DESC LIMIT ?)",
+            (max_keys,)
+        )
+        self._conn.commit()
+
+    def count(self):
+        keys, sets = self._conn.execute("SELECT COUNT(DISTINCT key), COUNT(*) FROM question_sets").fetchone()
+        return keys, sets
+
+class OfflineQuestionSets:
+    """Read-only question sets pre-built by bulk_questions.py, loaded into memory at startup.
+
+    The file uses the SQLiteBackend schema plus a bank_meta table recording its version, model and prompt.
+    """
+
+    def __init__(self, path):
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            self.meta = dict(conn.execute("SELECT key, value FROM bank_meta").fetchall())
+            self._sets = {}
+            for key, questions in conn.execute("SELECT key, questions FROM question_sets ORDER BY created_at"):
+                self._sets.setdefault(key, []).append(json.loads(questions))
+        finally:
+            conn.close()
+
+    def load(self, key):
+        return self._sets.get(key, [])
+
+    def count(self):
+        return len(self._sets), sum(len(sets) for sets in self._sets.values())
+
+class QuestionBank:
+    """Caches generated question sets per (tech stack, seniority band, position).
+
+    Each key collects up to `variants` distinct sets before lookups start hitting, and hits sample one of them
+    at random, so candidates with the same profile do not all see identical questions. Profiles covered by
+    the optional offline sets are always served from them, without expiry. Only complete sets of
+    `SET_SIZE` questions are stored.
+    """
+    SET_SIZE = 5
+
+    def __init__(self, backend=None, ttl=7 * 24 * 3600, max_keys=5000, variants=3, offline=None):
+        self.backend = backend or MemoryBackend()
+        self.offline = offline
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.variants = max(1, variants)
+        self.hits = 0
+        self.misses = 0
+        self._last_expiry = 0.0
+        self._lock = threading.Lock()
+
+    def _fresh_sets(self, key):
+        sets = self.backend.load(key)
+        if not self.ttl:
+            return sets
+        now = time.time()
+        if now - self._last_expiry > 60:
+            # Purge expired sets from the backend at most once a minute
+            self.backend.expire(now - self.ttl)
+            self._last_expiry = now
+        return [entry for entry in sets if entry[0] >= now - self.ttl]
+
+    def lookup(self, key, require_variety=True, count=True):
+        """Return a cached question set for the key, or None if more variety is still needed.
+
+        With require_variety=False any stored set is returned (used when generation is shed under overload).
+        With count=False the lookup is left out of the hit and miss counters, e.g. a second look at a key that
+        was just counted as a miss.
+        """
+        with self._lock:
+            offline_sets = self.offline.load(key) if self.offline is not None else None
+            if offline_sets:
+                self.hits += count
+                return list(random.choice(offline_sets))
+            sets = self._fresh_sets(key)
+            if not sets or (require_variety and len(sets) < self.variants):
+                self.misses += count
+                return None
+            self.hits += count
+            return list(random.choice(sets)[1])
+
+    def store(self, key, questions):
+        """Add a freshly generated question set to the bank; partial sets are ignored."""
+        if len(questions) != self.SET_SIZE:
+            return
+        with self._lock:
+            if self.offline is not None and self.offline.load(key):
+                return
+            if len(self._fresh_sets(key)) >= self.variants:
+                return
+            self.backend.add(key, list(questions), time.time())
+            self.backend.evict(self.max_keys)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        """Return cache metrics."""
+        with self._lock:
+            keys, sets = self.backend.count()
+        stats = {"hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate, "keys": keys, "sets": sets}
+        if self.offline is not None:
+            stats["offline_keys"], stats["offline_sets"] = self.offline.count()
+            stats["offline_version"] = self.offline.meta.get("version")
+        return stats
+
+def create_question_bank(path=None, ttl_hours=168, max_keys=5000, variants=3, offline_path=None):
+    """Create a question bank, persisted to SQLite when a path is given and backed by offline sets if built."""
+    backend = SQLiteBackend(path) if path else MemoryBackend()
+    offline = OfflineQuestionSets(offline_path) if offline_path else None
+    return QuestionBank(backend, ttl=ttl_hours * 3600, max_keys=max_keys, variants=variants, offline=offline)
@@ -0,0 +1,132 @@
+import time
+import torch
+from transformers import AutoTokenizer, AutoModel
+from generation import get_pipeline, render_prompt
+from budgets import run_with_budget
+from prefix_cache import next_token_logits
+from prompts import static_prefixes
+from scheduler import BatchedPipeline, PRIORITY_LIVE
+
+class LogitRelevanceScorer:
+    """Scores relevance as P("yes") from a single forward pass of the main model over the relevance prompt.
+
+    With the inference scheduler the pass is queued there at live priority like the chains' calls, so it
+    never runs on the shared model at the same time as a batch.
+    """
+    DEFAULT_LOW = 0.25
+    DEFAULT_HIGH = 0.75
+    # Qwen3 opens its answer with an (empty, in non-thinking mode) think block; score the token after it
+    ANSWER_START = "<think>\n\n</think>\n\n"
+
+    def __init__(self, relevance_chain):
+        self.chain = relevance_chain
+        pipe = get_pipeline(relevance_chain)
+        self.model = pipe.model
+        self.tokenizer = pipe.tokenizer
+        self.prefix_cache = getattr(pipe, "prefix_cache", None)
+        self.scheduler = pipe.scheduler if isinstance(pipe, BatchedPipeline) else None
+        # One bound method for the scheduler's batch key, so concurrent scores run in the same scheduler turn
+        self._forward = self._next_token_logits
+        self.prefix = static_prefixes([relevance_chain.prompt])[0]
+        self.yes_ids = self._first_token_ids(["yes", "Yes", " yes", " Yes"])
+        self.no_ids = self._first_token_ids(["no", "No", " no", " No"])
+
+    def _first_token_ids(self, words):
+        return sorted({self.tokenizer.encode(word, add_special_tokens=False)[0] for word in words})
+
+    def _next_token_logits(self, prompts, **kwargs):
+        """Next-token logits for each prompt, one forward pass after another; run as a scheduler job."""
+        entry = self.prefix_cache.get(self.prefix) if self.prefix_cache is not None else None
+        return [next_token_logits(self.model, self.tokenizer, prompt, entry) for prompt in prompts]
+
+    def score(self, current_question, query_text):
+        prompt = render_prompt(self.chain, {"current_question": current_question, "query_text": query_text})
+        prompt += self.ANSWER_START
+        if self.scheduler is not None:
+            logits = self.scheduler.submit(self._forward, prompt, priority=PRIORITY_LIVE).result()
+        else:
+            logits = self._forward([prompt])[0]
+        logits = logits.float()
+        yes = torch.logsumexp(logits[self.yes_ids], dim=0)
+        no = torch.logsumexp(logits[self.no_ids], dim=0)
+        return torch.sigmoid(yes - no).item()
+
+class EmbeddingRelevanceScorer:
+    """Scores relevance as the cosine similarity of sentence embeddings from a small encoder."""
+    DEFAULT_LOW = 0.2
+    DEFAULT_HIGH = 0.45
+
+    def __init__(self, model_name="sentence-transformers/all-MiniLM-L6-v2"):
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModel.from_pretrained(model_name)
+        self.model.eval()
+
+    def _embed(self, texts):
+        encoded = self.tokenizer(texts, padding=True, truncation=True, return_tensors="pt")
+        with torch.no_grad():
+            hidden = self.model(**encoded).last_hidden_state
+        mask = encoded["attention_mask"].unsqueeze(-1).float()
+        embeddings = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+        return torch.nn.functional.normalize(embeddings, dim=-1)
+
+    def score(self, current_question, query_text):
+        question, query = self._embed([current_question, query_text])
+        return float(question @ query)
+
+class RelevanceEngine:
+    """Decides whether a candidate query relates to the current question.
+
+    The fast scorer settles clear cases; scores between the low and high thresholds fall back to the
+    generative relevance chain.
+    """
+
+    def __init__(self, scorer, relevance_chain, low=None, high=None, generation_budgets=None):
+        self.scorer = scorer
+        self.chain = relevance_chain
+        self.generation_budgets = generation_budgets
+        self.low = scorer.DEFAULT_LOW if low is None else low
+        self.high = scorer.DEFAULT_HIGH if high is None else high
+        self.fast_decisions = 0
+        self.fallbacks = 0
+        self.total_seconds = 0.0
+
+    def is_relevant(self, current_question, query_text):
+        """Return (relevant, source) where source is "fast" or "llm"."""
+        start = time.perf_counter()
+        try:
+            score = self.scorer.score(current_question, query_text)
+            if score >= self.high or score <= self.low:
+                self.fast_decisions += 1
+                return score >= self.high, "fast"
+            self.fallbacks += 1
+            return llm_is_relevant(self.chain, current_question, query_text, self.generation_budgets), "llm"
+        finally:
+            self.total_seconds += time.perf_counter() - start
+
+    def stats(self):
+        """Return decision counters and average latency."""
+        calls = self.fast_decisions + self.fallbacks
+        return {
+            "fast_decisions": self.fast_decisions,
+            "fallbacks": self.fallbacks,
+            "avg_seconds": self.total_seconds / calls if calls else 0.0
+        }
+
+def llm_is_relevant(relevance_chain, current_question, query_text, generation_budgets=None):
+    """The original check: generate with the relevance chain and look for "yes"."""
+    response = run_with_budget("relevance_chain", relevance_chain, {
+        "current_question": current_question,
+        "query_text": query_text
+    }, generation_budgets).lower().strip()
+    return "yes" in response
+
+def create_relevance_engine(relevance_chain, mode="logits", embedding_model=None, low=None, high=None,
+                            generation_budgets=None):
+    """Build the relevance engine for the configured mode, or None to always use the LLM chain."""
+    if mode == "logits" and get_pipeline(relevance_chain) is not None:
+        scorer = LogitRelevanceScorer(relevance_chain)
+    elif mode == "embedding":
+        scorer = EmbeddingRelevanceScorer(embedding_model) if embedding_model else EmbeddingRelevanceScorer()
+    else:
+        return None
+    return RelevanceEngine(scorer, relevance_chain, low, high, generation_budgets)
@@ -0,0 +1,229 @@
+"""Assessment report rendering: wrapped text, code blocks, candidate data and sentiment summary.
+
+Bulk export of completed interviews from the session store, rendered in parallel worker processes:
+
+    python report.py --store sessions.sqlite3 --output-dir reports --workers 8
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO
+from xml.sax.saxutils import escape
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import KeepTogether, Paragraph, Preformatted, SimpleDocTemplate, Spacer, Table, TableStyle
+
+CANDIDATE_LABELS = (
+    ("full_name", "Name"),
+    ("email", "Email"),
+    ("phone", "Phone"),
+    ("years_experience", "Years of experience"),
+    ("desired_position", "Desired position"),
+    ("current_location", "Location"),
+    ("tech_stack", "Tech stack")
+)
+CODE_FENCE = re.compile(r"```[\w+#.-]*\n?(.*?)(?:```|$)", re.DOTALL)
+QUESTION_NUMBER = re.compile(r"^\d+\.\s*")
+
+STYLES = getSampleStyleSheet()
+BODY = ParagraphStyle("ReportBody", parent=STYLES["BodyText"], fontSize=10, leading=14)
+LABEL = ParagraphStyle("ReportLabel", parent=BODY, fontName="Helvetica-Bold")
+CODE = ParagraphStyle(
+    "ReportCode", parent=STYLES["Code"], fontSize=8, leading=10, backColor="#f4f4f4", borderPadding=4,
+    leftIndent=6, rightIndent=6, spaceBefore=4, spaceAfter=4
+)
+
+def report_data(state):
+    """Everything the report shows, as plain data that can be hashed and sent to worker processes."""
+    return {
+        "session_id": state.session_id,
+        "candidate_data": dict(state.candidate_data),
+        "questions": list(state.tech_questions),
+        "answers": list(state.answers),
+        "sentiment": state.events.sentiment_summary(),
+        "evaluations": list(state.evaluations)
+    }
+
+def fingerprint(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+def rich_text(text):
+    """Flowables for free text: paragraphs wrap to the page width and ``` fenced blocks become code blocks."""
+    flowables = []
+    position = 0
+    for match in CODE_FENCE.finditer(text):
+        flowables += _paragraphs(text[position:match.start()])
+        code = match.group(1).rstrip("\n")
+        if code:
+            flowables.append(Preformatted(code, CODE, maxLineLength=95, newLineChars="  "))
+        position = match.end()
+    flowables += _paragraphs(text[position:])
+    return flowables
+
+def _paragraphs(text):
+    return [
+        Paragraph(escape(block.strip()).replace("\n", "<br/>"), BODY)
+        for block in re.split(r"\n\s*\n", text) if block.strip()
+    ]
+
+def _candidate_table(candidate_data):
+    rows = []
+    for field, label in CANDIDATE_LABELS:
+        value = candidate_data.get(field)
+        if isinstance(value, list):
+            value = ", ".join(value)
+        if value:
+            rows.append([Paragraph(label, LABEL), Paragraph(escape(str(value)), BODY)])
+    if not rows:
+        return []
+    table = Table(rows, colWidths=[1.8 * inch, 4.7 * inch])
+    table.setStyle(TableStyle([("VALIGN", (0, 0), (-1, -1), "TOP"), ("BOTTOMPADDING", (0, 0), (-1, -1), 2)]))
+    return [Paragraph("Candidate", STYLES["Heading2"]), table]
+
+def _sentiment_section(sentiment):
+    if not sentiment or sentiment.get("mean") is None:
+        return []
+    mean = sentiment["mean"]
+    counts = sentiment["counts"]
+    tone = "Positive" if mean > 0.6 else "Negative" if mean < 0.4 else "Neutral"
+    summary = (
+        f"Positive responses: {counts.get('POSITIVE', 0)} &nbsp; Negative responses: {counts.get('NEGATIVE', 0)} "
+        f"&nbsp; Neutral responses: {counts.get('NEUTRAL', 0)}<br/>Average sentiment score: {mean:.2f} "
+        f"&nbsp; Overall tone: {tone}"
+    )
+    return [Paragraph("Sentiment Analysis", STYLES["Heading2"]), Paragraph(summary, BODY)]
+
+def _evaluation(evaluation):
+    if evaluation is None:
+        return []
+    score = "Not scored" if evaluation["score"] is None else f"{evaluation['score']:g}/10"
+    feedback = f" &nbsp; {escape(evaluation['feedback'])}" if evaluation.get("feedback") else ""
+    return [Paragraph(f"<b>Automatic score:</b> {score}{feedback}", BODY)]
+
+def render_report(data, target):
+    """Render the report for `data` (see report_data) into a file path or binary file object.
+
+    SimpleDocTemplate.build lays out the whole story and writes the finished PDF to the target before it
+    returns, so the report is held in memory while it is rendered.
+    """
+    doc = SimpleDocTemplate(
+        target, pagesize=letter, title="Technical Assessment", leftMargin=inch, rightMargin=inch,
+        topMargin=0.8 * inch, bottomMargin=0.8 * inch
+    )
+    story = [Paragraph("Technical Assessment", STYLES["Title"])]
+    story += _candidate_table(data.get("candidate_data") or {})
+    story += _sentiment_section(data.get("sentiment"))
+    story.append(Paragraph("Questions and Answers", STYLES["Heading2"]))
+    answers = data.get("answers") or []
+    evaluations = {evaluation["turn"]: evaluation for evaluation in data.get("evaluations") or []}
+    for i, question in enumerate(data.get("questions") or []):
+        heading = Paragraph(f"Question {i + 1}", STYLES["Heading3"])
+        story.append(KeepTogether([heading] + rich_text(QUESTION_NUMBER.sub("", question).strip())))
+        story.append(Paragraph("Answer", LABEL))
+        answer = rich_text(answers[i]) if i < len(answers) else []
+        story += answer or [Paragraph("<i>Not provided</i>", BODY)]
+        story += _evaluation(evaluations.get(i))
+        story.append(Spacer(1, 8))
+    doc.build(story)
+
+class ReportCache:
+    """Rendered PDFs per session, reused until the session's report data changes.
+
+    Streamlit reruns the closing screen on every interaction; with the cache the PDF is only rendered once
+    per version of the session's questions, answers and sentiment.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._reports = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, state):
+        """Return the PDF bytes for the session, rendering them only if its data changed."""
+        data = report_data(state)
+        key = fingerprint(data)
+        with self._lock:
+            cached = self._reports.get(state.session_id)
+            if cached is not None and cached[0] == key:
+                self._reports.move_to_end(state.session_id)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+        buffer = BytesIO()
+        render_report(data, buffer)
+        pdf = buffer.getvalue()
+        with self._lock:
+            self._reports[state.session_id] = (key, pdf)
+            self._reports.move_to_end(state.session_id)
+            while len(self._reports) > self.max_entries:
+                self._reports.popitem(last=False)
+        return pdf
+
+def _render_to_file(data, path):
+    # Runs in a worker process: write to a temporary name so readers never see a half-written PDF
+    partial = path + ".part"
+    render_report(data, partial)
+    os.replace(partial, path)
+    return path
+
+def export_sessions(store, output_dir, session_ids=None, workers=None, completed_only=True):
+    """Render the stored sessions to `output_dir`/<session_id>.pdf in parallel processes; returns a summary."""
+    os.makedirs(output_dir, exist_ok=True)
+    session_ids = list(session_ids) if session_ids else list(store.session_ids())
+    start = time.perf_counter()
+    written, failed, skipped = [], {}, 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for session_id in session_ids:
+            state, _ = store.load(session_id)
+            if state is None or (completed_only and state.stage != "closing"):
+                skipped += 1
+                continue
+            path = os.path.join(output_dir, f"{session_id}.pdf")
+            futures[executor.submit(_render_to_file, report_data(state), path)] = session_id
+        for future in as_completed(futures):
+            try:
+                written.append(future.result())
+            except Exception as exc:
+                failed[futures[future]] = str(exc)
+    elapsed = time.perf_counter() - start
+    return {
+        "written": len(written),
+        "failed": failed,
+        "skipped": skipped,
+        "seconds": round(elapsed, 2),
+        "reports_per_second": round(len(written) / elapsed, 2) if elapsed else 0.0
+    }
+
+def main():
+    from config import SESSION_STORE_URL, SESSION_TTL_HOURS
+    from session_store import create_session_store
+
+    parser = argparse.ArgumentParser(description="Render assessment reports of stored interviews to PDF files.")
+    parser.add_argument("session_ids", nargs="*", help="sessions to export (default: every stored session)")
+    parser.add_argument("--store", default=SESSION_STORE_URL, help="session store URL or SQLite path")
+    parser.add_argument("--output-dir", default="reports")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--all", action="store_true", help="include interviews that are not finished")
+    args = parser.parse_args()
+    if not args.store:
+        parser.error("no session store configured; pass --store")
+
+    store = create_session_store(args.store, SESSION_TTL_HOURS)
+    summary = export_sessions(store, args.output_dir, args.session_ids, args.workers, completed_only=not args.all)
+    print(json.dumps(summary, indent=2))
+    if summary["failed"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
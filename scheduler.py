@@ -0,0 +1,147 @@
+import threading
+import time
+from concurrent.futures import Future
+from queue import Queue, Empty
+
+# Request priorities: lower runs first. Background work (e.g. answer scoring) only starts a batch when no
+# interview turn is waiting, and never waits for more work to fill its batch
+PRIORITY_LIVE = 0
+PRIORITY_BACKGROUND = 1
+
+class _Request:
+    """A single prompt waiting for a slot in a batch."""
+    __slots__ = ("pipe", "prompt", "kwargs", "key", "priority", "future", "enqueued_at")
+
+    def __init__(self, pipe, prompt, kwargs, batchable=True, priority=PRIORITY_LIVE):
+        self.pipe = pipe
+        self.prompt = prompt
+        self.kwargs = kwargs
+        self.key = _batch_key(pipe, kwargs) if batchable else None
+        self.priority = priority
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+def _batch_key(pipe, kwargs):
+    """Requests can share a batch only if they use the same pipeline and generation settings."""
+    try:
+        return hash((id(pipe), tuple(sorted(kwargs.items()))))
+    except TypeError:
+        # Per-request objects (streamers, stopping criteria) cannot be shared across a batch
+        return None
+
+class InferenceScheduler:
+    """Collects prompts from concurrent sessions and runs them on the shared model in dynamic batches."""
+
+    def __init__(self, max_batch_size=8, max_wait=0.02):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self.batches_run = 0
+        self.requests_run = 0
+        self._queue = Queue()
+        self._deferred = []
+        self._thread = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+        self._thread.start()
+
+    def submit(self, pipe, prompt, batchable=True, priority=PRIORITY_LIVE, **kwargs):
+        """Queue a prompt for the given pipeline and return a Future with its pipeline output.
+
+        Requests with batchable=False always run in a batch of their own. Batches start with the oldest request
+        of the most urgent priority waiting.
+        """
+        request = _Request(pipe, prompt, kwargs, batchable, priority)
+        self._queue.put(request)
+        return request.future
+
+    def _drain(self):
+        while True:
+            try:
+                self._deferred.append(self._queue.get_nowait())
+            except Empty:
+                return
+
+    def _next_request(self):
+        self._drain()
+        if not self._deferred:
+            self._deferred.append(self._queue.get())
+            self._drain()
+        request = min(self._deferred, key=lambda request: (request.priority, request.enqueued_at))
+        self._deferred.remove(request)
+        return request
+
+    def _collect_batch(self):
+        """Gather requests compatible with the oldest one until the batch is full or max_wait expires."""
+        first = self._next_request()
+        batch = [first]
+        if first.key is None:
+            return batch
+
+        deferred = []
+        for request in self._deferred:
+            if request.key == first.key and len(batch) < self.max_batch_size:
+                batch.append(request)
+            else:
+                deferred.append(request)
+        self._deferred = deferred
+
+        deadline = first.enqueued_at + self.max_wait if first.priority == PRIORITY_LIVE else 0.0
+        while len(batch) < self.max_batch_size:
+            # Once the oldest request has waited max_wait, only take what is already queued
+            remaining = deadline - time.monotonic()
+            try:
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except Empty:
+                break
+            if request.key == first.key:
+                batch.append(request)
+            else:
+                self._deferred.append(request)
+        return batch
+
+    def _execute(self, batch):
+        prompts = [request.prompt for request in batch]
+        pipe, kwargs = batch[0].pipe, batch[0].kwargs
+        try:
+            # The tokenizer pads on the left, so prompts of different lengths decode side by side
+            outputs = pipe(prompts, batch_size=len(prompts), **kwargs)
+        except Exception as exc:
+            for request in batch:
+                request.future.set_exception(exc)
+            return
+        for request, output in zip(batch, outputs):
+            request.future.set_result(output)
+        self.batches_run += 1
+        self.requests_run += len(batch)
+
+    def _run(self):
+        while True:
+            batch = [request for request in self._collect_batch() if request.future.set_running_or_notify_cancel()]
+            if batch:
+                self._execute(batch)
+
+    def stats(self):
+        """Return batching counters for monitoring."""
+        return {
+            "batches_run": self.batches_run,
+            "requests_run": self.requests_run,
+            "avg_batch_size": self.requests_run / self.batches_run if self.batches_run else 0.0,
+            "queue_depth": self._queue.qsize() + len(self._deferred)
+        }
+
+class BatchedPipeline:
+    """Drop-in stand-in for a transformers pipeline that routes every call through an InferenceScheduler."""
+
+    def __init__(self, pipe, scheduler, batchable=True):
+        self.pipe = pipe
+        self.scheduler = scheduler
+        self.batchable = batchable
+
+    def __call__(self, inputs, **kwargs):
+        kwargs.pop("batch_size", None)
+        single = isinstance(inputs, str)
+        prompts = [inputs] if single else list(inputs)
+        futures = [self.scheduler.submit(self.pipe, prompt, self.batchable, **kwargs) for prompt in prompts]
+        results = [future.result() for future in futures]
+        return results[0] if single else results
+
+    def __getattr__(self, name):
+        return getattr(self.pipe, name)
@@ -0,0 +1,68 @@
+import threading
+import time
+from concurrent.futures import wait
+from scheduler import InferenceScheduler
+from instrumentation import instrumentation
+
+class SentimentWorker:
+    """Scores candidate messages off the request path, batching texts from all sessions into one pipeline call.
+
+    Results are written back to the session through HiringState.record_sentiment as they complete. Pending work
+    is keyed by session_id, and a result goes to the session's live state object: the one that last submitted
+    or was attached, e.g. a state reloaded from the session store after the queued one was evicted.
+    """
+
+    def __init__(self, sentiment_pipeline, max_batch_size=16, max_wait=0.05):
+        self.pipeline = sentiment_pipeline
+        self.scheduler = InferenceScheduler(max_batch_size, max_wait)
+        self._pending = {}  # session_id -> futures still being scored
+        self._states = {}  # session_id -> live state, while the session has pending work
+        self._lock = threading.Lock()
+
+    def submit(self, state, text, turn=None):
+        """Queue a message for scoring and return immediately."""
+        if len(text) < 3:
+            state.record_sentiment("NEUTRAL", 0.0, turn)
+            return
+        submitted = time.perf_counter()
+        future = self.scheduler.submit(self.pipeline, text, truncation=True)
+        with self._lock:
+            self._pending.setdefault(state.session_id, set()).add(future)
+            self._states[state.session_id] = state
+        future.add_done_callback(lambda done: self._finish(state.session_id, turn, done, submitted))
+
+    def attach(self, state):
+        """Make state the object that receives the session's pending results, if it has any."""
+        with self._lock:
+            if state.session_id in self._pending:
+                self._states[state.session_id] = state
+
+    def _finish(self, session_id, turn, future, submitted):
+        try:
+            result = future.result()
+            label, score = result['label'], float(result['score'])
+        except Exception:
+            label, score = "ERROR", 0.0
+        with self._lock:
+            state = self._states[session_id]
+            # Recorded under the lock so a concurrent attach() cannot leave the result on the replaced object
+            state.record_sentiment(label, score, turn)
+            pending = self._pending[session_id]
+            pending.discard(future)
+            if not pending:
+                del self._pending[session_id]
+                del self._states[session_id]
+        # Queueing plus batched inference, as seen by the session
+        instrumentation.observe("analyze_sentiment", time.perf_counter() - submitted, state, background=True)
+
+    def pending(self, state):
+        """Number of messages of this session still waiting to be scored."""
+        with self._lock:
+            return len(self._pending.get(state.session_id, ()))
+
+    def wait(self, state, timeout=None):
+        """Block until this session's queued messages are scored (used before showing the summary)."""
+        with self._lock:
+            futures = list(self._pending.get(state.session_id, ()))
+        if futures:
+            wait(futures, timeout)
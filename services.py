@@ -0,0 +1,86 @@
+from prompts import create_prompts, create_evaluation_prompt
+from conversation import handle_conversation
+from chains import create_chains, create_evaluation_chain
+from prefetch import QuestionPrefetcher
+from relevance import create_relevance_engine
+from sentiment_worker import SentimentWorker
+from evaluation import AnswerEvaluator, EvaluationCache
+from budgets import GenerationBudgets
+from admission import AdmissionController
+from config import (
+    QUESTION_PREFETCH_ENABLED, RELEVANCE_MODE, RELEVANCE_EMBEDDING_MODEL, RELEVANCE_LOW, RELEVANCE_HIGH,
+    SENTIMENT_ASYNC, SENTIMENT_MAX_BATCH_SIZE, SENTIMENT_MAX_WAIT_MS, EVALUATION_ENABLED, EVALUATION_CACHE_PATH,
+    EVALUATION_MAX_BATCH_SIZE, EVALUATION_MAX_WAIT_MS, EVALUATION_WORKERS, EVALUATION_MAX_NEW_TOKENS,
+    GENERATION_BUDGETS_ENABLED, BUDGET_PERCENTILE, BUDGET_HEADROOM, BUDGET_MIN_SAMPLES,
+    ADMISSION_ENABLED, ADMISSION_MAX_ACTIVE, ADMISSION_DEGRADE_DEPTH, ADMISSION_QUESTION_SLO_MS, ADMISSION_QUERY_SLO_MS
+)
+
+# Stages whose turns call a model; every other stage can be served while the models are still loading
+MODEL_STAGES = ("tech_stack_collection", "technical_interview")
+
+def build_services(info_llm, question_llm, sentiment_pipeline):
+    """Create the chains and shared model-backed services, keyed by handle_conversation's argument names."""
+    info_gathering_prompt, tech_question_prompt, closing_prompt, relevance_prompt, revision_prompt = create_prompts()
+    info_gathering_chain, tech_question_chain, closing_chain, relevance_chain, revision_chain = create_chains(
+        info_llm, question_llm, info_gathering_prompt, tech_question_prompt, closing_prompt, relevance_prompt, revision_prompt
+    )
+    # Adaptive max_new_tokens per chain, shared by every session
+    generation_budgets = GenerationBudgets(
+        BUDGET_PERCENTILE, BUDGET_HEADROOM, BUDGET_MIN_SAMPLES
+    ) if GENERATION_BUDGETS_ENABLED else None
+    return {
+        "tech_question_chain": tech_question_chain,
+        "relevance_chain": relevance_chain,
+        "revision_chain": revision_chain,
+        "sentiment_pipeline": sentiment_pipeline,
+        # Background warm-up of question generation
+        "prefetcher": QuestionPrefetcher(tech_question_chain) if QUESTION_PREFETCH_ENABLED else None,
+        # Fast relevance check for "query:" messages, falling back to relevance_chain for ambiguous scores
+        "relevance_engine": create_relevance_engine(
+            relevance_chain, RELEVANCE_MODE, RELEVANCE_EMBEDDING_MODEL, RELEVANCE_LOW, RELEVANCE_HIGH, generation_budgets
+        ),
+        # Background sentiment scoring
+        "sentiment_worker": SentimentWorker(
+            sentiment_pipeline, SENTIMENT_MAX_BATCH_SIZE, SENTIMENT_MAX_WAIT_MS / 1000
+        ) if SENTIMENT_ASYNC else None,
+        # Background scoring of the answers once a session closes
+        "answer_evaluator": AnswerEvaluator(
+            create_evaluation_chain(info_llm, create_evaluation_prompt()), EvaluationCache(EVALUATION_CACHE_PATH or None),
+            EVALUATION_MAX_BATCH_SIZE, EVALUATION_MAX_WAIT_MS / 1000, EVALUATION_WORKERS, EVALUATION_MAX_NEW_TOKENS
+        ) if EVALUATION_ENABLED else None,
+        "generation_budgets": generation_budgets,
+        # Global cap and fair queue for question generation and "query:" turns, with degraded modes under overload
+        "admission": create_admission_controller() if ADMISSION_ENABLED else None
+    }
+
+def create_admission_controller():
+    """Admission controller with the configured cap, shedding depth and queue-time SLOs."""
+    return AdmissionController(
+        ADMISSION_MAX_ACTIVE, ADMISSION_DEGRADE_DEPTH,
+        {"questions": ADMISSION_QUESTION_SLO_MS / 1000, "query": ADMISSION_QUERY_SLO_MS / 1000}
+    )
+
+def converse(user_input, state, services, on_evaluated=None, **kwargs):
+    """Run handle_conversation with the given services; missing ones are passed as None.
+
+    With a worker pool (worker_pool.WorkerPool.services()) the turn is routed to a model worker process instead.
+    Answers are scored in the background after the session closes, so the caller's save of the closing turn
+    comes too early for them: on_evaluated(state) is called from the evaluator's thread once they are recorded.
+    """
+    if services.get("worker_pool") is not None:
+        response, state = services["worker_pool"].converse(user_input, state, **kwargs)
+    else:
+        response, state = handle_conversation(
+            user_input, state, services.get("tech_question_chain"), services.get("relevance_chain"),
+            services.get("revision_chain"), services.get("sentiment_pipeline"),
+            prefetcher=services.get("prefetcher"), relevance_engine=services.get("relevance_engine"),
+            sentiment_worker=services.get("sentiment_worker"), answer_evaluator=services.get("answer_evaluator"),
+            generation_budgets=services.get("generation_budgets"), admission=services.get("admission"), **kwargs
+        )
+    answer_evaluator = services.get("answer_evaluator")
+    if on_evaluated is not None and answer_evaluator is not None and state.stage == "closing":
+        # The evaluation already queued by the closing turn, if it is still running
+        future = answer_evaluator.submit(state)
+        if future is not None:
+            future.add_done_callback(lambda done: on_evaluated(state))
+    return response, state
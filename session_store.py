@@ -0,0 +1,291 @@
+import fnmatch
+import json
+import sqlite3
+import threading
+import time
+from state import HiringState
+
+class LocalRedis:
+    """In-process stand-in for the subset of the Redis client API the session store uses.
+
+    Values are kept as strings, like a redis client with decode_responses=True.
+    """
+
+    def __init__(self):
+        self._hashes = {}
+        self._lists = {}
+        self._expiry = {}
+        self._lock = threading.Lock()
+
+    def _purge(self, key):
+        expires_at = self._expiry.get(key)
+        if expires_at is not None and expires_at <= time.time():
+            self._hashes.pop(key, None)
+            self._lists.pop(key, None)
+            del self._expiry[key]
+
+    def hset(self, name, mapping):
+        with self._lock:
+            self._purge(name)
+            self._hashes.setdefault(name, {}).update({field: str(value) for field, value in mapping.items()})
+            return len(mapping)
+
+    def hgetall(self, name):
+        with self._lock:
+            self._purge(name)
+            return dict(self._hashes.get(name, {}))
+
+    def rpush(self, name, *values):
+        with self._lock:
+            self._purge(name)
+            items = self._lists.setdefault(name, [])
+            items.extend(str(value) for value in values)
+            return len(items)
+
+    def lrange(self, name, start, end):
+        with self._lock:
+            self._purge(name)
+            items = self._lists.get(name, [])
+            end = len(items) if end == -1 else end + 1
+            return list(items[start:end])
+
+    def ltrim(self, name, start, end):
+        with self._lock:
+            if name in self._lists:
+                items = self._lists[name]
+                self._lists[name] = items[start:len(items) if end == -1 else end + 1]
+            return True
+
+    def expire(self, name, seconds):
+        with self._lock:
+            self._expiry[name] = time.time() + seconds
+            return True
+
+    def scan_iter(self, match="*"):
+        with self._lock:
+            for name in list(self._hashes) + list(self._lists):
+                self._purge(name)
+            names = set(self._hashes) | set(self._lists)
+        return iter(sorted(name for name in names if fnmatch.fnmatchcase(name, match)))
+
+    def delete(self, *names):
+        with self._lock:
+            removed = 0
+            for name in names:
+                removed += (self._hashes.pop(name, None) is not None) + (self._lists.pop(name, None) is not None)
+                self._expiry.pop(name, None)
+            return removed
+
+class SQLiteRedis:
+    """The same Redis command subset backed by a SQLite file, for single-host deployments without Redis."""
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS hashes (name TEXT NOT NULL, field TEXT NOT NULL, value TEXT NOT NULL, "
+            "PRIMARY KEY (name, field))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS lists (name TEXT NOT NULL, position INTEGER NOT NULL, value TEXT NOT NULL, "
+            "PRIMARY KEY (name, position))"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS expiry (name TEXT PRIMARY KEY, expires_at REAL NOT NULL)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def _purge(self, name):
+        row = self._conn.execute("SELECT expires_at FROM expiry WHERE name = ?", (name,)).fetchone()
+        if row is not None and row[0] <= time.time():
+            self._delete(name)
+
+    def _delete(self, name):
+        removed = self._conn.execute("DELETE FROM hashes WHERE name = ?", (name,)).rowcount > 0
+        removed += self._conn.execute("DELETE FROM lists WHERE name = ?", (name,)).rowcount > 0
+        self._conn.execute("DELETE FROM expiry WHERE name = ?", (name,))
+        return removed
+
+    def hset(self, name, mapping):
+        with self._lock:
+            self._purge(name)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO hashes (name, field, value) VALUES (?, ?, ?)",
+                [(name, field, str(value)) for field, value in mapping.items()]
+            )
+            self._conn.commit()
+            return len(mapping)
+
+    def hgetall(self, name):
+        with self._lock:
+            self._purge(name)
+            return dict(self._conn.execute("SELECT field, value FROM hashes WHERE name = ?", (name,)).fetchall())
+
+    def rpush(self, name, *values):
+        with self._lock:
+            self._purge(name)
+            last = self._conn.execute("SELECT MAX(position) FROM lists WHERE name = ?", (name,)).fetchone()[0]
+            start = -1 if last is None else last
+            self._conn.executemany(
+                "INSERT INTO lists (name, position, value) VALUES (?, ?, ?)",
+                [(name, start + 1 + i, str(value)) for i, value in enumerate(values)]
+            )
+            self._conn.commit()
+            return self._conn.execute("SELECT COUNT(*) FROM lists WHERE name = ?", (name,)).fetchone()[0]
+
+    def lrange(self, name, start, end):
+        with self._lock:
+            self._purge(name)
+            values = [row[0] for row in self._conn.execute(
+                "SELECT value FROM lists WHERE name = ? ORDER BY position", (name,)
+            )]
+        return values[start:len(values) if end == -1 else end + 1]
+
+    def ltrim(self, name, start, end):
+        with self._lock:
+            positions = [row[0] for row in self._conn.execute(
+                "SELECT position FROM lists WHERE name = ? ORDER BY position", (name,)
+            )]
+            keep = set(positions[start:len(positions) if end == -1 else end + 1])
+            self._conn.executemany(
+                "DELETE FROM lists WHERE name = ? AND position = ?",
+                [(name, position) for position in positions if position not in keep]
+            )
+            self._conn.commit()
+            return True
+
+    def expire(self, name, seconds):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO expiry (name, expires_at) VALUES (?, ?)", (name, time.time() + seconds)
+            )
+            self._conn.commit()
+            return True
+
+    def scan_iter(self, match="*"):
+        with self._lock:
+            names = [row[0] for row in self._conn.execute("SELECT name FROM hashes UNION SELECT name FROM lists")]
+            for name in names:
+                self._purge(name)
+            self._conn.commit()
+            names = [row[0] for row in self._conn.execute("SELECT name FROM hashes UNION SELECT name FROM lists")]
+        return iter(sorted(name for name in names if fnmatch.fnmatchcase(name, match)))
+
+    def delete(self, *names):
+        with self._lock:
+            removed = sum(self._delete(name) for name in names)
+            self._conn.commit()
+            return removed
+
+class SessionStore:
+    """Persists HiringState per session on any client with the Redis hash/list commands.
+
+    Scalar fields live in one hash per session and are only rewritten when they change; the event log,
+    sentiments and chat messages are append-only lists, so each save writes just the new entries.
+    """
+    FIELDS = ("session_id", "stage", "current_field_idx", "candidate_data", "tech_questions",
+              "current_question_idx", "answers", "evaluations", "memory")
+
+    def __init__(self, client, ttl=None, prefix="talentscout:session:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.writes = 0
+        self.bytes_written = 0
+        # Background results (answer scores) are saved from other threads than the session's turns
+        self._lock = threading.Lock()
+
+    def _key(self, session_id, part=""):
+        return f"{self.prefix}{session_id}{part}"
+
+    def save(self, state, messages=None):
+        """Write whatever changed since the state was last saved or loaded; `messages` are the UI chat messages."""
+        with self._lock:
+            self._save(state, messages)
+
+    def _save(self, state, messages):
+        persisted = state.persisted
+        fields = {}
+        for field in self.FIELDS:
+            value = state.memory_to_dict() if field == "memory" else getattr(state, field)
+            encoded = json.dumps(value)
+            if persisted.get(field) != encoded:
+                fields[field] = persisted[field] = encoded
+        aggregates = json.dumps(state.events.aggregates())
+        if persisted.get("event_aggregates") != aggregates:
+            fields["event_aggregates"] = persisted["event_aggregates"] = aggregates
+
+        appends = {}
+        # Events: only those logged since the last save (a bounded log may have dropped older unsaved ones)
+        new_events = min(state.events.total - persisted.get("events_total", 0), len(state.events))
+        if new_events > 0:
+            appends[":events"] = [json.dumps(row) for row in state.events.rows(last=new_events)]
+            persisted["events_total"] = state.events.total
+        for part, items in ((":sentiments", state.sentiments), (":messages", messages or [])):
+            saved = persisted.get(part, 0)
+            if len(items) > saved:
+                appends[part] = [json.dumps(item) for item in items[saved:]]
+                persisted[part] = len(items)
+
+        key = self._key(state.session_id)
+        if fields:
+            self.client.hset(key, mapping=fields)
+        for part, values in appends.items():
+            self.client.rpush(key + part, *values)
+            if part == ":events" and state.events.events.maxlen:
+                self.client.ltrim(key + part, -state.events.events.maxlen, -1)
+        if self.ttl and (fields or appends):
+            for name in (key, key + ":events", key + ":sentiments", key + ":messages"):
+                self.client.expire(name, self.ttl)
+        self.writes += bool(fields or appends)
+        self.bytes_written += sum(len(value) for value in fields.values())
+        self.bytes_written += sum(len(value) for values in appends.values() for value in values)
+
+    def load(self, session_id):
+        """Return (state, messages) for a stored session, or (None, []) if it is unknown or expired."""
+        key = self._key(session_id)
+        fields = self.client.hgetall(key)
+        if not fields:
+            return None, []
+        data = {field: json.loads(fields[field]) for field in self.FIELDS if field in fields}
+        events = json.loads(fields.get("event_aggregates", "{}"))
+        events["events"] = [json.loads(row) for row in self.client.lrange(key + ":events", 0, -1)]
+        data["events"] = events
+        data["sentiments"] = [json.loads(item) for item in self.client.lrange(key + ":sentiments", 0, -1)]
+        messages = [json.loads(item) for item in self.client.lrange(key + ":messages", 0, -1)]
+
+        state = HiringState.from_dict(data)
+        state.persisted = {field: fields[field] for field in self.FIELDS if field in fields}
+        state.persisted.update({
+            "event_aggregates": fields.get("event_aggregates"),
+            "events_total": state.events.total,
+            ":sentiments": len(state.sentiments),
+            ":messages": len(messages)
+        })
+        return state, messages
+
+    def delete(self, session_id):
+        key = self._key(session_id)
+        self.client.delete(key, key + ":events", key + ":sentiments", key + ":messages")
+
+    def session_ids(self):
+        """Yield the ids of all stored sessions."""
+        for key in self.client.scan_iter(match=f"{self.prefix}*"):
+            session_id = key[len(self.prefix):]
+            if ":" not in session_id:
+                yield session_id
+
+    def stats(self):
+        """Return write counters."""
+        return {"writes": self.writes, "bytes_written": self.bytes_written}
+
+def create_session_store(url=None, ttl_hours=72):
+    """Create a session store from a URL: redis://..., sqlite:///path, a plain file path, or "memory"."""
+    ttl = ttl_hours * 3600 if ttl_hours else None
+    if not url or url == "memory":
+        client = LocalRedis()
+    elif url.startswith(("redis://", "rediss://", "unix://")):
+        import redis
+        client = redis.Redis.from_url(url, decode_responses=True)
+    else:
+        client = SQLiteRedis(url[len("sqlite:///"):] if url.startswith("sqlite:///") else url)
+    return SessionStore(client, ttl)
@@ -0,0 +1,124 @@
+"""Warm-start snapshots: model weights saved once as a torch state dict and memory-mapped on every later start.
+
+A snapshot skips the checkpoint parsing and dtype conversion of from_pretrained. The weights are mapped
+read-only from the page cache rather than copied into each process, so worker processes on one host share
+the same physical pages. Layout, per model under TALENTSCOUT_SNAPSHOT_DIR:
+
+    <model name with / as -->/config.json, tokenizer files, generation_config.json
+    <model name with / as -->/weights-<dtype>.pt
+
+Build them ahead of a deployment (otherwise the first start builds them):
+
+    python snapshot.py --backend cpu-int8
+"""
+import argparse
+import fcntl
+import json
+import os
+import time
+import torch
+from transformers import (
+    AutoConfig, AutoModelForCausalLM, AutoModelForSequenceClassification, AutoTokenizer, GenerationConfig
+)
+
+AUTO_CLASSES = {"causal-lm": AutoModelForCausalLM, "sequence-classification": AutoModelForSequenceClassification}
+
+def snapshot_path(root, model_name):
+    return os.path.join(root, model_name.replace("/", "--"))
+
+def _weights_file(path, dtype):
+    return os.path.join(path, f"weights-{str(dtype).replace('torch.', '')}.pt")
+
+def has_snapshot(root, model_name, dtype):
+    return os.path.exists(_weights_file(snapshot_path(root, model_name), dtype))
+
+def save_snapshot(model, tokenizer, root, model_name, task="causal-lm"):
+    """Write the model's config, tokenizer and dense weights; the weights file appears atomically when complete."""
+    path = snapshot_path(root, model_name)
+    os.makedirs(path, exist_ok=True)
+    model.config.save_pretrained(path)
+    if getattr(model, "generation_config", None) is not None and task == "causal-lm":
+        model.generation_config.save_pretrained(path)
+    if tokenizer is not None:
+        tokenizer.save_pretrained(path)
+    dtype = next(model.parameters()).dtype
+    target = _weights_file(path, dtype)
+    partial = target + ".part"
+    # Tensors that share storage (tied embeddings) are written once
+    torch.save(model.state_dict(), partial)
+    os.replace(partial, target)
+    with open(os.path.join(path, "snapshot.json"), "w") as f:
+        json.dump({"model": model_name, "task": task, "torch": torch.__version__, "created_at": time.time()}, f)
+    return target
+
+def load_snapshot(root, model_name, dtype, task="causal-lm"):
+    """Build the model on the meta device and attach the memory-mapped weights without copying them."""
+    from accelerate import init_empty_weights
+    path = snapshot_path(root, model_name)
+    config = AutoConfig.from_pretrained(path)
+    # Parameters are created on the meta device; buffers that are not saved (e.g. rotary frequencies) are real
+    with init_empty_weights(include_buffers=False):
+        model = AUTO_CLASSES[task].from_config(config, torch_dtype=dtype)
+    state_dict = torch.load(_weights_file(path, dtype), mmap=True, weights_only=True, map_location="cpu")
+    model.load_state_dict(state_dict, assign=True)
+    model.tie_weights()
+    if os.path.exists(os.path.join(path, "generation_config.json")):
+        # from_config only sets library defaults; keep the checkpoint's sampling defaults (e.g. Qwen3's top_k)
+        model.generation_config = GenerationConfig.from_pretrained(path)
+    return model.eval()
+
+def load_snapshot_tokenizer(root, model_name, **kwargs):
+    """The tokenizer saved with the model's snapshot, or None if there is none."""
+    path = snapshot_path(root, model_name)
+    if not os.path.exists(os.path.join(path, "tokenizer_config.json")):
+        return None
+    return AutoTokenizer.from_pretrained(path, **kwargs)
+
+def load_dense(root, model_name, dtype, task="causal-lm"):
+    """Dense CPU weights through the snapshot, building it from the hub checkpoint on first use.
+
+    Worker processes starting together take a lock on the snapshot directory, so one builds it and the
+    others wait and map the result.
+    """
+    if not has_snapshot(root, model_name, dtype):
+        path = snapshot_path(root, model_name)
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if not has_snapshot(root, model_name, dtype):
+                model = AUTO_CLASSES[task].from_pretrained(model_name, torch_dtype=dtype, low_cpu_mem_usage=True)
+                save_snapshot(model, AutoTokenizer.from_pretrained(model_name), root, model_name, task)
+                # Drop the private copy and continue from the shared mapping like every later start
+                del model
+    return load_snapshot(root, model_name, dtype, task)
+
+def main():
+    from config import SNAPSHOT_DIR, MODEL_NAME, DRAFT_MODEL_NAME, SENTIMENT_MODEL_NAME, MODEL_BACKEND
+    from model import SNAPSHOT_DTYPES
+
+    parser = argparse.ArgumentParser(description="Build the warm-start snapshots for the configured models.")
+    parser.add_argument("--dir", default=SNAPSHOT_DIR or "snapshots", help="snapshot root (default: TALENTSCOUT_SNAPSHOT_DIR)")
+    parser.add_argument("--backend", default=MODEL_BACKEND, choices=sorted(SNAPSHOT_DTYPES))
+    parser.add_argument("--draft", action="store_true", help="also snapshot the speculative-decoding draft model")
+    args = parser.parse_args()
+
+    dtype = SNAPSHOT_DTYPES[args.backend]
+    models = [(MODEL_NAME, "causal-lm", dtype), (SENTIMENT_MODEL_NAME, "sequence-classification", torch.float32)]
+    if args.draft:
+        models.append((DRAFT_MODEL_NAME, "causal-lm", dtype))
+    report = []
+    for model_name, task, model_dtype in models:
+        start = time.perf_counter()
+        built = not has_snapshot(args.dir, model_name, model_dtype)
+        load_dense(args.dir, model_name, model_dtype, task)
+        report.append({
+            "model": model_name,
+            "dtype": str(model_dtype).replace("torch.", ""),
+            "built": built,
+            "seconds": round(time.perf_counter() - start, 1),
+            "path": _weights_file(snapshot_path(args.dir, model_name), model_dtype)
+        })
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
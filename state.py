@@ -1,6 +1,17 @@
 from langchain.memory import ConversationBufferMemory
 import re
 import json
+import uuid
+from memory import BoundedConversationMemory
+from events import EventLog
+from config import (
+    MEMORY_MODE, MEMORY_WINDOW, MEMORY_MAX_BYTES, MEMORY_SUMMARY_CHARS, CONVERSATION_LOG_MAX_ENTRIES,
+    CONVERSATION_LOG_MAX_CHARS
+)
+
+EMAIL_PATTERN = re.compile(r"[^@]+@[^@]+\.[^@]+")
+PHONE_PATTERN = re.compile(r"^\+?[0-9\s\-\(\)]{7,}$")
+YEARS_PATTERN = re.compile(r"^\d+$")
 
 class HiringState:
     """Manages the state of the hiring conversation."""
@@ -31,9 +42,9 @@ class HiringState:
         "tech_stack": "Please list your technical skills (comma-separated):"
     }
     FIELD_VALIDATORS = {
-        "email": lambda x: re.match(r"[^@]+@[^@]+\.[^@]+", x) is not None,
-        "phone": lambda x: re.match(r"^\+?[0-9\s\-\(\)]{7,}$", x) is not None,
-        "years_experience": lambda x: re.match(r"^\d+$", x) is not None
+        "email": lambda x: EMAIL_PATTERN.match(x) is not None,
+        "phone": lambda x: PHONE_PATTERN.match(x) is not None,
+        "years_experience": lambda x: YEARS_PATTERN.match(x) is not None
     }
     FIELD_ERRORS = {
         "email": "Please enter a valid email address (e.g., name@example.com).",
@@ -46,15 +57,25 @@ class HiringState:
 
     def reset(self):
         """Reset the conversation state to initial values."""
+        self.session_id = uuid.uuid4().hex
         self.stage = "greeting"
         self.current_field_idx = 0
         self.candidate_data = {field: None for field in self.FIELDS}
         self.candidate_data["tech_stack"] = None
         self.tech_questions = []
         self.current_question_idx = 0
-        self.memory = ConversationBufferMemory()
-        self.conversation_log = []
+        if MEMORY_MODE == "bounded":
+            self.memory = BoundedConversationMemory(MEMORY_WINDOW, MEMORY_MAX_BYTES, MEMORY_SUMMARY_CHARS)
+            self.events = EventLog(maxlen=CONVERSATION_LOG_MAX_ENTRIES)
+        else:
+            self.memory = ConversationBufferMemory()
+            self.events = EventLog()
         self.answers = []  # Added to store user answers to technical questions
+        self.question_prefetch = None  # Background warm-up of question generation (see prefetch.py)
+        self.sentiments = []  # Sentiment results, possibly written by the background SentimentWorker
+        self.evaluations = []  # Answer scores, written by the background AnswerEvaluator after closing
+        self.trace = []  # Timed operations and cache events, recorded when instrumentation is enabled
+        self.persisted = {}  # What the session store has already written (see session_store.py)
 
     def get_current_field(self):
         """Get the current field being collected."""
@@ -75,17 +96,111 @@ class HiringState:
             return True
         return False
 
-    def log_interaction(self, message):
+    @property
+    def conversation_log(self):
+        """The logged messages as a list of strings, as before the typed event log."""
+        return self.events.texts()
+
+    @property
+    def interaction_count(self):
+        """Total logged events, including any the bounded log has dropped."""
+        return self.events.total
+
+    def log_interaction(self, message, kind="note", **fields):
         """Log an interaction in the conversation."""
-        self.conversation_log.append(message)
+        if MEMORY_MODE == "bounded" and len(message) > CONVERSATION_LOG_MAX_CHARS:
+            message = message[:CONVERSATION_LOG_MAX_CHARS] + "..."
+        self.events.append(kind, self.stage, message, **fields)
+
+    def record_sentiment(self, label, score, turn=None):
+        """Store the sentiment of a candidate message."""
+        self.sentiments.append({"turn": turn, "label": label, "score": score})
+        self.log_interaction(f"Sentiment: {label} ({score:.2f})", "sentiment", label=label, score=score)
+
+    def record_evaluation(self, turn, score, feedback, cached=False):
+        """Store the automatic score (0-10, or None if scoring failed) of the answer to question `turn`."""
+        self.evaluations.append({"turn": turn, "score": score, "feedback": feedback, "cached": cached})
+        self.evaluations.sort(key=lambda evaluation: evaluation["turn"])
+        shown = "unscored" if score is None else f"{score:g}/10"
+        self.log_interaction(f"Evaluation of answer {turn + 1}: {shown}", "evaluation", score=score)
+
+    def evaluation_summary(self):
+        """Scored answers and their mean score, or None before any answer is scored."""
+        scores = [evaluation["score"] for evaluation in self.evaluations if evaluation["score"] is not None]
+        if not scores:
+            return None
+        return {"scored": len(scores), "mean": sum(scores) / len(scores)}
+
+    def memory_footprint(self):
+        """Approximate per-session memory use in bytes of UTF-8 text, by component."""
+        if isinstance(self.memory, BoundedConversationMemory):
+            memory_bytes = self.memory.nbytes
+        else:
+            memory_bytes = len(self.memory.buffer.encode())
+        footprint = {
+            "memory_bytes": memory_bytes,
+            "log_entries": len(self.events),
+            "log_bytes": sum(len(event.text.encode()) for event in self.events),
+            "questions_bytes": sum(len(question.encode()) for question in self.tech_questions),
+            "answers_bytes": sum(len(answer.encode()) for answer in self.answers),
+            "trace_entries": len(self.trace)
+        }
+        footprint["total_bytes"] = sum(value for key, value in footprint.items() if key.endswith("_bytes"))
+        return footprint
+
+    def memory_to_dict(self):
+        """Serialize the conversation memory for either memory mode."""
+        if isinstance(self.memory, BoundedConversationMemory):
+            return {"mode": "bounded", **self.memory.to_dict()}
+        return {"mode": "buffer", "messages": [[message.type, message.content] for message in self.memory.chat_memory.messages]}
+
+    @staticmethod
+    def memory_from_dict(data):
+        """Rebuild a conversation memory written by memory_to_dict."""
+        if data["mode"] == "bounded":
+            return BoundedConversationMemory.from_dict(data)
+        memory = ConversationBufferMemory()
+        for message_type, content in data["messages"]:
+            if message_type == "human":
+                memory.chat_memory.add_user_message(content)
+            else:
+                memory.chat_memory.add_ai_message(content)
+        return memory
 
     def to_dict(self):
         """Convert the state to a dictionary for debugging or storage."""
         return {
+            "session_id": self.session_id,
             "stage": self.stage,
             "current_field": self.get_current_field(),
+            "current_field_idx": self.current_field_idx,
             "candidate_data": self.candidate_data,
             "tech_questions": self.tech_questions,
             "current_question_idx": self.current_question_idx,
-            "answers": self.answers  
-        }
\ No newline at end of file
+            "answers": self.answers,
+            "sentiments": self.sentiments,
+            "evaluations": self.evaluations,
+            "trace": self.trace,
+            "events": self.events.to_dict(),
+            "memory": self.memory_to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a state from to_dict() output, e.g. to resume an interview after a restart."""
+        state = cls()
+        state.session_id = data["session_id"]
+        state.stage = data["stage"]
+        state.current_field_idx = data["current_field_idx"]
+        state.candidate_data = dict(data["candidate_data"])
+        state.tech_questions = list(data["tech_questions"])
+        state.current_question_idx = data["current_question_idx"]
+        state.answers = list(data["answers"])
+        state.sentiments = list(data.get("sentiments", []))
+        state.evaluations = list(data.get("evaluations", []))
+        state.trace = list(data.get("trace", []))
+        if "events" in data:
+            state.events = EventLog.from_dict(data["events"])
+        if "memory" in data:
+            state.memory = state.memory_from_dict(data["memory"])
+        return state
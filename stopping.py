@@ -0,0 +1,67 @@
+from transformers import StoppingCriteria
+from utils import QuestionStreamParser
+
+class QuestionStoppingCriteria(StoppingCriteria):
+    """Ends question generation once five complete questions are decoded or a <think> block runs over budget.
+
+    A call may see several new tokens at once (speculative decoding accepts a run of draft tokens per step), so
+    every call decodes and counts everything appended since the previous one. prompt_length, the number of
+    prompt tokens, marks where the output starts; without it the first call is assumed to follow one new token.
+    """
+
+    def __init__(self, tokenizer, limit=5, think_budget=384, max_new_tokens=1024, prompt_length=None):
+        self.tokenizer = tokenizer
+        self.think_budget = think_budget
+        self.max_new_tokens = max_new_tokens
+        self.parser = QuestionStreamParser(limit=limit, numbered_prompt=True)
+        self.tokens_generated = 0
+        self.think_tokens = 0
+        self.stop_reason = None
+        self._prompt_length = prompt_length
+        self._decoded_upto = prompt_length or 0
+        self._in_think = False
+        self._tail = ""
+
+    def __call__(self, input_ids, scores, **kwargs):
+        if self._prompt_length is None:
+            # First call happens right after the first new token is appended
+            self._prompt_length = input_ids.shape[1] - 1
+            self._decoded_upto = self._prompt_length
+        self.tokens_generated = input_ids.shape[1] - self._prompt_length
+
+        text = self.tokenizer.decode(input_ids[0, self._decoded_upto:], skip_special_tokens=False)
+        if text.endswith("\ufffd"):
+            # Incomplete multi-byte character; wait for the next token
+            return False
+        new_tokens = input_ids.shape[1] - self._decoded_upto
+        self._decoded_upto = input_ids.shape[1]
+        self.parser.feed(text)
+
+        # Keep a short tail so tags split across tokens are still recognised
+        self._tail = (self._tail + text)[-16:]
+        if "think>" in self._tail:
+            self._in_think = self._tail.rfind("<think>") > self._tail.rfind("</think>")
+        if self._in_think:
+            self.think_tokens += new_tokens
+
+        if self.parser.done:
+            self.stop_reason = "questions_complete"
+        elif self.think_budget and self.think_tokens > self.think_budget:
+            self.stop_reason = "think_budget"
+        return self.stop_reason is not None
+
+    @property
+    def tokens_saved(self):
+        """Number of new tokens the model did not have to generate thanks to the early stop."""
+        if self.stop_reason is None:
+            return 0
+        return max(0, self.max_new_tokens - self.tokens_generated)
+
+    def report(self):
+        """Summarize the call for logging."""
+        return {
+            "stop_reason": self.stop_reason or "max_tokens_or_eos",
+            "tokens_generated": self.tokens_generated,
+            "think_tokens": self.think_tokens,
+            "tokens_saved": self.tokens_saved
+        }
@@ -0,0 +1,99 @@
+import threading
+import time
+from admission import AdmissionController
+
+class Session:
+    """The parts of HiringState the controller uses."""
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.log = []
+
+    def log_interaction(self, message, kind=None):
+        self.log.append((kind, message))
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+def test_admits_immediately_below_the_cap():
+    controller = AdmissionController(max_active=2)
+    with controller.admit(Session("a"), "questions") as first, controller.admit(Session("b"), "questions") as second:
+        assert first.granted and second.granted
+        assert controller.stats()["active"] == 2
+    stats = controller.stats()
+    assert stats["active"] == 0
+    assert stats["admitted"] == 2
+    assert stats["operations"] == {"questions": {"admitted": 2, "degraded": 0}}
+
+def test_sheds_on_arrival_beyond_degrade_depth():
+    controller = AdmissionController(max_active=1, degrade_depth=0)
+    session = Session("b")
+    with controller.admit(Session("a"), "query"):
+        ticket = controller.admit(session, "query")
+    assert ticket.degraded and not ticket.granted
+    assert ticket.reason == "queue_depth"
+    assert controller.stats()["shed"] == {"queue_depth": 1, "slo": 0}
+    assert session.log and session.log[0][0] == "admission"
+
+def test_sheds_once_the_slo_expires():
+    controller = AdmissionController(max_active=1, slos={"query": 0.05}, poll=0.01)
+    with controller.admit(Session("a"), "query"):
+        ticket = controller.admit(Session("b"), "query")
+    assert ticket.degraded
+    assert ticket.reason == "slo"
+    assert ticket.waited >= 0.05
+    stats = controller.stats()
+    assert stats["waiting"] == 0
+    assert stats["operations"]["query"] == {"admitted": 1, "degraded": 1}
+
+def test_slots_are_handed_out_round_robin_across_sessions():
+    controller = AdmissionController(max_active=1, slos={"questions": 5.0}, poll=0.01)
+    order = []
+    lock = threading.Lock()
+
+    def call(session, name):
+        with controller.admit(session, "questions"):
+            with lock:
+                order.append(name)
+
+    a, b = Session("a"), Session("b")
+    holder = controller.admit(Session("holder"), "questions")
+    threads = []
+    for session, name in ((a, "a1"), (a, "a2"), (b, "b1")):
+        thread = threading.Thread(target=call, args=(session, name))
+        thread.start()
+        threads.append(thread)
+        wait_until(lambda: controller.stats()["waiting"] == len(threads))
+    assert controller.position("a") == 1
+    assert controller.position("b") == 2
+    holder.__exit__(None, None, None)
+    for thread in threads:
+        thread.join(2)
+    # Session a had two calls in line but could not take both slots before b
+    assert order == ["a1", "b1", "a2"]
+
+def test_on_queue_reports_the_place_in_line_then_zero():
+    controller = AdmissionController(max_active=1, slos={"query": 5.0}, poll=0.01)
+    positions = []
+    holder = controller.admit(Session("holder"), "query")
+    thread = threading.Thread(target=lambda: controller.admit(Session("a"), "query", positions.append).__exit__())
+    thread.start()
+    wait_until(lambda: positions)
+    holder.__exit__(None, None, None)
+    thread.join(2)
+    assert positions == [1, 0]
+    assert controller.stats()["active"] == 0
+
+def test_overloaded_tracks_the_queue_depth():
+    controller = AdmissionController(max_active=1, degrade_depth=1, slos={"query": 5.0}, poll=0.01)
+    holder = controller.admit(Session("holder"), "query")
+    assert not controller.overloaded
+    thread = threading.Thread(target=lambda: controller.admit(Session("a"), "query").__exit__())
+    thread.start()
+    wait_until(lambda: controller.overloaded)
+    holder.__exit__(None, None, None)
+    thread.join(2)
+    assert not controller.overloaded
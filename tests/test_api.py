@@ -0,0 +1,44 @@
+import asyncio
+from http import HTTPStatus
+import pytest
+
+# api imports the conversation services, which need the app's dependencies (langchain, transformers)
+api = pytest.importorskip("api")
+
+def parse(raw, max_body_bytes=1024):
+    async def read():
+        reader = asyncio.StreamReader()
+        reader.feed_data(raw)
+        reader.feed_eof()
+        return await api.read_request(reader, max_body_bytes)
+    return asyncio.run(read())
+
+def parse_error(raw, max_body_bytes=1024):
+    with pytest.raises(api.ApiError) as error:
+        parse(raw, max_body_bytes)
+    return error.value.status
+
+def test_get_request_keeps_the_connection_alive():
+    assert parse(b"GET /health HTTP/1.1\r\nHost: localhost\r\n\r\n") == ("GET", "/health", b"", True)
+
+def test_post_body_is_read_by_content_length_and_the_query_is_dropped():
+    raw = b'POST /sessions/abc/messages?x=1 HTTP/1.1\r\nContent-Length: 17\r\n\r\n{"message": "hi"}extra'
+    assert parse(raw) == ("POST", "/sessions/abc/messages", b'{"message": "hi"}', True)
+
+def test_connection_close_and_http_1_0_end_the_connection():
+    assert parse(b"GET / HTTP/1.1\r\nConnection: close\r\n\r\n")[3] is False
+    assert parse(b"GET / HTTP/1.0\r\n\r\n")[3] is False
+
+def test_closed_connection_returns_none():
+    assert parse(b"") is None
+
+def test_malformed_request_line_is_rejected():
+    assert parse_error(b"GET\r\n\r\n") == HTTPStatus.BAD_REQUEST
+
+@pytest.mark.parametrize("length", [b"abc", b"-1", b"1.5"])
+def test_invalid_content_length_is_rejected(length):
+    assert parse_error(b"POST /sessions HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n") == HTTPStatus.BAD_REQUEST
+
+def test_oversized_body_is_rejected_before_reading_it():
+    raw = b"POST /sessions HTTP/1.1\r\nContent-Length: 2048\r\n\r\n"
+    assert parse_error(raw, max_body_bytes=1024) == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
@@ -0,0 +1,71 @@
+import time
+from question_bank import QuestionBank, MemoryBackend, SQLiteBackend, question_bank_key, create_question_bank
+
+def question_set(tag):
+    return [f"{number}. {tag} question {number}?" for number in range(1, 6)]
+
+def test_key_normalizes_stack_experience_and_position():
+    first = question_bank_key({"tech_stack": ["Py", "postgres", " React.js "], "years_experience": "3",
+                               "desired_position": "Sr Backend Dev"})
+    second = question_bank_key({"tech_stack": ["react", "Python3", "PostgreSQL", "python"], "years_experience": 2,
+                                "desired_position": "senior back-end developer"})
+    assert first == second
+    assert first.startswith("postgresql,python,react|mid|")
+
+def test_lookups_miss_until_enough_variants_are_stored():
+    bank = QuestionBank(variants=2)
+    bank.store("k", question_set("a"))
+    assert bank.lookup("k") is None
+    bank.store("k", question_set("b"))
+    assert bank.lookup("k") in (question_set("a"), question_set("b"))
+    assert (bank.hits, bank.misses) == (1, 1)
+    # A full key collects no further variants
+    bank.store("k", question_set("c"))
+    assert bank.stats()["sets"] == 2
+
+def test_partial_sets_are_not_stored():
+    bank = QuestionBank(variants=1)
+    bank.store("k", question_set("a")[:3])
+    assert bank.lookup("k", require_variety=False) is None
+    assert bank.stats()["sets"] == 0
+
+def test_degraded_lookup_serves_any_set_without_counting():
+    bank = QuestionBank(variants=3)
+    bank.store("k", question_set("a"))
+    assert bank.lookup("k") is None
+    assert bank.lookup("k", require_variety=False, count=False) == question_set("a")
+    assert (bank.hits, bank.misses) == (0, 1)
+
+def test_expired_sets_are_not_served():
+    bank = QuestionBank(ttl=60, variants=1)
+    bank.backend.add("old", question_set("a"), time.time() - 120)
+    bank.store("new", question_set("b"))
+    assert bank.lookup("old", require_variety=False) is None
+    assert bank.lookup("new") == question_set("b")
+
+def test_least_recently_used_keys_are_evicted():
+    bank = QuestionBank(MemoryBackend(), max_keys=2, variants=1)
+    bank.store("a", question_set("a"))
+    bank.store("b", question_set("b"))
+    assert bank.lookup("a") is not None
+    bank.store("c", question_set("c"))
+    assert bank.lookup("b") is None
+    assert bank.lookup("a") is not None
+    assert bank.stats()["keys"] == 2
+
+def test_sqlite_backend_survives_a_restart(tmp_path):
+    path = str(tmp_path / "bank.sqlite3")
+    create_question_bank(path, variants=1).store("k", question_set("a"))
+    bank = create_question_bank(path, variants=1)
+    assert bank.lookup("k") == question_set("a")
+    assert isinstance(bank.backend, SQLiteBackend)
+
+def test_sqlite_backend_evicts_by_last_use(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "bank.sqlite3"))
+    now = time.time()
+    backend.add("a", question_set("a"), now - 30)
+    backend.add("b", question_set("b"), now - 20)
+    backend.load("a")
+    backend.evict(1)
+    assert backend.count() == (1, 1)
+    assert backend.load("b") == []
@@ -0,0 +1,60 @@
+from utils import QuestionStreamParser, extract_questions
+
+QUESTIONS = [f"How would you design component number {number} for scale?" for number in range(1, 7)]
+
+def numbered(questions):
+    return "".join(f"{number}. {question}\n" for number, question in enumerate(questions, 1))
+
+def test_questions_are_emitted_as_their_lines_complete():
+    parser = QuestionStreamParser()
+    text = numbered(QUESTIONS[:2])
+    first_line_end = text.index("\n")
+    assert parser.feed(text[:first_line_end]) == []
+    emitted = []
+    for start in range(first_line_end, len(text), 7):
+        emitted += parser.feed(text[start:start + 7])
+    assert emitted == [f"1. {QUESTIONS[0]}", f"2. {QUESTIONS[1]}"]
+
+def test_parsing_stops_at_the_limit():
+    parser = QuestionStreamParser(limit=5)
+    emitted = parser.feed(numbered(QUESTIONS))
+    assert len(emitted) == 5
+    assert parser.done
+    assert parser.feed(numbered(QUESTIONS)) == []
+
+def test_questions_are_renumbered_in_order():
+    parser = QuestionStreamParser()
+    parser.feed(f"3. {QUESTIONS[0]}\n7) {QUESTIONS[1]}\n")
+    assert parser.questions == [f"1. {QUESTIONS[0]}", f"2. {QUESTIONS[1]}"]
+
+def test_think_blocks_and_chat_markup_are_skipped_across_lines():
+    parser = QuestionStreamParser()
+    parser.feed("<think>\n1. What should I ask about databases here?\nstill thinking\n</think>\n")
+    parser.feed(f"<|im_start|>assistant\n1. {QUESTIONS[0]}<|im_end|>\n")
+    assert parser.questions == [f"1. {QUESTIONS[0]}"]
+
+def test_echoed_user_turns_are_skipped():
+    parser = QuestionStreamParser()
+    parser.feed("<|im_start|>user\n1. Is this the prompt being echoed back?\n<|im_end|>\n")
+    parser.feed(f"1. {QUESTIONS[0]}\n")
+    assert parser.questions == [f"1. {QUESTIONS[0]}"]
+
+def test_short_lines_and_lines_without_a_question_are_ignored():
+    parser = QuestionStreamParser()
+    parser.feed("1. Too short?\n2. This line is long enough but asks nothing.\nHere are your questions:\n")
+    assert parser.questions == []
+
+def test_numbered_prompt_accepts_an_unnumbered_first_line_only():
+    parser = QuestionStreamParser(numbered_prompt=True)
+    parser.feed(f"{QUESTIONS[0]}\n{QUESTIONS[1]}\n2. {QUESTIONS[2]}\n")
+    assert parser.questions == [f"1. {QUESTIONS[0]}", f"2. {QUESTIONS[2]}"]
+
+def test_close_parses_the_trailing_line():
+    parser = QuestionStreamParser()
+    parser.feed(f"1. {QUESTIONS[0]}")
+    assert parser.questions == []
+    assert parser.close() == [f"1. {QUESTIONS[0]}"]
+
+def test_extract_questions_falls_back_to_inline_numbering():
+    text = " ".join(f"{number}. {question}" for number, question in enumerate(QUESTIONS[:5], 1))
+    assert extract_questions(text) == [f"{number}. {question}" for number, question in enumerate(QUESTIONS[:5], 1)]
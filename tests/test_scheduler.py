@@ -0,0 +1,106 @@
+import threading
+import pytest
+from scheduler import InferenceScheduler, BatchedPipeline, PRIORITY_LIVE, PRIORITY_BACKGROUND
+
+class RecordingPipe:
+    """Pipeline stand-in that records every batch it runs; optionally blocks until released."""
+
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.batches = []
+        self.started = threading.Event()
+
+    def __call__(self, prompts, **kwargs):
+        self.started.set()
+        if self.gate is not None:
+            self.gate.wait(2)
+        self.batches.append(list(prompts))
+        return [[{"generated_text": prompt.upper()}] for prompt in prompts]
+
+def block(scheduler):
+    """Occupy the scheduler thread until the returned event is set."""
+    gate = threading.Event()
+    blocker = RecordingPipe(gate)
+    future = scheduler.submit(blocker, "block", batchable=False)
+    blocker.started.wait(2)
+    return gate, future
+
+def test_concurrent_prompts_share_a_batch():
+    scheduler = InferenceScheduler(max_batch_size=8, max_wait=0.5)
+    pipe = RecordingPipe()
+    futures = [scheduler.submit(pipe, f"p{i}") for i in range(3)]
+    assert [future.result(2) for future in futures] == [[{"generated_text": f"P{i}"}] for i in range(3)]
+    assert pipe.batches == [["p0", "p1", "p2"]]
+    assert scheduler.stats()["batches_run"] == 1
+    assert scheduler.stats()["requests_run"] == 3
+
+def test_batches_are_capped_at_max_batch_size():
+    scheduler = InferenceScheduler(max_batch_size=2, max_wait=0.0)
+    gate, blocked = block(scheduler)
+    pipe = RecordingPipe()
+    futures = [scheduler.submit(pipe, f"p{i}") for i in range(5)]
+    gate.set()
+    for future in futures + [blocked]:
+        future.result(2)
+    assert [len(batch) for batch in pipe.batches] == [2, 2, 1]
+
+def test_different_settings_and_unbatchable_prompts_run_separately():
+    scheduler = InferenceScheduler(max_batch_size=8, max_wait=0.0)
+    gate, blocked = block(scheduler)
+    pipe = RecordingPipe()
+    futures = [
+        scheduler.submit(pipe, "a", max_new_tokens=16),
+        scheduler.submit(pipe, "b", max_new_tokens=32),
+        scheduler.submit(pipe, "c", batchable=False, max_new_tokens=16),
+        scheduler.submit(pipe, "d", max_new_tokens=16)
+    ]
+    gate.set()
+    for future in futures + [blocked]:
+        future.result(2)
+    assert sorted(pipe.batches) == [["a", "d"], ["b"], ["c"]]
+
+def test_live_requests_run_before_background_ones():
+    scheduler = InferenceScheduler(max_batch_size=1, max_wait=0.0)
+    gate, blocked = block(scheduler)
+    pipe = RecordingPipe()
+    futures = [
+        scheduler.submit(pipe, "background", priority=PRIORITY_BACKGROUND),
+        scheduler.submit(pipe, "live", priority=PRIORITY_LIVE)
+    ]
+    gate.set()
+    for future in futures + [blocked]:
+        future.result(2)
+    assert pipe.batches == [["live"], ["background"]]
+
+def test_pipeline_errors_reach_every_request_of_the_batch():
+    def failing(prompts, **kwargs):
+        raise RuntimeError("out of memory")
+
+    scheduler = InferenceScheduler(max_batch_size=8, max_wait=0.2)
+    futures = [scheduler.submit(failing, prompt) for prompt in ("a", "b")]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="out of memory"):
+            future.result(2)
+    # The scheduler keeps serving after a failed batch
+    assert scheduler.submit(RecordingPipe(), "c").result(2) == [{"generated_text": "C"}]
+
+def test_cancelled_requests_are_skipped():
+    scheduler = InferenceScheduler(max_batch_size=8, max_wait=0.0)
+    gate, blocked = block(scheduler)
+    pipe = RecordingPipe()
+    cancelled = scheduler.submit(pipe, "cancelled")
+    kept = scheduler.submit(pipe, "kept")
+    assert cancelled.cancel()
+    gate.set()
+    kept.result(2)
+    blocked.result(2)
+    assert pipe.batches == [["kept"]]
+
+def test_batched_pipeline_accepts_single_prompts_and_lists():
+    pipe = RecordingPipe()
+    batched = BatchedPipeline(pipe, InferenceScheduler(max_batch_size=8, max_wait=0.05))
+    assert batched("one", batch_size=4) == [{"generated_text": "ONE"}]
+    assert batched(["two", "three"]) == [[{"generated_text": "TWO"}], [{"generated_text": "THREE"}]]
+    assert ["two", "three"] in pipe.batches
+    # Attribute access falls through to the wrapped pipeline
+    assert batched.batches is pipe.batches
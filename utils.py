@@ -1,37 +1,124 @@
 import re
 from io import BytesIO
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+from report import render_report
+
+# One pass over the text removes chat turns, special tokens and think blocks. Each span is matched as runs of
+# plain text between "<" characters instead of a lazy .*?, so long outputs are scanned in linear time;
+# (?=([^<]*))\1 matches a run without backtracking into it when a chat turn is left open.
+CHAT_MARKUP = re.compile(
+    r'<\|im_start\|>(?=([^<]*))\1(?:<(?!\|im_end\|>)(?=([^<]*))\2)*<\|im_end\|>'
+    r'|<\|[^|]*(?:\|(?!>)[^|]*)*\|>'
+    r'|<think>[^<]*(?:<(?!/think>)[^<]*)*</think>'
+)
+LEADING_NUMBER = re.compile(r'^\d+[\.\)\s]*')
+BLANK_LINES = re.compile(r'\n+')
+NUMBERED_ITEM = re.compile(r'\d+\.\s*([^\n?]+\??)')
 
 def clean_response(response):
     """Clean and format the model response."""
-    response = re.sub(r'<\|im_start\|>.*?<\|im_end\|>', '', response, flags=re.DOTALL)
-    response = re.sub(r'<\|.*?\|>', '', response, flags=re.DOTALL)
-    response = re.sub(r'<think>.*?</think>', '', response, flags=re.DOTALL)
-    if "assistant" in response.lower():
-        parts = re.split(r'assistant', response, flags=re.IGNORECASE)
-        if len(parts) > 1:
-            response = parts[-1].strip()
-    response = re.sub(r'^\d+[\.\)\s]*', '', response).strip()
-    response = re.sub(r'\n+', '\n', response).strip()
+    response = CHAT_MARKUP.sub('', response)
+    # Keep only what follows the last "assistant" role marker
+    marker = response.lower().rfind('assistant')
+    if marker != -1:
+        response = response[marker + len('assistant'):].strip()
+    response = LEADING_NUMBER.sub('', response, count=1).strip()
+    response = BLANK_LINES.sub('\n', response).strip()
     return response
 
-def extract_questions(response):
-    """Extract generated questions from model response."""
-    questions = []
-    lines = response.split('\n')
-    for line in lines:
-        match = re.match(r'(\d+)\.?\s*(.*)', line.strip())
-        if match:
-            question_num = int(match.group(1))
-            question_text = match.group(2).strip()
-            if len(question_text) > 20 and '?' in question_text:
-                questions.append(f"{question_num}. {question_text}")
-    if len(questions) < 5:
-        pattern = r'\d+\.\s*([^\n?]+\??)'
-        alt_questions = re.findall(pattern, response)
-        questions = [f"{i+1}. {q.strip()}" for i, q in enumerate(alt_questions[:5])]
-    return questions[:5]
+def extract_questions(response, limit=5):
+    """Extract generated questions from model response.
+
+    clean_response strips the leading "1." of the first question, so an unnumbered first line is accepted
+    as question 1. Questions are renumbered in order.
+    """
+    parser = QuestionStreamParser(limit=limit, numbered_prompt=True)
+    parser.feed(response)
+    parser.close()
+    questions = parser.questions
+    if len(questions) < limit:
+        # Questions not on lines of their own, e.g. "1. ... 2. ..." in a single paragraph
+        inline = NUMBERED_ITEM.findall(response)
+        if len(inline) > len(questions):
+            questions = [f"{i+1}. {question.strip()}" for i, question in enumerate(inline[:limit])]
+    return questions[:limit]
+
+class QuestionStreamParser:
+    """Incrementally parse streamed model output and emit numbered questions as their lines complete.
+
+    Echoed chat turns (<|im_start|> ... <|im_end|>), other special tokens and <think> blocks are skipped as
+    the text arrives, even when they span several lines.
+    """
+    QUESTION_LINE = re.compile(r'(\d+)?[\.\)]?\s*(.*)')
+    SPAN_START = re.compile(r'<think>|<\|im_start\|>|<\|.*?\|>')
+    SPAN_END = {'<think>': '</think>', '<|im_start|>': '<|im_end|>'}
+
+    def __init__(self, limit=5, numbered_prompt=False):
+        # numbered_prompt: the prompt already ends with "1.", so an unnumbered first line is question 1
+        self.limit = limit
+        self.numbered_prompt = numbered_prompt
+        self.questions = []
+        self._buffer = ""
+        self._closing_tag = None
+
+    @property
+    def done(self):
+        return len(self.questions) >= self.limit
+
+    def feed(self, chunk):
+        """Add a chunk of generated text and return the questions it completed."""
+        self._buffer += chunk
+        completed = []
+        while not self.done:
+            newline = self._buffer.find('\n')
+            if newline == -1:
+                break
+            line = self._buffer[:newline]
+            self._buffer = self._buffer[newline + 1:]
+            question = self._parse_line(line)
+            if question:
+                completed.append(question)
+        return completed
+
+    def close(self):
+        """Parse the trailing line once generation has finished."""
+        line, self._buffer = self._buffer, ""
+        question = None if self.done else self._parse_line(line)
+        return [question] if question else []
+
+    def _strip_markup(self, line):
+        text = ""
+        while line:
+            if self._closing_tag is not None:
+                end = line.find(self._closing_tag)
+                if end == -1:
+                    return text
+                line = line[end + len(self._closing_tag):]
+                self._closing_tag = None
+                continue
+            match = self.SPAN_START.search(line)
+            if match is None:
+                return text + line
+            text += line[:match.start()]
+            line = line[match.end():]
+            if match.group() == '<|im_start|>' and line.strip().lower() == 'assistant':
+                # The assistant turn is the answer itself; only its role header is dropped
+                return text
+            self._closing_tag = self.SPAN_END.get(match.group())
+        return text
+
+    def _parse_line(self, line):
+        line = self._strip_markup(line).strip()
+        if not line:
+            return None
+        match = self.QUESTION_LINE.match(line)
+        if match.group(1) is None and not (self.numbered_prompt and not self.questions):
+            return None
+        question_text = match.group(2).strip()
+        if len(question_text) > 20 and '?' in question_text:
+            question = f"{len(self.questions) + 1}. {question_text}"
+            self.questions.append(question)
+            return question
+        return None
 
 def format_tech_stack(tech_input):
     """Format the tech stack input into a list."""
@@ -47,26 +134,14 @@ def analyze_sentiment(text, sentiment_pipeline):
     except:
         return {"label": "ERROR", "score": 0.0}
 
-def generate_pdf(questions, answers):
+def generate_pdf(questions, answers, candidate_data=None, sentiment=None):
     """Generate a PDF of the technical assessment questions and answers."""
     buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=letter)
-    c.setFont("Helvetica", 12)
-    y = 750
-    c.drawString(100, y, "Technical Assessment")
-    y -= 30
-    for i, question in enumerate(questions):
-        q_text = re.sub(r'^\d+\.\s*', '', question).strip()
-        c.drawString(100, y, f"Question {i + 1}: {q_text}")
-        y -= 20
-        if i < len(answers):
-            c.drawString(100, y, f"Answer: {answers[i]}")
-        else:
-            c.drawString(100, y, "Answer: Not provided")
-        y -= 30
-        if y < 50:
-            c.showPage()
-            y = 750
-    c.save()
+    render_report({
+        "questions": questions,
+        "answers": answers,
+        "candidate_data": candidate_data,
+        "sentiment": sentiment
+    }, buffer)
     buffer.seek(0)
     return buffer
\ No newline at end of file
@@ -0,0 +1,456 @@
+"""Pool of model worker processes for many-core CPU hosts.
+
+Each worker process loads its own copy of the models, is pinned to a contiguous subset of the cores and
+runs with a matching number of torch threads, so generation in one worker never competes with another
+for cores. Conversation turns that need a model are shipped to a worker as HiringState.to_dict() and
+come back the same way; the rest run in the calling process.
+"""
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from conversation import handle_conversation
+from state import HiringState
+from config import (
+    MODEL_WORKERS, MODEL_WORKER_THREADS, MODEL_WORKER_PIN, MODEL_WORKER_CONCURRENCY, MODEL_WORKER_AFFINITY_SLACK
+)
+
+# Stages handled in the calling process: they need neither the LLM nor the sentiment model
+LOCAL_STAGES = ("greeting", "awaiting_start", "info_gathering")
+
+# Candidate fields the question prefetch depends on (see prefetch.QuestionPrefetcher)
+PREFETCH_FIELDS = ("years_experience", "desired_position")
+
+def plan_cores(workers, cores=None):
+    """Split the usable cores into `workers` contiguous, near-equal groups (neighbouring cores share caches)."""
+    if cores is None:
+        cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    if workers > len(cores):
+        raise ValueError(f"{workers} workers need at least as many cores; {len(cores)} available")
+    size, extra = divmod(len(cores), workers)
+    groups, start = [], 0
+    for index in range(workers):
+        end = start + size + (index < extra)
+        groups.append(cores[start:end])
+        start = end
+    return groups
+
+def _configure_threads(cores, threads, pin):
+    # Must run before the first parallel torch op of the process
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[name] = str(threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    if pin and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    import torch
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Already fixed if torch ran a parallel op during import
+        pass
+
+def _worker_services(backend, fake):
+    if fake is not None:
+        from benchmarks.fakes import fake_services
+        return fake_services(**fake)
+    from model import load_models
+    from services import build_services
+    services = build_services(*load_models(backend))
+    # Sentiment runs inline on the worker's own cores, so results are in the state the turn returns
+    services["sentiment_worker"] = None
+    return services
+
+def _worker_main(index, cores, threads, pin, backend, fake, concurrency, conn):
+    """Entry point of a worker process: load the models, then serve requests from the router until told to stop."""
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    try:
+        _configure_threads(cores, threads, pin)
+        start = time.perf_counter()
+        services = _worker_services(backend, fake)
+        from question_bank import create_question_bank
+        from config import (
+            QUESTION_BANK_ENABLED, QUESTION_BANK_PATH, QUESTION_BANK_TTL_HOURS, QUESTION_BANK_MAX_KEYS,
+            QUESTION_BANK_VARIANTS, QUESTION_BANK_OFFLINE_PATH
+        )
+        question_bank = create_question_bank(
+            QUESTION_BANK_PATH, QUESTION_BANK_TTL_HOURS, QUESTION_BANK_MAX_KEYS, QUESTION_BANK_VARIANTS,
+            QUESTION_BANK_OFFLINE_PATH
+        ) if QUESTION_BANK_ENABLED and fake is None else None
+    except Exception as exc:
+        send((None, "failed", f"{type(exc).__name__}: {exc}"))
+        return
+    send((None, "ready", {"load_seconds": time.perf_counter() - start, "pid": os.getpid()}))
+
+    # Live states of the sessions routed here; a turn reuses the cached object while it matches what the
+    # router sent. The question prefetch, started by a "warm" request while the router still handles the
+    # contact fields, is carried over to the rebuilt state as long as experience and position are unchanged
+    states = OrderedDict()
+    states_lock = threading.Lock()
+
+    def restore(data):
+        with states_lock:
+            cached = states.get(data["session_id"])
+        if cached is not None and cached.events.total == data["events"]["total"] and cached.stage == data["stage"]:
+            return cached
+        state = HiringState.from_dict(data)
+        if cached is not None and all(
+            cached.candidate_data[field] == state.candidate_data[field] for field in PREFETCH_FIELDS
+        ):
+            state.question_prefetch = cached.question_prefetch
+        return state
+
+    def remember(state):
+        with states_lock:
+            states[state.session_id] = state
+            states.move_to_end(state.session_id)
+            while len(states) > 256:
+                states.popitem(last=False)
+
+    def turn(request_id, payload):
+        state = restore(payload["state"])
+        on_question = (lambda question: send((request_id, "question", question))) if payload["stream"] else None
+        on_queue = (lambda position: send((request_id, "queue", position))) if payload["queue"] else None
+        response, state = handle_conversation(
+            payload["user_input"], state, services.get("tech_question_chain"), services.get("relevance_chain"),
+            services.get("revision_chain"), services.get("sentiment_pipeline"), on_question=on_question,
+            question_bank=question_bank, prefetcher=services.get("prefetcher"),
+            relevance_engine=services.get("relevance_engine"), generation_budgets=services.get("generation_budgets"),
+            admission=services.get("admission"), on_queue=on_queue
+        )
+        remember(state)
+        return {"response": response, "state": state.to_dict()}
+
+    def warm(request_id, payload):
+        prefetcher = services.get("prefetcher")
+        if prefetcher is None:
+            return None
+        state = restore(payload["state"])
+        prefetcher.warm(state)
+        remember(state)
+        return None
+
+    def evaluate(request_id, payload):
+        evaluator = services.get("answer_evaluator")
+        if evaluator is None:
+            return []
+        state = HiringState.from_dict(payload["state"])
+        future = evaluator.submit(state)
+        if future is not None:
+            future.result()
+        return state.evaluations
+
+    def serve(request_id, op, payload):
+        try:
+            result = {"turn": turn, "warm": warm, "evaluate": evaluate}[op](request_id, payload)
+        except Exception as exc:
+            send((request_id, "error", f"{type(exc).__name__}: {exc}"))
+        else:
+            send((request_id, "result", result))
+
+    # A few requests at a time, so the worker's own scheduler can still batch them. With admission control the
+    # limit moves to the controller: turns beyond it wait in its fair queue, where the queue-time SLOs apply
+    admission = services.get("admission")
+    queued = 0
+    if admission is not None:
+        admission.max_active = concurrency
+        queued = admission.degrade_depth
+    executor = ThreadPoolExecutor(max_workers=concurrency + queued, thread_name_prefix=f"model-worker-{index}")
+    while True:
+        try:
+            request_id, op, payload = conn.recv()
+        except EOFError:
+            break
+        if op == "stop":
+            break
+        executor.submit(serve, request_id, op, payload)
+    executor.shutdown(wait=True)
+
+class WorkerError(RuntimeError):
+    """A model worker failed to load, died, or raised while handling a request."""
+
+class _Worker:
+    """Router-side handle of one worker process."""
+
+    def __init__(self, index, cores, threads, process, conn):
+        self.index = index
+        self.cores = cores
+        self.threads = threads
+        self.process = process
+        self.conn = conn
+        self.send_lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.ready = threading.Event()
+        self.error = None
+        self.load_seconds = None
+        self.requests = {}
+
+class WorkerPool:
+    """Starts the worker processes and routes model calls of handle_conversation to them.
+
+    Turns of a session stick to the worker that served it before, unless that worker has `affinity_slack`
+    more requests in flight than the least-loaded one; new sessions and answer evaluations go to the
+    least-loaded worker. Exposes ready/wait/status like loader.ModelLoader.
+    """
+
+    def __init__(self, workers, threads=None, pin=True, backend=None, concurrency=4, affinity_slack=2, fake=None):
+        self.affinity_slack = affinity_slack
+        self.workers = []
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._affinity = OrderedDict()
+        self._latest = weakref.WeakValueDictionary()
+        context = multiprocessing.get_context("spawn")
+        for index, cores in enumerate(plan_cores(workers)):
+            worker_threads = threads or len(cores)
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_worker_main, name=f"model-worker-{index}", daemon=True,
+                args=(index, cores, worker_threads, pin, backend, fake, concurrency, child_conn)
+            )
+            process.start()
+            child_conn.close()
+            worker = _Worker(index, cores, worker_threads, process, parent_conn)
+            threading.Thread(target=self._read, args=(worker,), name=f"model-worker-{index}-reader", daemon=True).start()
+            self.workers.append(worker)
+        self.evaluator = RemoteAnswerEvaluator(self)
+        self.prefetcher = RemotePrefetcher(self)
+
+    def _read(self, worker):
+        """Dispatch the worker's messages to the waiting requests; fail them all if the worker dies."""
+        while True:
+            try:
+                request_id, kind, payload = worker.conn.recv()
+            except (EOFError, OSError):
+                break
+            if request_id is None:
+                if kind == "ready":
+                    worker.load_seconds = payload["load_seconds"]
+                else:
+                    worker.error = payload
+                worker.ready.set()
+                if kind == "failed":
+                    break
+                continue
+            messages = worker.requests.get(request_id)
+            if messages is not None:
+                messages.put((kind, payload))
+        worker.error = worker.error or "worker process exited"
+        worker.ready.set()
+        for messages in list(worker.requests.values()):
+            messages.put(("error", worker.error))
+
+    @property
+    def ready(self):
+        """True once every worker has finished loading (or failed)."""
+        return all(worker.ready.is_set() for worker in self.workers)
+
+    def wait(self, timeout=None):
+        """Block until the workers are loaded; raises if none of them could load the models."""
+        for worker in self.workers:
+            worker.ready.wait(timeout)
+        if all(worker.error for worker in self.workers):
+            raise WorkerError(f"No model worker could start: {self.workers[0].error}")
+
+    def status(self):
+        """Per-worker load state and load time in seconds."""
+        return {
+            f"worker{worker.index}": "failed" if worker.error else (
+                round(worker.load_seconds, 1) if worker.ready.is_set() else "loading"
+            )
+            for worker in self.workers
+        }
+
+    def _pick(self, session_id=None):
+        with self._lock:
+            alive = [worker for worker in self.workers if worker.error is None]
+            if not alive:
+                raise WorkerError("No model worker is available")
+            least = min(alive, key=lambda worker: worker.in_flight)
+            pinned = self._affinity.get(session_id)
+            if pinned is not None and pinned.error is None and pinned.in_flight <= least.in_flight + self.affinity_slack:
+                chosen = pinned
+            else:
+                chosen = least
+            if session_id is not None:
+                self._affinity[session_id] = chosen
+                self._affinity.move_to_end(session_id)
+                while len(self._affinity) > 65536:
+                    self._affinity.popitem(last=False)
+            chosen.in_flight += 1
+            return chosen
+
+    def _call(self, op, payload, session_id=None, on_message=None):
+        worker = self._pick(session_id)
+        request_id = next(self._ids)
+        messages = worker.requests[request_id] = queue.Queue()
+        try:
+            worker.ready.wait()
+            if worker.error is not None:
+                raise WorkerError(worker.error)
+            with worker.send_lock:
+                worker.conn.send((request_id, op, payload))
+            while True:
+                kind, result = messages.get()
+                if kind == "result":
+                    worker.completed += 1
+                    return result
+                if kind == "error":
+                    raise WorkerError(result)
+                if on_message is not None:
+                    on_message(kind, result)
+        finally:
+            del worker.requests[request_id]
+            with self._lock:
+                worker.in_flight -= 1
+
+    def converse(self, user_input, state, on_question=None, on_queue=None, **kwargs):
+        """Run one turn; stages that need a model run on a worker, the others in this process.
+
+        Other converse() arguments such as question_bank are not sent: each worker opens the shared bank itself.
+        """
+        if state.stage in LOCAL_STAGES:
+            return handle_conversation(
+                user_input, state, None, None, None, None, on_question=on_question, prefetcher=self.prefetcher
+            )
+        payload = {
+            "user_input": user_input,
+            "state": state.to_dict(),
+            "stream": on_question is not None,
+            "queue": on_queue is not None
+        }
+        callbacks = {"question": on_question, "queue": on_queue}
+        result = self._call(
+            "turn", payload, state.session_id, lambda kind, message: callbacks[kind](message)
+        )
+        new_state = HiringState.from_dict(result["state"])
+        new_state.persisted = state.persisted
+        with self._lock:
+            # Evaluations the router recorded while the turn was in flight
+            if len(state.evaluations) > len(new_state.evaluations):
+                new_state.evaluations = list(state.evaluations)
+            self._latest[state.session_id] = new_state
+        if state.stage != "closing" and new_state.stage == "closing":
+            self.evaluator.submit(new_state)
+        return result["response"], new_state
+
+    def services(self):
+        """Services for services.converse: turns go through the pool, answer scoring runs on the workers."""
+        return {"worker_pool": self, "sentiment_worker": None, "answer_evaluator": self.evaluator}
+
+    def stats(self):
+        """Per-worker cores, threads and load."""
+        return [
+            {
+                "worker": worker.index,
+                "pid": worker.process.pid,
+                "cores": f"{worker.cores[0]}-{worker.cores[-1]}",
+                "threads": worker.threads,
+                "in_flight": worker.in_flight,
+                "completed": worker.completed,
+                "error": worker.error
+            }
+            for worker in self.workers
+        ]
+
+    def close(self):
+        for worker in self.workers:
+            try:
+                with worker.send_lock:
+                    worker.conn.send((None, "stop", None))
+            except (OSError, ValueError):
+                pass
+        for worker in self.workers:
+            worker.process.join(timeout=10)
+            if worker.process.is_alive():
+                worker.process.terminate()
+
+class RemotePrefetcher:
+    """QuestionPrefetcher stand-in for the router's local turns: the warm-up runs on the session's worker.
+
+    The request goes to the worker the session is pinned to, which also serves its question generation unless
+    it is overloaded by then; the worker keeps the warm-up with its copy of the state.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="remote-prefetch")
+        self.started = 0
+
+    def warm(self, state):
+        if state.question_prefetch is not None:
+            return
+        # Marks the router's state so later contact fields do not warm up again
+        state.question_prefetch = self.executor.submit(
+            self.pool._call, "warm", {"state": state.to_dict()}, state.session_id
+        )
+        self.started += 1
+
+    def stats(self):
+        return {"started": self.started}
+
+class RemoteAnswerEvaluator:
+    """AnswerEvaluator stand-in for the router: sessions are scored on a worker and the results recorded here."""
+
+    def __init__(self, pool, max_sessions=16):
+        self.pool = pool
+        self.executor = ThreadPoolExecutor(max_workers=max_sessions, thread_name_prefix="remote-eval")
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def submit(self, state):
+        if len(state.evaluations) >= min(len(state.tech_questions), len(state.answers)):
+            return None
+        with self._lock:
+            future = self._pending.get(state.session_id)
+            if future is None:
+                future = self._pending[state.session_id] = self.executor.submit(self._evaluate, state)
+        return future
+
+    def _evaluate(self, state):
+        try:
+            evaluations = self.pool._call("evaluate", {"state": state.to_dict()})
+            with self.pool._lock:
+                # The session's current state object, which may have been replaced by a later turn
+                target = self.pool._latest.get(state.session_id, state)
+                done = {evaluation["turn"] for evaluation in target.evaluations}
+                for evaluation in evaluations:
+                    if evaluation["turn"] not in done:
+                        target.record_evaluation(
+                            evaluation["turn"], evaluation["score"], evaluation["feedback"], evaluation["cached"]
+                        )
+            return evaluations
+        finally:
+            with self._lock:
+                self._pending.pop(state.session_id, None)
+
+    def pending(self, state):
+        with self._lock:
+            return state.session_id in self._pending
+
+    def wait(self, state, timeout=None):
+        with self._lock:
+            future = self._pending.get(state.session_id)
+        if future is not None:
+            wait([future], timeout)
+
+def create_worker_pool(workers=None, backend=None, fake=None):
+    """Create a pool configured by the TALENTSCOUT_MODEL_WORKER* settings, or None if the pool is disabled."""
+    workers = MODEL_WORKERS if workers is None else workers
+    if not workers:
+        return None
+    return WorkerPool(
+        workers, MODEL_WORKER_THREADS or None, MODEL_WORKER_PIN, backend, MODEL_WORKER_CONCURRENCY,
+        MODEL_WORKER_AFFINITY_SLACK, fake
+    )